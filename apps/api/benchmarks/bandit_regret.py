@@ -0,0 +1,72 @@
+"""Offline regret of a fixed equal split vs. the Thompson sampling bandit.
+
+Simulates ``--visitors`` visitors arriving at a test whose variants convert
+at ``--rates``. The fixed split sends each variant the same share for the
+whole test; the bandit reallocates with ``thompson_allocation`` every
+``--update-every`` visitors, like the periodic weight task does. Regret is
+the conversions lost against always showing the best variant, averaged over
+``--runs`` seeds.
+
+    PYTHONPATH=src python benchmarks/bandit_regret.py
+    PYTHONPATH=src python benchmarks/bandit_regret.py --rates 0.030,0.032 --visitors 200000
+"""
+
+import argparse
+import json
+
+import numpy as np
+
+from marketing_api.experiments.bandit import WEIGHT_TOTAL, thompson_allocation
+
+
+def simulate(rates: np.ndarray, args: argparse.Namespace, seed: int, *, bandit: bool) -> dict:
+    rng = np.random.default_rng(seed)
+    arms = len(rates)
+    visitors = np.zeros(arms, dtype=np.int64)
+    conversions = np.zeros(arms, dtype=np.int64)
+    weights = np.full(arms, 1 / arms)
+    for offset in range(0, args.visitors, args.update_every):
+        size = min(args.update_every, args.visitors - offset)
+        chosen = rng.choice(arms, size=size, p=weights)
+        converted = rng.random(size) < rates[chosen]
+        visitors += np.bincount(chosen, minlength=arms)
+        conversions += np.bincount(chosen[converted], minlength=arms)
+        if bandit:
+            allocation = thompson_allocation(
+                conversions.tolist(), visitors.tolist(), draws=args.draws, seed=seed + offset
+            )
+            weights = np.asarray(allocation) / WEIGHT_TOTAL
+    return {
+        "regret": float(rates.max() * args.visitors - (rates * visitors).sum()),
+        "conversions": int(conversions.sum()),
+        "best_share": float(visitors[rates.argmax()] / args.visitors),
+    }
+
+
+def summarize(runs: list[dict]) -> dict:
+    return {key: round(float(np.mean([run[key] for run in runs])), 4) for key in runs[0]}
+
+
+def main(args: argparse.Namespace) -> dict:
+    rates = np.array([float(rate) for rate in args.rates.split(",")])
+    fixed = summarize([simulate(rates, args, seed, bandit=False) for seed in range(args.runs)])
+    bandit = summarize([simulate(rates, args, seed, bandit=True) for seed in range(args.runs)])
+    return {
+        "rates": rates.tolist(),
+        "visitors": args.visitors,
+        "update_every": args.update_every,
+        "runs": args.runs,
+        "fixed": fixed,
+        "bandit": bandit,
+        "regret_reduction": round(1 - bandit["regret"] / fixed["regret"], 3) if fixed["regret"] else None,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rates", default="0.040,0.045,0.055", help="true conversion rate per variant")
+    parser.add_argument("--visitors", type=int, default=50_000)
+    parser.add_argument("--update-every", type=int, default=1_000, help="visitors between weight updates")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--draws", type=int, default=5_000, help="posterior draws per update")
+    print(json.dumps(main(parser.parse_args()), indent=2))
@@ -0,0 +1,115 @@
+"""Measure /health latency while a burst of logins hashes passwords.
+
+Runs the same burst twice:
+
+* ``inline``: argon2 verification on the event loop, as login used to do.
+* ``executor``: verification on the bounded password-hash executor.
+
+    PYTHONPATH=src python benchmarks/login_burst.py --logins 40
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from unittest import mock
+
+import httpx
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from marketing_api.auth import service
+from marketing_api.auth.security import hash_password, pwd_context
+from marketing_api.db import models
+from marketing_api.db.base import Base
+from marketing_api.db.session import get_session
+from marketing_api.limits import limiter
+from marketing_api.main import app
+
+EMAIL = "bench@example.com"
+PASSWORD = "correct horse battery staple"
+PROBE_INTERVAL = 0.005
+
+
+async def verify_inline(plain_password: str, hashed_password: str | None) -> tuple[bool, str | None]:
+    if hashed_password is None:
+        pwd_context.dummy_verify()
+        return False, None
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+async def run_burst(client: httpx.AsyncClient, logins: int) -> dict:
+    probe_latencies: list[float] = []
+    done = asyncio.Event()
+
+    async def probe() -> None:
+        # Latency is measured from when each probe was due, so time spent
+        # waiting for a blocked event loop counts against it.
+        due = time.perf_counter()
+        while not done.is_set():
+            await asyncio.sleep(max(0.0, due - time.perf_counter()))
+            await client.get("/health")
+            probe_latencies.append((time.perf_counter() - due) * 1000)
+            due = max(due + PROBE_INTERVAL, time.perf_counter())
+
+    async def login() -> int:
+        response = await client.post("/auth/login", json={"email": EMAIL, "password": PASSWORD})
+        return response.status_code
+
+    probe_task = asyncio.create_task(probe())
+    started = time.perf_counter()
+    statuses = await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+    done.set()
+    await probe_task
+
+    return {
+        "logins": logins,
+        "failed": sum(status != 200 for status in statuses),
+        "logins_per_second": round(logins / elapsed, 1),
+        "health_p50_ms": round(statistics.median(probe_latencies), 2),
+        "health_p95_ms": round(percentile(probe_latencies, 0.95), 2),
+        "health_max_ms": round(max(probe_latencies), 2),
+        "health_requests": len(probe_latencies),
+    }
+
+
+async def main(logins: int) -> list[dict]:
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    sessionmaker = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    async with sessionmaker() as session:
+        session.add(models.User(email=EMAIL, hashed_password=hash_password(PASSWORD)))
+        await session.commit()
+
+    async def override_session():
+        async with sessionmaker() as session:
+            yield session
+
+    app.dependency_overrides[get_session] = override_session
+    limiter.enabled = False
+    results = []
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            with mock.patch.object(service, "verify_and_update_password", verify_inline):
+                results.append({"mode": "inline", **await run_burst(client, logins)})
+            results.append({"mode": "executor", **await run_burst(client, logins)})
+    finally:
+        app.dependency_overrides.clear()
+        await engine.dispose()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=40)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(main(args.logins)), indent=2))
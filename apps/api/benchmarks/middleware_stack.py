@@ -0,0 +1,109 @@
+"""Requests/second on ``/health`` through the full middleware stack.
+
+Compares the previous ``BaseHTTPMiddleware`` versions of the PostHog and
+error-alert middleware (reproduced below) with the current pure ASGI ones.
+PostHog is replaced by a client that drops every event, so the numbers show
+the cost of the middleware itself rather than of the PostHog SDK.
+
+    PYTHONPATH=src python benchmarks/middleware_stack.py
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+from fastapi import Request
+from starlette.middleware import Middleware
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from marketing_api import posthog_client
+from marketing_api.main import create_app
+from marketing_api.middleware.alerts import ErrorAlertMiddleware
+from marketing_api.middleware.posthog import PostHogMiddleware
+from marketing_api.posthog_client import capture_api_error, capture_performance
+
+
+class NullPostHog:
+    def capture(self, *args, **kwargs) -> None:
+        pass
+
+
+class LegacyPostHogMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        start_time = time.time()
+        user_id = None
+        if hasattr(request.state, "user") and request.state.user:
+            user_id = str(getattr(request.state.user, "id", None))
+        response = await call_next(request)
+        capture_performance(
+            endpoint=str(request.url.path),
+            method=request.method,
+            duration_ms=(time.time() - start_time) * 1000,
+            user_id=user_id,
+            additional_context={
+                "status_code": response.status_code,
+                "query_params": dict(request.query_params) if request.query_params else None,
+            },
+        )
+        if response.status_code >= 400:
+            capture_api_error(
+                endpoint=str(request.url.path),
+                method=request.method,
+                status_code=response.status_code,
+                user_id=user_id,
+            )
+        return response
+
+
+class LegacyErrorAlertMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        return await call_next(request)
+
+
+LEGACY = {PostHogMiddleware: LegacyPostHogMiddleware, ErrorAlertMiddleware: LegacyErrorAlertMiddleware}
+
+
+def build_app(mode: str):
+    app = create_app()
+    if mode == "legacy":
+        # Starlette builds the middleware stack lazily on the first request.
+        app.user_middleware = [
+            Middleware(LEGACY.get(item.cls, item.cls), *item.args, **item.kwargs)
+            for item in app.user_middleware
+        ]
+    return app
+
+
+async def run(mode: str, requests: int, concurrency: int) -> dict:
+    app = build_app(mode)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.get("/health")
+
+        async def worker(count: int) -> None:
+            for _ in range(count):
+                response = await client.get("/health")
+                response.raise_for_status()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(requests // concurrency) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    total = requests // concurrency * concurrency
+    return {
+        "mode": mode,
+        "requests": total,
+        "requests_per_second": round(total / elapsed),
+        "us_per_request": round(elapsed / total * 1_000_000, 1),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=10)
+    args = parser.parse_args()
+    posthog_client._posthog_client = NullPostHog()
+    results = [asyncio.run(run(mode, args.requests, args.concurrency)) for mode in ("legacy", "asgi")]
+    print(json.dumps(results, indent=2))
@@ -0,0 +1,66 @@
+"""Per-request cost of the rate limiter, with and without local token leases.
+
+Simulates ``--clients`` callers each making ``--requests`` calls against a
+100/minute limit (the A/B assignment endpoints) and reports the time spent in
+``hit`` and the number of storage round trips.
+
+    PYTHONPATH=src python benchmarks/rate_limiter.py
+    PYTHONPATH=src python benchmarks/rate_limiter.py --storage-uri redis://localhost:6379/15
+
+Against Redis every storage hit is a network round trip, so the
+``storage_hits`` column is the one that matters; with ``memory://`` the numbers
+only show the bookkeeping cost of the lease layer itself.
+"""
+
+import argparse
+import json
+import time
+
+from limits import parse
+from limits.storage import storage_from_string
+from limits.strategies import SlidingWindowCounterRateLimiter
+
+from marketing_api.limits import LeasedRateLimiter
+
+
+class CountingLimiter(SlidingWindowCounterRateLimiter):
+    def __init__(self, storage) -> None:
+        super().__init__(storage)
+        self.calls = 0
+
+    def hit(self, item, *identifiers, cost=1) -> bool:
+        self.calls += 1
+        return super().hit(item, *identifiers, cost=cost)
+
+
+def run(mode: str, storage_uri: str, clients: int, requests: int) -> dict:
+    storage = storage_from_string(storage_uri)
+    storage.reset()
+    backend = CountingLimiter(storage)
+    limiter = LeasedRateLimiter(backend) if mode == "leased" else backend
+    limit = parse("100/minute")
+
+    allowed = 0
+    started = time.perf_counter()
+    for request in range(requests):
+        for client in range(clients):
+            allowed += limiter.hit(limit, f"198.51.100.{client}", "/public/ab-testing/assign")
+    elapsed = time.perf_counter() - started
+    total = clients * requests
+    return {
+        "mode": mode,
+        "requests": total,
+        "allowed": allowed,
+        "storage_hits": backend.calls,
+        "us_per_request": round(elapsed / total * 1_000_000, 2),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--storage-uri", default="memory://")
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=120)
+    args = parser.parse_args()
+    results = [run(mode, args.storage_uri, args.clients, args.requests) for mode in ("direct", "leased")]
+    print(json.dumps(results, indent=2))
@@ -0,0 +1,55 @@
+"""add_content_quotas_and_cache_key
+
+Revision ID: 1188460b877d
+Revises: a5401614a9a3
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = '1188460b877d'
+down_revision = 'a5401614a9a3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("generated_content", sa.Column("cache_key", sa.String(length=64)))
+    op.create_index("ix_generated_content_cache_key", "generated_content", ["cache_key"])
+
+    op.create_table(
+        "content_quotas",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("email", sa.String(length=255), nullable=False),
+        sa.Column("month", sa.Date(), nullable=False),
+        sa.Column("used", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.func.now(),
+            onupdate=sa.func.now(),
+        ),
+        sa.UniqueConstraint("email", "month", name="uq_content_quotas_email_month"),
+    )
+    # Carry this month's usage over so nobody gets their free generations twice,
+    # keyed on the lowercased email like reserve_quota.
+    op.execute(
+        """
+        INSERT INTO content_quotas (id, email, month, used)
+        SELECT gen_random_uuid(), lower(email), date_trunc('month', created_at AT TIME ZONE 'UTC')::date, COUNT(*)
+        FROM generated_content
+        WHERE email IS NOT NULL
+          AND created_at >= date_trunc('month', now() AT TIME ZONE 'UTC') AT TIME ZONE 'UTC'
+        GROUP BY 2, 3
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("content_quotas")
+    op.drop_index("ix_generated_content_cache_key", table_name="generated_content")
+    op.drop_column("generated_content", "cache_key")
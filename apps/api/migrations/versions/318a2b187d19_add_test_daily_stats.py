@@ -0,0 +1,67 @@
+"""add_test_daily_stats
+
+Revision ID: 318a2b187d19
+Revises: 946434051f05
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = '318a2b187d19'
+down_revision = '946434051f05'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "test_daily_stats",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("test_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("variant_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("visitors", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("conversions", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.func.now(),
+            onupdate=sa.func.now(),
+        ),
+        sa.ForeignKeyConstraint(["test_id"], ["ab_tests.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["variant_id"], ["test_variants.id"], ondelete="CASCADE"),
+        sa.UniqueConstraint("day", "variant_id", name="uq_test_daily_stats_day_variant"),
+    )
+    op.create_index("ix_test_daily_stats_day", "test_daily_stats", ["day"])
+    op.create_index("ix_test_daily_stats_test_id", "test_daily_stats", ["test_id"])
+
+    # Backfill the full history; the reconcile task only looks back a week.
+    op.execute(
+        """
+        INSERT INTO test_daily_stats (id, day, test_id, variant_id, visitors, conversions)
+        SELECT gen_random_uuid(), day, test_id, variant_id, SUM(visitors), SUM(conversions)
+        FROM (
+            SELECT (assigned_at AT TIME ZONE 'UTC')::date AS day, test_id, variant_id,
+                   COUNT(*) AS visitors, 0 AS conversions
+            FROM test_assignments
+            GROUP BY 1, 2, 3
+            UNION ALL
+            SELECT (c.converted_at AT TIME ZONE 'UTC')::date, c.test_id, c.variant_id, 0, COUNT(*)
+            FROM test_conversions AS c
+            JOIN ab_tests AS t ON t.id = c.test_id
+            WHERE c.event_name = t.conversion_event
+            GROUP BY 1, 2, 3
+        ) AS counts
+        GROUP BY day, test_id, variant_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_test_daily_stats_test_id", table_name="test_daily_stats")
+    op.drop_index("ix_test_daily_stats_day", table_name="test_daily_stats")
+    op.drop_table("test_daily_stats")
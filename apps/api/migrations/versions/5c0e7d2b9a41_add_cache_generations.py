@@ -0,0 +1,34 @@
+"""add_cache_generations
+
+Revision ID: 5c0e7d2b9a41
+Revises: 1188460b877d
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '5c0e7d2b9a41'
+down_revision = '1188460b877d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "cache_generations",
+        sa.Column("name", sa.String(length=100), primary_key=True),
+        sa.Column("generation", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.func.now(),
+            onupdate=sa.func.now(),
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("cache_generations")
@@ -0,0 +1,49 @@
+"""add_deterministic_ab_assignment
+
+Revision ID: 6248153df59e
+Revises: aaa60c8b8a99
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = '6248153df59e'
+down_revision = 'aaa60c8b8a99'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "ab_tests",
+        sa.Column("assignment_mode", sa.String(length=20), server_default="deterministic", nullable=False),
+    )
+    # Visitors of tests that already exist keep the variant stored for them.
+    op.execute("UPDATE ab_tests SET assignment_mode = 'random'")
+
+    op.add_column("test_assignments", sa.Column("unit_id", sa.String(length=255), nullable=True))
+    # Earlier races could store several rows per visitor; key only the first.
+    op.execute(
+        """
+        UPDATE test_assignments SET unit_id = first.unit_id
+        FROM (
+            SELECT DISTINCT ON (test_id, COALESCE(user_id, session_id))
+                id, COALESCE(user_id, session_id) AS unit_id
+            FROM test_assignments
+            WHERE COALESCE(user_id, session_id) IS NOT NULL
+            ORDER BY test_id, COALESCE(user_id, session_id), assigned_at, id
+        ) AS first
+        WHERE test_assignments.id = first.id
+        """
+    )
+    op.create_unique_constraint(
+        "uq_test_assignments_test_unit", "test_assignments", ["test_id", "unit_id"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint("uq_test_assignments_test_unit", "test_assignments", type_="unique")
+    op.drop_column("test_assignments", "unit_id")
+    op.drop_column("ab_tests", "assignment_mode")
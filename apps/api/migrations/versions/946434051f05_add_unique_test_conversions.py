@@ -0,0 +1,34 @@
+"""add_unique_test_conversions
+
+Revision ID: 946434051f05
+Revises: 6248153df59e
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from alembic import op
+
+
+revision = '946434051f05'
+down_revision = '6248153df59e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # The old check-then-insert could race; keep the first conversion of each pair.
+    op.execute(
+        """
+        DELETE FROM test_conversions AS later
+        USING test_conversions AS earlier
+        WHERE later.assignment_id = earlier.assignment_id
+          AND later.event_name = earlier.event_name
+          AND (later.converted_at, later.id) > (earlier.converted_at, earlier.id)
+        """
+    )
+    op.create_unique_constraint(
+        "uq_test_conversions_assignment_event", "test_conversions", ["assignment_id", "event_name"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint("uq_test_conversions_assignment_event", "test_conversions", type_="unique")
@@ -0,0 +1,53 @@
+"""chat_messages_one_row_per_turn
+
+Revision ID: a5401614a9a3
+Revises: eba02a19096b
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from alembic import op
+
+
+revision = 'a5401614a9a3'
+down_revision = 'eba02a19096b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Each AI turn was stored as a visitor row plus an AI row repeating the
+    # message. Keep the AI row, with the visitor's name and email, as the turn.
+    op.execute(
+        """
+        UPDATE chat_messages AS turn
+        SET name = asked.name, email = asked.email
+        FROM chat_messages AS asked
+        WHERE turn.is_ai_response
+          AND NOT asked.is_ai_response
+          AND asked.chat_session_id = turn.chat_session_id
+          AND asked.message = turn.message
+          AND asked.created_at <= turn.created_at
+        """
+    )
+    op.execute(
+        """
+        DELETE FROM chat_messages AS asked
+        WHERE NOT asked.is_ai_response
+          AND asked.chat_session_id IS NOT NULL
+          AND EXISTS (
+              SELECT 1 FROM chat_messages AS turn
+              WHERE turn.is_ai_response
+                AND turn.chat_session_id = asked.chat_session_id
+                AND turn.message = asked.message
+                AND turn.created_at >= asked.created_at
+          )
+        """
+    )
+    op.create_index("ix_chat_messages_session_created", "chat_messages", ["chat_session_id", "created_at"])
+    op.drop_index("ix_chat_messages_session", table_name="chat_messages")
+
+
+def downgrade() -> None:
+    # Merged turns are not split back into two rows.
+    op.create_index("ix_chat_messages_session", "chat_messages", ["chat_session_id"])
+    op.drop_index("ix_chat_messages_session_created", table_name="chat_messages")
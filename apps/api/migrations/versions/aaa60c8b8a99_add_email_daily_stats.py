@@ -0,0 +1,66 @@
+"""add_email_daily_stats
+
+Revision ID: aaa60c8b8a99
+Revises: c3d4e5f6a7b8
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision = 'aaa60c8b8a99'
+down_revision = 'c3d4e5f6a7b8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "email_daily_stats",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("campaign_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("sequence_id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("sends", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("opens", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("clicks", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.func.now(),
+            onupdate=sa.func.now(),
+        ),
+        sa.ForeignKeyConstraint(["campaign_id"], ["email_campaigns.id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["sequence_id"], ["email_sequences.id"], ondelete="CASCADE"),
+        sa.UniqueConstraint("day", "sequence_id", name="uq_email_daily_stats_day_sequence"),
+    )
+    op.create_index("ix_email_daily_stats_day", "email_daily_stats", ["day"])
+    op.create_index("ix_email_daily_stats_campaign_id", "email_daily_stats", ["campaign_id"])
+
+    # The rollup job re-aggregates a trailing window of sends by sent_at.
+    op.create_index("ix_email_sends_sent_at", "email_sends", ["sent_at"])
+
+    # Backfill the full history so all-time analytics keep their totals.
+    op.execute(
+        """
+        INSERT INTO email_daily_stats (id, day, campaign_id, sequence_id, sends, opens, clicks)
+        SELECT gen_random_uuid(), (s.sent_at AT TIME ZONE 'UTC')::date, q.campaign_id, s.sequence_id,
+               COUNT(*),
+               COUNT(*) FILTER (WHERE s.opened_at IS NOT NULL),
+               COUNT(*) FILTER (WHERE s.clicked_at IS NOT NULL)
+        FROM email_sends AS s
+        JOIN email_sequences AS q ON q.id = s.sequence_id
+        WHERE s.sent_at IS NOT NULL
+        GROUP BY 2, 3, 4
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_email_sends_sent_at", table_name="email_sends")
+    op.drop_index("ix_email_daily_stats_campaign_id", table_name="email_daily_stats")
+    op.drop_index("ix_email_daily_stats_day", table_name="email_daily_stats")
+    op.drop_table("email_daily_stats")
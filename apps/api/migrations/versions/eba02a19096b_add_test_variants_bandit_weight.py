@@ -0,0 +1,23 @@
+"""add_test_variants_bandit_weight
+
+Revision ID: eba02a19096b
+Revises: 318a2b187d19
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = 'eba02a19096b'
+down_revision = '318a2b187d19'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("test_variants", sa.Column("bandit_weight", sa.Integer()))
+
+
+def downgrade() -> None:
+    op.drop_column("test_variants", "bandit_weight")
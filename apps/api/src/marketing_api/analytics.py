@@ -0,0 +1,160 @@
+"""Bounded, batched delivery of analytics events to PostHog's batch API."""
+
+import asyncio
+import logging
+from collections import deque
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from typing import Any
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PipelineStats:
+    enqueued: int = 0
+    sent: int = 0
+    batches: int = 0
+    dropped_overflow: int = 0
+    dropped_failed: int = 0
+
+
+class EventPipeline:
+    """Ring buffer of events drained by a background asyncio flusher.
+
+    ``enqueue`` never blocks: once ``capacity`` events are waiting, the oldest
+    is overwritten and counted in ``stats.dropped_overflow``. The flusher posts
+    up to ``batch_size`` events per request, as soon as a full batch is
+    waiting or every ``flush_interval`` seconds otherwise. Batches the server
+    rejects are dropped and counted rather than retried, so a PostHog outage
+    cannot grow memory or delay shutdown.
+    """
+
+    def __init__(
+        self,
+        *,
+        host: str,
+        api_key: str,
+        capacity: int = 10_000,
+        batch_size: int = 100,
+        flush_interval: float = 2.0,
+        timeout: float = 5.0,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ) -> None:
+        self.endpoint = f"{host.rstrip('/')}/batch/"
+        self.api_key = api_key
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.timeout = timeout
+        self.transport = transport
+        self.stats = PipelineStats()
+        self._buffer: deque[dict[str, Any]] = deque(maxlen=capacity)
+        self._client: httpx.AsyncClient | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._wakeup: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self._stopping = False
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def pending(self) -> int:
+        return len(self._buffer)
+
+    def enqueue(
+        self,
+        distinct_id: str,
+        event: str,
+        properties: dict[str, Any] | None = None,
+    ) -> None:
+        """Queue an event; safe to call from the event loop or worker threads."""
+        if len(self._buffer) == self._buffer.maxlen:
+            self.stats.dropped_overflow += 1
+        self._buffer.append(
+            {
+                "event": event,
+                "distinct_id": distinct_id,
+                "properties": properties or {},
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+            }
+        )
+        self.stats.enqueued += 1
+        if len(self._buffer) >= self.batch_size and self._loop is not None and self._wakeup is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    async def start(self) -> None:
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._client = httpx.AsyncClient(timeout=self.timeout, transport=self.transport)
+        self._task = asyncio.create_task(self._run(), name="analytics-flusher")
+
+    async def stop(self) -> None:
+        """Stop the flusher after its in-flight batch, then send what is left."""
+        try:
+            if self._task is not None and self._wakeup is not None:
+                self._stopping = True
+                self._wakeup.set()
+                await self._task
+                self._task = None
+            await self.flush()
+        finally:
+            if self._client is not None:
+                await self._client.aclose()
+                self._client = None
+            self._loop = None
+            self._wakeup = None
+            self._stopping = False
+
+    async def flush(self) -> None:
+        """Send every buffered event, including a final partial batch."""
+        while self._buffer:
+            await self._send(self._take_batch())
+
+    async def _run(self) -> None:
+        assert self._wakeup is not None
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+                full_batches_only = True
+            except asyncio.TimeoutError:
+                full_batches_only = False
+            self._wakeup.clear()
+            try:
+                while not self._stopping and self._buffer:
+                    if full_batches_only and len(self._buffer) < self.batch_size:
+                        break
+                    await self._send(self._take_batch())
+            except Exception:
+                logger.exception("Analytics flush failed")
+
+    def _take_batch(self) -> list[dict[str, Any]]:
+        batch = []
+        while self._buffer and len(batch) < self.batch_size:
+            batch.append(self._buffer.popleft())
+        return batch
+
+    async def _send(self, batch: list[dict[str, Any]]) -> None:
+        if not batch:
+            return
+        client = self._client or httpx.AsyncClient(timeout=self.timeout, transport=self.transport)
+        try:
+            response = await client.post(self.endpoint, json={"api_key": self.api_key, "batch": batch})
+            response.raise_for_status()
+        except Exception as exc:
+            # Transport errors, error statuses, and properties that are not JSON serializable.
+            self.stats.dropped_failed += len(batch)
+            logger.warning("Dropped %d analytics events: %s", len(batch), exc)
+        else:
+            self.stats.sent += len(batch)
+            self.stats.batches += 1
+        finally:
+            if client is not self._client:
+                await client.aclose()
+
+    def snapshot(self) -> dict[str, int]:
+        return {**asdict(self.stats), "pending": self.pending()}
@@ -3,7 +3,7 @@ import logging
 from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from marketing_api.auth.security import hash_password
+from marketing_api.auth.security import hash_password_async
 from marketing_api.db import models
 
 logger = logging.getLogger(__name__)
@@ -28,7 +28,7 @@ async def ensure_admin_user(
     user = models.User(
         email=email,
         full_name="Admin",
-        hashed_password=hash_password(password),
+        hashed_password=await hash_password_async(password),
         is_active=True,
     )
     session.add(user)
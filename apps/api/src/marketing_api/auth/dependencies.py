@@ -1,7 +1,10 @@
+import uuid
+
 from fastapi import Depends, HTTPException, Request, status
 from jose import JWTError, jwt
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from marketing_api.auth.principal import Principal, principal_cache
 from marketing_api.auth.repository import get_user_by_id
 from marketing_api.db.session import get_session
 from marketing_api.settings import settings
@@ -14,7 +17,12 @@ def extract_bearer_token(request: Request) -> str | None:
     return None
 
 
-async def resolve_user_from_token(session: AsyncSession, token: str | None):
+async def resolve_user_from_token(session: AsyncSession, token: str | None) -> Principal | None:
+    """Resolve the bearer token to a Principal.
+
+    Tokens carrying a ``roles`` claim are trusted as-is when JWT_EMBED_ROLES is
+    on; otherwise the user is read through the principal cache.
+    """
     if not token:
         return None
     try:
@@ -25,23 +33,42 @@ async def resolve_user_from_token(session: AsyncSession, token: str | None):
         ) from exc
 
     subject = payload.get("sub")
-    if not subject:
+    try:
+        user_id = uuid.UUID(subject)
+    except (TypeError, ValueError) as exc:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token."
+        ) from exc
+
+    if settings.jwt_embed_roles and isinstance(payload.get("roles"), list):
+        return Principal(
+            id=user_id,
+            email=payload.get("email", ""),
+            full_name=None,
+            is_active=True,
+            roles=frozenset(payload["roles"]),
         )
 
-    user = await get_user_by_id(session, subject)
-    if not user:
+    principal = principal_cache.get(user_id)
+    if principal is None:
+        user = await get_user_by_id(session, subject)
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found."
+            )
+        principal = Principal.from_user(user)
+        principal_cache.put(principal)
+
+    if not principal.is_active:
         raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found."
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="User is inactive."
         )
-
-    return user
+    return principal
 
 
 async def get_current_user(
     request: Request, session: AsyncSession = Depends(get_session)
-):
+) -> Principal:
     token = extract_bearer_token(request)
     user = await resolve_user_from_token(session, token)
     if not user:
@@ -0,0 +1,110 @@
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from marketing_api.db.models import Role, User, UserRole
+from marketing_api.metrics import register_cache
+from marketing_api.settings import settings
+
+PRINCIPAL_CACHE_SIZE = 10_000
+
+
+@dataclass(frozen=True)
+class Principal:
+    """The authenticated caller: a user id plus role names, detached from any session."""
+
+    id: uuid.UUID
+    email: str
+    full_name: str | None
+    is_active: bool
+    roles: frozenset[str]
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(
+            id=user.id,
+            email=user.email,
+            full_name=user.full_name,
+            is_active=user.is_active,
+            roles=frozenset(role.name for role in user.roles),
+        )
+
+    def has_any_role(self, roles: set[str]) -> bool:
+        return bool(self.roles.intersection(roles))
+
+
+class PrincipalCache:
+    """Short-lived, per-process cache of user id -> Principal."""
+
+    def __init__(self, ttl_seconds: float, maxsize: int = PRINCIPAL_CACHE_SIZE) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.maxsize = maxsize
+        self._entries: OrderedDict[uuid.UUID, tuple[float, Principal]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id: uuid.UUID) -> Principal | None:
+        entry = self._entries.get(user_id)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, principal = entry
+        if expires_at <= time.monotonic():
+            self._entries.pop(user_id, None)
+            self.misses += 1
+            return None
+        self.hits += 1
+        return principal
+
+    def put(self, principal: Principal) -> None:
+        if self.ttl_seconds <= 0:
+            return
+        self._entries[principal.id] = (time.monotonic() + self.ttl_seconds, principal)
+        self._entries.move_to_end(principal.id)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: uuid.UUID) -> None:
+        self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+principal_cache = PrincipalCache(settings.auth_principal_cache_ttl_seconds)
+register_cache("principal", lambda: (principal_cache.hits, principal_cache.misses))
+
+_ALL_USERS = "all"
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_principal_changes(session: Session, flush_context) -> None:
+    changed = session.info.setdefault("principal_changes", set())
+    for instance in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(instance, User):
+            changed.add(instance.id)
+        elif isinstance(instance, UserRole):
+            changed.add(instance.user_id)
+        elif isinstance(instance, Role):
+            changed.add(_ALL_USERS)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_principals(session: Session) -> None:
+    changed = session.info.pop("principal_changes", None)
+    if not changed:
+        return
+    if _ALL_USERS in changed:
+        principal_cache.clear()
+        return
+    for user_id in changed:
+        principal_cache.invalidate(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_principal_changes(session: Session) -> None:
+    session.info.pop("principal_changes", None)
@@ -1,6 +1,23 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
 from passlib.context import CryptContext
 
-pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+from marketing_api.settings import settings
+
+pwd_context = CryptContext(
+    schemes=["argon2"],
+    deprecated="auto",
+    argon2__rounds=settings.argon2_time_cost,
+    argon2__memory_cost=settings.argon2_memory_cost,
+    argon2__parallelism=settings.argon2_parallelism,
+)
+
+# argon2-cffi releases the GIL, so hashing runs in parallel with the event loop;
+# the pool size caps how many hashes (and how much argon2 memory) run at once.
+hash_executor = ThreadPoolExecutor(
+    max_workers=settings.password_hash_workers, thread_name_prefix="password-hash"
+)
 
 
 def hash_password(password: str) -> str:
@@ -9,3 +26,25 @@ def hash_password(password: str) -> str:
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
+
+
+async def hash_password_async(password: str) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(hash_executor, pwd_context.hash, password)
+
+
+async def verify_and_update_password(
+    plain_password: str, hashed_password: str | None
+) -> tuple[bool, str | None]:
+    """Verify off the event loop; returns (valid, new hash if the parameters changed).
+
+    Pass ``hashed_password=None`` for unknown users so the response takes as
+    long as a real check.
+    """
+    loop = asyncio.get_running_loop()
+    if hashed_password is None:
+        await loop.run_in_executor(hash_executor, pwd_context.dummy_verify)
+        return False, None
+    return await loop.run_in_executor(
+        hash_executor, pwd_context.verify_and_update, plain_password, hashed_password
+    )
@@ -3,17 +3,31 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from marketing_api.auth.repository import get_user_by_email
 from marketing_api.auth.schemas import LoginRequest, TokenResponse
-from marketing_api.auth.security import verify_password
+from marketing_api.auth.security import verify_and_update_password
 from marketing_api.auth.tokens import create_access_token
+from marketing_api.settings import settings
 
 
 async def login(payload: LoginRequest, session: AsyncSession) -> TokenResponse:
     user = await get_user_by_email(session, payload.email)
-    if not user or not verify_password(payload.password, user.hashed_password):
+    verified, new_hash = await verify_and_update_password(
+        payload.password, user.hashed_password if user else None
+    )
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid credentials.",
         )
 
-    token = create_access_token(str(user.id))
+    if new_hash:
+        # Argon2 parameters changed since this hash was created; upgrade it in place.
+        user.hashed_password = new_hash
+        await session.commit()
+
+    if settings.jwt_embed_roles:
+        token = create_access_token(
+            str(user.id), roles=[role.name for role in user.roles], email=user.email
+        )
+    else:
+        token = create_access_token(str(user.id))
     return TokenResponse(access_token=token)
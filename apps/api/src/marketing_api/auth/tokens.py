@@ -1,3 +1,5 @@
+import uuid
+from collections.abc import Iterable
 from datetime import datetime, timedelta, timezone
 
 from jose import jwt
@@ -5,9 +7,20 @@ from jose import jwt
 from marketing_api.settings import settings
 
 
-def create_access_token(subject: str, expires_minutes: int | None = None) -> str:
+def create_access_token(
+    subject: str,
+    expires_minutes: int | None = None,
+    *,
+    roles: Iterable[str] | None = None,
+    email: str | None = None,
+) -> str:
+    """Sign an access token; ``roles``/``email`` are embedded as stateless claims when given."""
     expire = datetime.now(timezone.utc) + timedelta(
         minutes=expires_minutes or settings.access_token_expire_minutes
     )
-    payload = {"sub": subject, "exp": expire}
+    payload = {"sub": subject, "exp": expire, "jti": uuid.uuid4().hex}
+    if roles is not None:
+        payload["roles"] = sorted(roles)
+    if email is not None:
+        payload["email"] = email
     return jwt.encode(payload, settings.jwt_secret, algorithm=settings.jwt_algorithm)
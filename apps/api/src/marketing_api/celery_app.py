@@ -5,6 +5,7 @@ celery_app = Celery(
     "marketing_api",
     broker=settings.celery_broker_url,
     backend=settings.celery_result_backend,
+    include=["marketing_api.tasks.email", "marketing_api.tasks.experiments"],
 )
 
 celery_app.conf.update(
@@ -18,5 +19,17 @@ celery_app.conf.update(
             "task": "marketing_api.tasks.email.process_email_queue_task",
             "schedule": 300.0,  # 5 minutes
         },
+        "rollup-email-stats-every-15-minutes": {
+            "task": "marketing_api.tasks.email.rollup_email_stats_task",
+            "schedule": 900.0,  # 15 minutes
+        },
+        "reconcile-test-stats-every-hour": {
+            "task": "marketing_api.tasks.experiments.reconcile_test_stats_task",
+            "schedule": 3600.0,  # 1 hour
+        },
+        "update-bandit-weights-every-5-minutes": {
+            "task": "marketing_api.tasks.experiments.update_bandit_weights_task",
+            "schedule": 300.0,  # 5 minutes
+        },
     },
 )
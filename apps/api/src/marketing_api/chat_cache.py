@@ -0,0 +1,220 @@
+"""Cache of AI chatbot answers to opening questions.
+
+Only first turns are cached: with no history the answer depends on nothing
+but the question and the fixed system prompt. Questions match exactly after
+normalization (case, punctuation, whitespace). With semantic matching on,
+a miss also embeds the question and takes the closest cached one whose
+cosine similarity clears the threshold, from a small in-memory NumPy index
+rebuilt only when entries change. Entries expire after the TTL and can be
+cleared from the admin dashboard.
+
+Every API process keeps its own entries, so invalidation goes through the
+database: clearing the cache, or one question, bumps a ``CacheGeneration``
+counter, and each lookup reads the counters for the question (one primary
+key query) and drops an entry stamped with older ones. Every worker stops
+serving an invalidated answer on its next lookup.
+"""
+
+import hashlib
+import logging
+import os
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from marketing_api.db.models import CacheGeneration
+from marketing_api.db.upsert import dialect_insert
+from marketing_api.llm import llm_gateway
+from marketing_api.metrics import register_cache
+from marketing_api.settings import settings
+
+logger = logging.getLogger(__name__)
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+
+
+_ALL = "chat_responses"
+
+
+def normalize_question(message: str) -> str:
+    return _WHITESPACE.sub(" ", _PUNCTUATION.sub(" ", message.lower())).strip()
+
+
+def _generation_name(key: str) -> str:
+    return f"{_ALL}:{hashlib.sha256(key.encode()).hexdigest()}"
+
+
+# (whole cache, one question) generations an answer was computed under.
+Stamp = tuple[int, int]
+
+
+@dataclass
+class CachedAnswer:
+    answer: str
+    expires_at: float
+    stamp: Stamp
+    vector: np.ndarray | None = None
+
+
+@dataclass
+class CacheLookup:
+    """Result of ``lookup``; pass it back to ``store`` on a miss."""
+
+    key: str
+    stamp: Stamp
+    answer: str | None = None
+    vector: np.ndarray | None = None
+
+
+class ChatResponseCache:
+    def __init__(
+        self,
+        *,
+        ttl_seconds: float,
+        maxsize: int,
+        semantic: bool = False,
+        similarity_threshold: float = 0.92,
+        embedding_model: str = "text-embedding-3-small",
+    ) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.maxsize = maxsize
+        self.semantic = semantic
+        self.similarity_threshold = similarity_threshold
+        self.embedding_model = embedding_model
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, CachedAnswer] = OrderedDict()
+        self._index: tuple[list[str], np.ndarray] | None = None
+
+    async def lookup(self, session: AsyncSession, message: str) -> CacheLookup:
+        key = normalize_question(message)
+        stamp = await self._stamp(session, key)
+        entry = self._entries.get(key)
+        now = time.monotonic()
+        if entry is not None and entry.expires_at > now and entry.stamp == stamp:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return CacheLookup(key, stamp, entry.answer)
+        if entry is not None:
+            self._remove(key)
+
+        vector = await self._embed(key) if self.semantic and llm_gateway.configured else None
+        if vector is not None:
+            match = self._nearest(vector, now)
+            if match is not None and self._entries[match].stamp == await self._stamp(session, match):
+                self.hits += 1
+                self.semantic_hits += 1
+                return CacheLookup(key, stamp, self._entries[match].answer, vector)
+            if match is not None:
+                self._remove(match)
+        self.misses += 1
+        return CacheLookup(key, stamp, vector=vector)
+
+    def store(self, lookup: CacheLookup, answer: str) -> None:
+        # Stamped with the generations read before the answer was generated,
+        # so an invalidation made meanwhile still drops it.
+        self._remove(lookup.key)
+        self._entries[lookup.key] = CachedAnswer(
+            answer, time.monotonic() + self.ttl_seconds, lookup.stamp, lookup.vector
+        )
+        if lookup.vector is not None:
+            self._index = None
+        while len(self._entries) > self.maxsize:
+            self._remove(next(iter(self._entries)))
+
+    async def invalidate(self, session: AsyncSession, message: str) -> int:
+        """Drop one question's answer in every process; returns its new generation."""
+        key = normalize_question(message)
+        self._remove(key)
+        return await self._bump(session, _generation_name(key))
+
+    async def invalidate_all(self, session: AsyncSession) -> int:
+        """Drop every answer in every process; returns the cache's new generation."""
+        self.clear()
+        return await self._bump(session, _ALL)
+
+    def clear(self) -> None:
+        """Empty this process's entries only."""
+        self._entries.clear()
+        self._index = None
+
+    async def _stamp(self, session: AsyncSession, key: str) -> Stamp:
+        name = _generation_name(key)
+        result = await session.execute(
+            select(CacheGeneration.name, CacheGeneration.generation).where(CacheGeneration.name.in_((_ALL, name)))
+        )
+        generations = dict(result.all())
+        return generations.get(_ALL, 0), generations.get(name, 0)
+
+    async def _bump(self, session: AsyncSession, name: str) -> int:
+        statement = dialect_insert(session, CacheGeneration).values(name=name, generation=1)
+        statement = statement.on_conflict_do_update(
+            index_elements=["name"],
+            set_={"generation": CacheGeneration.generation + 1, "updated_at": func.now()},
+        ).returning(CacheGeneration.generation)
+        generation = await session.scalar(statement)
+        await session.commit()
+        return generation
+
+    def snapshot(self) -> dict[str, int | float]:
+        """This process's entries and counters; other workers keep their own."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "process_id": os.getpid(),
+        }
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None and entry.vector is not None:
+            self._index = None
+
+    async def _embed(self, text: str) -> np.ndarray | None:
+        try:
+            (embedding,) = await llm_gateway.embed([text], feature="ai_chatbot_cache", model=self.embedding_model)
+        except Exception:
+            logger.warning("Chat cache embedding failed; using exact matches only", exc_info=True)
+            return None
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+    def _nearest(self, vector: np.ndarray, now: float) -> str | None:
+        if self._index is None:
+            keys = [key for key, entry in self._entries.items() if entry.vector is not None]
+            if not keys:
+                return None
+            self._index = (keys, np.stack([self._entries[key].vector for key in keys]))
+        keys, matrix = self._index
+        if matrix.shape[1] != vector.shape[0]:
+            return None  # embedding model changed
+        # Rows are unit vectors, so the dot product is the cosine similarity.
+        similarities = matrix @ vector
+        for position in np.argsort(similarities)[::-1]:
+            if similarities[position] < self.similarity_threshold:
+                return None
+            entry = self._entries.get(keys[position])
+            if entry is not None and entry.expires_at > now:
+                return keys[position]
+        return None
+
+
+chat_cache = ChatResponseCache(
+    ttl_seconds=settings.chat_cache_ttl_seconds,
+    maxsize=settings.chat_cache_size,
+    semantic=settings.chat_cache_semantic,
+    similarity_threshold=settings.chat_cache_similarity_threshold,
+    embedding_model=settings.openai_embedding_model,
+)
+register_cache("ai_chat_responses", lambda: (chat_cache.hits, chat_cache.misses))
@@ -0,0 +1,264 @@
+"""AI chat transcripts: one row per turn, recent turns cached per session.
+
+Each turn is a single ``ChatMessage`` holding the visitor's message and the
+answer. The last ``window`` turns of every active session are kept in a
+rolling cache, so a turn costs one cache read and one INSERT; the database
+is only read when a session is not cached (a new process, or evicted).
+
+The Redis cache is shared by every API process, so every process sees every
+turn. The in-memory cache is per process: another worker may have recorded
+turns it never saw, so it also keeps each session's turn count and a cached
+window is only served while a COUNT of the session's rows still matches.
+
+A cache only ever holds a session's complete recent window: turns are
+appended to sessions already cached and never start a partial one.
+"""
+
+import json
+import logging
+from collections import OrderedDict, deque
+from dataclasses import asdict, dataclass
+from typing import Any, Protocol
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from marketing_api.db.models import ChatMessage
+from marketing_api.metrics import register_cache
+from marketing_api.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Turn:
+    user: str
+    assistant: str
+
+
+def estimate_tokens(text: str) -> int:
+    # About four characters per token for English; close enough for a budget.
+    return len(text) // 4 + 1
+
+
+def trim_history(turns: list[Turn], token_budget: int) -> list[Turn]:
+    """The most recent turns whose combined size fits ``token_budget``."""
+    kept: list[Turn] = []
+    used = 0
+    for turn in reversed(turns):
+        used += estimate_tokens(turn.user) + estimate_tokens(turn.assistant)
+        if used > token_budget:
+            break
+        kept.append(turn)
+    return kept[::-1]
+
+
+def history_messages(turns: list[Turn]) -> list[dict[str, str]]:
+    messages = []
+    for turn in turns:
+        messages.append({"role": "user", "content": turn.user})
+        messages.append({"role": "assistant", "content": turn.assistant})
+    return messages
+
+
+class TranscriptCache(Protocol):
+    # True when every API process reads and writes the same entries.
+    shared: bool
+
+    async def get(self, session_id: str, *, total: int | None = None) -> list[Turn] | None: ...
+
+    async def set(self, session_id: str, turns: list[Turn], *, total: int | None = None) -> None: ...
+
+    async def append(self, session_id: str, turn: Turn) -> None: ...
+
+    async def clear(self) -> None: ...
+
+    async def aclose(self) -> None: ...
+
+
+@dataclass
+class _Window:
+    turns: deque[Turn]
+    # Turns the session had in total when this window was current.
+    total: int | None
+
+
+class MemoryTranscriptCache:
+    """Per-process LRU of session windows.
+
+    ``get`` with a ``total`` misses unless the window was built from exactly
+    that many turns, so a window another process has moved past is reloaded.
+    """
+
+    shared = False
+
+    def __init__(self, *, window: int, max_sessions: int = 10_000) -> None:
+        self.window = window
+        self.max_sessions = max_sessions
+        self._sessions: OrderedDict[str, _Window] = OrderedDict()
+
+    async def get(self, session_id: str, *, total: int | None = None) -> list[Turn] | None:
+        entry = self._sessions.get(session_id)
+        if entry is None:
+            return None
+        if total is not None and entry.total != total:
+            del self._sessions[session_id]
+            return None
+        self._sessions.move_to_end(session_id)
+        return list(entry.turns)
+
+    async def set(self, session_id: str, turns: list[Turn], *, total: int | None = None) -> None:
+        self._sessions[session_id] = _Window(deque(turns, maxlen=self.window), total)
+        self._sessions.move_to_end(session_id)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+
+    async def append(self, session_id: str, turn: Turn) -> None:
+        entry = self._sessions.get(session_id)
+        if entry is not None:
+            entry.turns.append(turn)
+            if entry.total is not None:
+                entry.total += 1
+
+    async def clear(self) -> None:
+        self._sessions.clear()
+
+    async def aclose(self) -> None:
+        return None
+
+
+class RedisTranscriptCache:
+    """Session windows as capped Redis lists, shared by every API process."""
+
+    shared = True
+
+    def __init__(self, url: str, *, window: int, ttl_seconds: int) -> None:
+        from redis.asyncio import Redis
+
+        self.window = window
+        self.ttl_seconds = ttl_seconds
+        self._redis = Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+
+    def _key(self, session_id: str) -> str:
+        return f"chat:transcript:{session_id}"
+
+    async def get(self, session_id: str, *, total: int | None = None) -> list[Turn] | None:
+        key = self._key(session_id)
+        async with self._redis.pipeline(transaction=False) as pipe:
+            exists, items = await pipe.exists(key).lrange(key, 0, -1).execute()
+        if not exists:
+            return None
+        return [Turn(**json.loads(item)) for item in items if item != b"{}"]
+
+    async def set(self, session_id: str, turns: list[Turn], *, total: int | None = None) -> None:
+        key = self._key(session_id)
+        # A placeholder keeps the list (and so the session) present with no turns.
+        items = [json.dumps(asdict(turn)) for turn in turns[-self.window :]] or ["{}"]
+        async with self._redis.pipeline(transaction=True) as pipe:
+            await pipe.delete(key).rpush(key, *items).expire(key, self.ttl_seconds).execute()
+
+    async def append(self, session_id: str, turn: Turn) -> None:
+        key = self._key(session_id)
+        async with self._redis.pipeline(transaction=True) as pipe:
+            # RPUSHX leaves sessions that are not cached alone.
+            pipe.rpushx(key, json.dumps(asdict(turn)))
+            pipe.lrem(key, 1, "{}")
+            pipe.ltrim(key, -self.window, -1)
+            pipe.expire(key, self.ttl_seconds)
+            await pipe.execute()
+
+    async def clear(self) -> None:
+        async for key in self._redis.scan_iter(match="chat:transcript:*"):
+            await self._redis.delete(key)
+
+    async def aclose(self) -> None:
+        await self._redis.aclose()
+
+
+class TranscriptStore:
+    def __init__(self, cache: TranscriptCache, *, window: int) -> None:
+        self.cache = cache
+        self.window = window
+        self.hits = 0
+        self.misses = 0
+
+    async def recent_turns(self, session: AsyncSession, session_id: str) -> list[Turn]:
+        """The session's last ``window`` turns, oldest first."""
+        # A per-process cache is checked against the table before it is trusted.
+        total = None if self.cache.shared else await self._count_turns(session, session_id)
+        try:
+            cached = await self.cache.get(session_id, total=total)
+        except Exception:
+            logger.warning("Chat transcript cache read failed", exc_info=True)
+            cached = None
+        if cached is not None:
+            self.hits += 1
+            return cached
+
+        self.misses += 1
+        result = await session.execute(
+            select(ChatMessage.message, ChatMessage.ai_response_text)
+            .where(ChatMessage.chat_session_id == session_id, ChatMessage.is_ai_response)
+            .order_by(ChatMessage.created_at.desc())
+            .limit(self.window)
+        )
+        turns = [Turn(user, assistant or "") for user, assistant in result.all()][::-1]
+        await self._cache_call("set", session_id, turns, total=total)
+        return turns
+
+    async def _count_turns(self, session: AsyncSession, session_id: str) -> int:
+        return await session.scalar(
+            select(func.count())
+            .select_from(ChatMessage)
+            .where(ChatMessage.chat_session_id == session_id, ChatMessage.is_ai_response)
+        )
+
+    async def record_turn(
+        self,
+        session: AsyncSession,
+        session_id: str,
+        turn: Turn,
+        *,
+        name: str | None,
+        email: str | None,
+        new_session: bool,
+    ) -> None:
+        """Store a turn in one row and add it to the session's cached window."""
+        session.add(
+            ChatMessage(
+                name=name or "Anonymous",
+                email=email,
+                message=turn.user,
+                ai_response_text=turn.assistant,
+                chat_session_id=session_id,
+                is_ai_response=True,
+            )
+        )
+        await session.commit()
+        if new_session:
+            await self._cache_call("set", session_id, [turn], total=1)
+        else:
+            await self._cache_call("append", session_id, turn)
+
+    async def _cache_call(self, method: str, *args: Any, **kwargs: Any) -> None:
+        try:
+            await getattr(self.cache, method)(*args, **kwargs)
+        except Exception:
+            logger.warning("Chat transcript cache %s failed", method, exc_info=True)
+
+    async def aclose(self) -> None:
+        await self.cache.aclose()
+
+
+def _build_cache() -> TranscriptCache:
+    if settings.chat_transcript_redis_url:
+        return RedisTranscriptCache(
+            settings.chat_transcript_redis_url,
+            window=settings.chat_history_turns,
+            ttl_seconds=settings.chat_transcript_ttl_seconds,
+        )
+    return MemoryTranscriptCache(window=settings.chat_history_turns)
+
+
+transcript_store = TranscriptStore(_build_cache(), window=settings.chat_history_turns)
+register_cache("chat_transcripts", lambda: (transcript_store.hits, transcript_store.misses))
@@ -0,0 +1,76 @@
+import uuid
+from collections.abc import Mapping, Sequence
+
+from sqlalchemy import ColumnElement, Date, cast, func, literal_column, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute
+
+
+def utc_day_column(session: AsyncSession, column) -> ColumnElement:
+    """The UTC calendar day of a timestamp column, for grouping by day.
+
+    SQLite (the test database) returns the day as ISO text.
+    """
+    if session.get_bind().dialect.name == "sqlite":
+        return func.date(column)
+    return cast(func.timezone(literal_column("'UTC'"), column), Date)
+
+
+async def count_by_parent(
+    session: AsyncSession,
+    parent_column: InstrumentedAttribute,
+    parent_ids: Sequence[uuid.UUID],
+    metrics: Mapping[str, ColumnElement[bool] | None],
+    *where: ColumnElement[bool],
+) -> dict[uuid.UUID, dict[str, int]]:
+    """Count child rows for many parents in a single grouped query.
+
+    Each metric maps a result key to a FILTER condition (``None`` counts every
+    row), e.g. ``{"sends": None, "opens": EmailSend.opened_at.isnot(None)}``.
+    Every requested parent id is present in the result, zero-filled.
+    """
+    empty = dict.fromkeys(metrics, 0)
+    counts = {parent_id: dict(empty) for parent_id in parent_ids}
+    if not counts:
+        return counts
+
+    columns = [
+        (func.count().filter(condition) if condition is not None else func.count()).label(name)
+        for name, condition in metrics.items()
+    ]
+    result = await session.execute(
+        select(parent_column, *columns)
+        .where(parent_column.in_(list(counts)), *where)
+        .group_by(parent_column)
+    )
+    for row in result.all():
+        counts[row[0]] = {name: row._mapping[name] or 0 for name in metrics}
+    return counts
+
+
+async def sum_by_parent(
+    session: AsyncSession,
+    parent_column: InstrumentedAttribute,
+    parent_ids: Sequence[uuid.UUID],
+    metrics: Mapping[str, InstrumentedAttribute],
+    *where: ColumnElement[bool],
+) -> dict[uuid.UUID, dict[str, int]]:
+    """Sum counter columns for many parents in a single grouped query.
+
+    The rollup counterpart of ``count_by_parent``, e.g.
+    ``{"visitors": TestDailyStat.visitors}``; missing parents are zero-filled.
+    """
+    empty = dict.fromkeys(metrics, 0)
+    sums = {parent_id: dict(empty) for parent_id in parent_ids}
+    if not sums:
+        return sums
+
+    columns = [func.sum(column).label(name) for name, column in metrics.items()]
+    result = await session.execute(
+        select(parent_column, *columns)
+        .where(parent_column.in_(list(sums)), *where)
+        .group_by(parent_column)
+    )
+    for row in result.all():
+        sums[row[0]] = {name: int(row._mapping[name] or 0) for name in metrics}
+    return sums
@@ -2,7 +2,7 @@ import enum
 import uuid
 from datetime import date, datetime
 
-from sqlalchemy import Boolean, Date, DateTime, Enum, ForeignKey, Integer, String, Text, UniqueConstraint, func
+from sqlalchemy import Boolean, Date, DateTime, Enum, ForeignKey, Index, Integer, String, Text, UniqueConstraint, func
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -103,8 +103,8 @@ class Customer(Base, UUIDPrimaryKeyMixin, TimestampMixin):
         UUID(as_uuid=True), ForeignKey("users.id", ondelete="SET NULL")
     )
 
-    contacts = relationship("Contact", back_populates="customer", lazy="selectin")
-    deals = relationship("Deal", back_populates="customer", lazy="selectin")
+    contacts = relationship("Contact", back_populates="customer", lazy="raise")
+    deals = relationship("Deal", back_populates="customer", lazy="raise")
 
 
 class Contact(Base, UUIDPrimaryKeyMixin, TimestampMixin):
@@ -118,7 +118,7 @@ class Contact(Base, UUIDPrimaryKeyMixin, TimestampMixin):
     phone: Mapped[str | None] = mapped_column(String(80))
     title: Mapped[str | None] = mapped_column(String(120))
 
-    customer = relationship("Customer", back_populates="contacts", lazy="selectin")
+    customer = relationship("Customer", back_populates="contacts", lazy="raise")
 
 
 class Lead(Base, UUIDPrimaryKeyMixin, TimestampMixin):
@@ -150,7 +150,7 @@ class PipelineStage(Base, UUIDPrimaryKeyMixin, TimestampMixin):
     order: Mapped[int] = mapped_column(nullable=False)
     probability: Mapped[int] = mapped_column(default=0, nullable=False)
 
-    deals = relationship("Deal", back_populates="stage", lazy="selectin")
+    deals = relationship("Deal", back_populates="stage", lazy="raise")
 
 
 class Deal(Base, UUIDPrimaryKeyMixin, TimestampMixin):
@@ -169,8 +169,8 @@ class Deal(Base, UUIDPrimaryKeyMixin, TimestampMixin):
         Enum(DealStatus), default=DealStatus.open, nullable=False
     )
 
-    customer = relationship("Customer", back_populates="deals", lazy="selectin")
-    stage = relationship("PipelineStage", back_populates="deals", lazy="selectin")
+    customer = relationship("Customer", back_populates="deals", lazy="raise")
+    stage = relationship("PipelineStage", back_populates="deals", lazy="raise")
 
 
 class Activity(Base, UUIDPrimaryKeyMixin, TimestampMixin):
@@ -273,6 +273,9 @@ class StripeTransaction(StripeBase, UUIDPrimaryKeyMixin, TimestampMixin):
 
 class ChatMessage(Base, UUIDPrimaryKeyMixin, TimestampMixin):
     __tablename__ = "chat_messages"
+    __table_args__ = (
+        Index("ix_chat_messages_session_created", "chat_session_id", "created_at"),
+    )
 
     name: Mapped[str] = mapped_column(String(255), nullable=False)
     email: Mapped[str | None] = mapped_column(String(255))
@@ -280,11 +283,21 @@ class ChatMessage(Base, UUIDPrimaryKeyMixin, TimestampMixin):
     page_url: Mapped[str | None] = mapped_column(String(500))
     user_agent: Mapped[str | None] = mapped_column(String(255))
     referrer: Mapped[str | None] = mapped_column(String(500))
+    # AI chat turns are one row each: the visitor's ``message`` and the ``ai_response_text``
     is_ai_response: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
-    chat_session_id: Mapped[str | None] = mapped_column(String(255), index=True)
+    chat_session_id: Mapped[str | None] = mapped_column(String(255))
     ai_response_text: Mapped[str | None] = mapped_column(Text)
 
 
+class CacheGeneration(Base, TimestampMixin):
+    """Counter bumped to invalidate entries of per-process caches in every worker."""
+
+    __tablename__ = "cache_generations"
+
+    name: Mapped[str] = mapped_column(String(100), primary_key=True)
+    generation: Mapped[int] = mapped_column(Integer, server_default="0", nullable=False)
+
+
 class SeoAudit(Base, UUIDPrimaryKeyMixin, TimestampMixin):
     __tablename__ = "seo_audits"
 
@@ -308,6 +321,18 @@ class GeneratedContent(Base, UUIDPrimaryKeyMixin, TimestampMixin):
     content_type: Mapped[str] = mapped_column(String(50), nullable=False)
     prompt: Mapped[str] = mapped_column(Text, nullable=False)
     generated_text: Mapped[str] = mapped_column(Text, nullable=False)
+    cache_key: Mapped[str | None] = mapped_column(String(64), index=True)  # hash of the normalized request
+
+
+class ContentQuota(Base, UUIDPrimaryKeyMixin, TimestampMixin):
+    __tablename__ = "content_quotas"
+    __table_args__ = (
+        UniqueConstraint("email", "month", name="uq_content_quotas_email_month"),
+    )
+
+    email: Mapped[str] = mapped_column(String(255), nullable=False)
+    month: Mapped[date] = mapped_column(Date, nullable=False)  # first day of the month
+    used: Mapped[int] = mapped_column(Integer, server_default="0", nullable=False)
 
 
 class EmailCampaign(Base, UUIDPrimaryKeyMixin, TimestampMixin):
@@ -334,7 +359,7 @@ class EmailSubscriber(Base, UUIDPrimaryKeyMixin, TimestampMixin):
     email: Mapped[str] = mapped_column(String(255), nullable=False, unique=True, index=True)
     status: Mapped[str] = mapped_column(String(50), server_default="active", nullable=False)
     tags: Mapped[str | None] = mapped_column(String(500))
-    subscribed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    subscribed_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
 
 class EmailSend(Base, UUIDPrimaryKeyMixin, TimestampMixin):
@@ -342,11 +367,29 @@ class EmailSend(Base, UUIDPrimaryKeyMixin, TimestampMixin):
 
     subscriber_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("email_subscribers.id", ondelete="CASCADE"), nullable=False, index=True)
     sequence_id: Mapped[uuid.UUID] = mapped_column(ForeignKey("email_sequences.id", ondelete="CASCADE"), nullable=False, index=True)
-    sent_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
+    sent_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), index=True)
     opened_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
     clicked_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
 
 
+class EmailDailyStat(Base, UUIDPrimaryKeyMixin, TimestampMixin):
+    __tablename__ = "email_daily_stats"
+    __table_args__ = (
+        UniqueConstraint("day", "sequence_id", name="uq_email_daily_stats_day_sequence"),
+    )
+
+    day: Mapped[date] = mapped_column(Date, nullable=False, index=True)
+    campaign_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("email_campaigns.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    sequence_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("email_sequences.id", ondelete="CASCADE"), nullable=False
+    )
+    sends: Mapped[int] = mapped_column(Integer, server_default="0", nullable=False)
+    opens: Mapped[int] = mapped_column(Integer, server_default="0", nullable=False)
+    clicks: Mapped[int] = mapped_column(Integer, server_default="0", nullable=False)
+
+
 class ConsultationBooking(Base, UUIDPrimaryKeyMixin, TimestampMixin):
     __tablename__ = "consultation_bookings"
 
@@ -396,6 +439,9 @@ class ABTest(Base, UUIDPrimaryKeyMixin, TimestampMixin):
     target_url: Mapped[str | None] = mapped_column(String(500))
     conversion_event: Mapped[str | None] = mapped_column(String(255))
     traffic_split: Mapped[str | None] = mapped_column(String(50))  # JSON: {"control": 50, "variant": 50}
+    # deterministic: hash of (test, visitor) picks the variant; random: legacy stored assignment;
+    # bandit: stored assignment, weighted by the Thompson sampling allocation
+    assignment_mode: Mapped[str] = mapped_column(String(20), server_default="deterministic", nullable=False)
 
 
 class TestVariant(Base, UUIDPrimaryKeyMixin, TimestampMixin):
@@ -408,10 +454,14 @@ class TestVariant(Base, UUIDPrimaryKeyMixin, TimestampMixin):
     variant_key: Mapped[str] = mapped_column(String(50), nullable=False)  # control, variant_a, etc.
     content_json: Mapped[str] = mapped_column(Text, nullable=False)  # JSON with variant content
     weight: Mapped[int] = mapped_column(Integer, server_default="50", nullable=False)  # Traffic percentage
+    bandit_weight: Mapped[int | None] = mapped_column(Integer)  # Published allocation for bandit tests
 
 
 class TestAssignment(Base, UUIDPrimaryKeyMixin, TimestampMixin):
     __tablename__ = "test_assignments"
+    __table_args__ = (
+        UniqueConstraint("test_id", "unit_id", name="uq_test_assignments_test_unit"),
+    )
 
     test_id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), ForeignKey("ab_tests.id", ondelete="CASCADE"), nullable=False, index=True
@@ -421,11 +471,15 @@ class TestAssignment(Base, UUIDPrimaryKeyMixin, TimestampMixin):
     )
     user_id: Mapped[str | None] = mapped_column(String(255), index=True)  # Can be user ID or session ID
     session_id: Mapped[str | None] = mapped_column(String(255), index=True)
+    unit_id: Mapped[str | None] = mapped_column(String(255))  # user_id or session_id; one row per visitor
     assigned_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
 
 class TestConversion(Base, UUIDPrimaryKeyMixin, TimestampMixin):
     __tablename__ = "test_conversions"
+    __table_args__ = (
+        UniqueConstraint("assignment_id", "event_name", name="uq_test_conversions_assignment_event"),
+    )
 
     test_id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), ForeignKey("ab_tests.id", ondelete="CASCADE"), nullable=False, index=True
@@ -441,6 +495,23 @@ class TestConversion(Base, UUIDPrimaryKeyMixin, TimestampMixin):
     converted_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
 
+class TestDailyStat(Base, UUIDPrimaryKeyMixin, TimestampMixin):
+    __tablename__ = "test_daily_stats"
+    __table_args__ = (
+        UniqueConstraint("day", "variant_id", name="uq_test_daily_stats_day_variant"),
+    )
+
+    day: Mapped[date] = mapped_column(Date, nullable=False, index=True)
+    test_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("ab_tests.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    variant_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("test_variants.id", ondelete="CASCADE"), nullable=False
+    )
+    visitors: Mapped[int] = mapped_column(Integer, server_default="0", nullable=False)
+    conversions: Mapped[int] = mapped_column(Integer, server_default="0", nullable=False)  # of conversion_event
+
+
 class KeywordResearch(Base, UUIDPrimaryKeyMixin, TimestampMixin):
     __tablename__ = "keyword_researches"
 
@@ -0,0 +1,119 @@
+import base64
+import json
+import uuid
+from collections.abc import Sequence
+from datetime import datetime
+from typing import Any, Literal
+
+from sqlalchemy import ColumnElement, Select, text, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute
+
+CountMode = Literal["exact", "approximate", "none"]
+
+
+SortValue = datetime | str | int
+
+
+def encode_cursor(sort_value: SortValue, row_id: uuid.UUID) -> str:
+    """Encode a (sort value, id) keyset position as an opaque cursor."""
+    if isinstance(sort_value, datetime):
+        raw = [sort_value.isoformat(), str(row_id)]
+    else:
+        raw = [sort_value, str(row_id), "raw"]
+    return base64.urlsafe_b64encode(json.dumps(raw).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> tuple[SortValue, uuid.UUID]:
+    """Decode a cursor produced by encode_cursor; raises ValueError if malformed."""
+    try:
+        raw = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        if len(raw) == 3:
+            sort_value, row_id, _ = raw
+            if not isinstance(sort_value, (str, int)):
+                raise ValueError
+            return sort_value, uuid.UUID(row_id)
+        sort_value, row_id = raw
+        return datetime.fromisoformat(sort_value), uuid.UUID(row_id)
+    except (TypeError, ValueError, UnicodeError) as exc:
+        raise ValueError("Invalid cursor.") from exc
+
+
+def keyset_page(
+    query: Select,
+    sort_column: InstrumentedAttribute | ColumnElement[Any],
+    id_column: InstrumentedAttribute,
+    *,
+    cursor: str | None,
+    limit: int,
+    descending: bool = True,
+) -> Select:
+    """Order a query by (sort_column, id) and seek past the cursor.
+
+    ``sort_column`` must never be NULL: a NULL position fails every seek
+    comparison. Coalesce nullable columns. Fetches one extra row so callers can tell whether another page exists.
+    """
+    if cursor:
+        sort_value, row_id = decode_cursor(cursor)
+        position = tuple_(sort_column, id_column)
+        boundary = tuple_(sort_value, row_id)
+        query = query.where(position < boundary if descending else position > boundary)
+
+    if descending:
+        query = query.order_by(sort_column.desc(), id_column.desc())
+    else:
+        query = query.order_by(sort_column.asc(), id_column.asc())
+    return query.limit(limit + 1)
+
+
+def split_page(
+    rows: Sequence[Any], limit: int, sort_attr: str, *, default: SortValue | None = None
+) -> tuple[list[Any], str | None]:
+    """Trim the look-ahead row and return (page rows, next cursor).
+
+    ``default`` stands in for a NULL ``sort_attr``, matching the coalesced
+    sort column passed to ``keyset_page``.
+    """
+    page = list(rows[:limit])
+    if len(rows) <= limit or not page:
+        return page, None
+    last = page[-1]
+    sort_value = getattr(last, sort_attr)
+    return page, encode_cursor(default if sort_value is None else sort_value, last.id)
+
+
+async def approximate_count(session: AsyncSession, table_name: str) -> int | None:
+    """Planner row estimate from pg_class; None when the table was never analyzed.
+
+    Also None off PostgreSQL (the SQLite test database), so callers count exactly.
+    """
+    if session.get_bind().dialect.name != "postgresql":
+        return None
+    result = await session.execute(
+        text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:table_name)"),
+        {"table_name": table_name},
+    )
+    estimate = result.scalar()
+    if estimate is None or estimate < 0:
+        return None
+    return int(estimate)
+
+
+async def count_rows(
+    session: AsyncSession,
+    count_query: Select,
+    *,
+    table_name: str,
+    approximate: bool = False,
+) -> int:
+    """Run an exact count query, or use the planner estimate when allowed.
+
+    Only pass approximate=True for unfiltered counts; the estimate covers the
+    whole table.
+    """
+    if approximate:
+        estimate = await approximate_count(session, table_name)
+        if estimate is not None:
+            return estimate
+    result = await session.execute(count_query)
+    return result.scalar() or 0
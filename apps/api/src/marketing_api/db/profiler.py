@@ -0,0 +1,95 @@
+"""Opt-in per-request SQL profiling: statement counts, DB time and N+1 shapes.
+
+``install_profiler`` adds cursor event listeners to an engine. They record
+into the ``QueryProfile`` active in the current context and do nothing when
+none is, so they can stay installed permanently.
+"""
+
+import re
+import time
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PARAMETER_LIST = re.compile(r"\((?:\s*(?:\?|%\(\w+\)s|\$\d+|:\w+|__\[POSTCOMPILE_\w+\])\s*,?)+\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """Normalise a statement so calls differing only in literals compare equal."""
+    shape = _STRING_LITERAL.sub("?", statement)
+    shape = _NUMBER_LITERAL.sub("?", shape)
+    shape = _PARAMETER_LIST.sub("(?)", shape)
+    return _WHITESPACE.sub(" ", shape).strip()
+
+
+@dataclass
+class QueryProfile:
+    statements: int = 0
+    duration: float = 0.0
+    shapes: Counter[str] = field(default_factory=Counter)
+    parent: "QueryProfile | None" = None
+
+    @property
+    def duration_ms(self) -> float:
+        return self.duration * 1000
+
+    def record(self, statement: str, duration: float) -> None:
+        shape = statement_shape(statement)
+        profile: QueryProfile | None = self
+        while profile is not None:
+            profile.statements += 1
+            profile.duration += duration
+            profile.shapes[shape] += 1
+            profile = profile.parent
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        """Statement shapes executed at least ``threshold`` times (likely N+1)."""
+        return [(shape, count) for shape, count in self.shapes.most_common() if count >= threshold]
+
+
+_current_profile: ContextVar[QueryProfile | None] = ContextVar("query_profile", default=None)
+
+
+def current_profile() -> QueryProfile | None:
+    return _current_profile.get()
+
+
+@contextmanager
+def profile_queries() -> Iterator[QueryProfile]:
+    """Collect statements executed in this context; nests inside outer profiles."""
+    profile = QueryProfile(parent=_current_profile.get())
+    token = _current_profile.set(profile)
+    try:
+        yield profile
+    finally:
+        _current_profile.reset(token)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    if _current_profile.get() is not None:
+        conn.info.setdefault("query_profile_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    profile = _current_profile.get()
+    started = conn.info.get("query_profile_started")
+    if profile is None or not started:
+        return
+    profile.record(statement, time.perf_counter() - started.pop())
+
+
+def install_profiler(engine: Engine | AsyncEngine) -> None:
+    sync_engine = engine.sync_engine if isinstance(engine, AsyncEngine) else engine
+    if event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
@@ -2,12 +2,19 @@ from collections.abc import AsyncGenerator
 
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
+from marketing_api.db.profiler import install_profiler
 from marketing_api.settings import settings
 
 engine = create_async_engine(settings.database_url, pool_pre_ping=True)
+install_profiler(engine)
 SessionLocal = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
 
 
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
     async with SessionLocal() as session:
         yield session
+
+
+def get_sessionmaker() -> async_sessionmaker[AsyncSession]:
+    """For responses that open their own session after the request's has closed."""
+    return SessionLocal
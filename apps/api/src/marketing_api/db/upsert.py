@@ -0,0 +1,13 @@
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def dialect_insert(session: AsyncSession, model):
+    """``INSERT`` supporting ``ON CONFLICT`` clauses for the session's database.
+
+    Production runs on PostgreSQL; the test suite runs on SQLite, which accepts
+    the same ``on_conflict_do_nothing``/``on_conflict_do_update`` calls.
+    """
+    if session.get_bind().dialect.name == "sqlite":
+        return sqlite.insert(model)
+    return postgresql.insert(model)
@@ -0,0 +1,133 @@
+"""Stateless variant assignment and batched recording of who saw what.
+
+A visitor's variant is a pure function of the test id and their user or
+session id, so it stays sticky without reading anything back. Assignments
+are still written to ``test_assignments`` for reporting and conversion
+tracking, but by a background flusher in multi-row inserts rather than one
+INSERT and commit per page view.
+"""
+
+import hashlib
+import random
+import uuid
+from bisect import bisect_right
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from marketing_api.db.models import TestAssignment
+from marketing_api.db.upsert import dialect_insert
+from marketing_api.experiments.buffer import BatchWriter, Row, WriterStats
+from marketing_api.experiments.config import ExperimentConfig, VariantConfig
+from marketing_api.experiments.counters import increment_daily_stats, utc_day
+from marketing_api.settings import settings
+
+SEEN_UNITS_SIZE = 100_000
+
+
+def bucket(test_id: uuid.UUID, unit_id: str, total: int) -> int:
+    """Map a (test, visitor) pair uniformly onto ``range(total)``."""
+    digest = hashlib.blake2b(f"{test_id}:{unit_id}".encode(), digest_size=8).digest()
+    return (int.from_bytes(digest, "big") * total) >> 64
+
+
+def choose_variant(test: ExperimentConfig, unit_id: str | None) -> VariantConfig | None:
+    """The variant ``unit_id`` sees; anonymous visitors get a random one."""
+    total = test.total_weight
+    if total <= 0:
+        return None
+    point = bucket(test.id, unit_id, total) if unit_id else random.randrange(total)
+    return test.variants[bisect_right(test.cumulative_weights, point)]
+
+
+@dataclass
+class RecorderStats(WriterStats):
+    skipped_seen: int = 0
+
+
+class AssignmentRecorder(BatchWriter):
+    """Buffer of assignments drained into ``test_assignments`` in batches.
+
+    Repeat visits are skipped using an LRU of recently recorded visitors, and
+    rows that still collide with an existing (test, visitor) row are ignored
+    by ``ON CONFLICT DO NOTHING``. Visitors in a failed batch are forgotten so
+    a later visit records them again.
+    """
+
+    task_name = "assignment-recorder"
+
+    def __init__(
+        self,
+        *,
+        capacity: int = 50_000,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        seen_size: int = SEEN_UNITS_SIZE,
+    ) -> None:
+        super().__init__(capacity=capacity, batch_size=batch_size, flush_interval=flush_interval)
+        self.seen_size = seen_size
+        self._seen: OrderedDict[tuple[uuid.UUID, str], None] = OrderedDict()
+
+    def _new_stats(self) -> RecorderStats:
+        return RecorderStats()
+
+    def record(
+        self,
+        test_id: uuid.UUID,
+        variant_id: uuid.UUID,
+        *,
+        user_id: str | None = None,
+        session_id: str | None = None,
+    ) -> None:
+        unit_id = user_id or session_id
+        if unit_id:
+            key = (test_id, unit_id)
+            if key in self._seen:
+                self._seen.move_to_end(key)
+                self.stats.skipped_seen += 1
+                return
+            self._seen[key] = None
+            if len(self._seen) > self.seen_size:
+                self._seen.popitem(last=False)
+        self._append(
+            {
+                "id": uuid.uuid4(),
+                "test_id": test_id,
+                "variant_id": variant_id,
+                "user_id": user_id,
+                "session_id": session_id,
+                "unit_id": unit_id,
+                "assigned_at": datetime.now(timezone.utc),
+            }
+        )
+
+    def reset(self) -> None:
+        super().reset()
+        self._seen.clear()
+
+    async def _insert(self, session: AsyncSession, batch: list[Row]) -> None:
+        stmt = (
+            dialect_insert(session, TestAssignment)
+            .on_conflict_do_nothing(index_elements=["test_id", "unit_id"])
+            .returning(TestAssignment.id)
+        )
+        inserted = set((await session.execute(stmt, batch)).scalars())
+        await increment_daily_stats(
+            session,
+            "visitors",
+            ((utc_day(row["assigned_at"]), row["test_id"], row["variant_id"]) for row in batch if row["id"] in inserted),
+        )
+
+    def _failed(self, batch: list[Row]) -> None:
+        for row in batch:
+            if row["unit_id"]:
+                self._seen.pop((row["test_id"], row["unit_id"]), None)
+
+
+assignment_recorder = AssignmentRecorder(
+    capacity=settings.assignment_buffer_size,
+    batch_size=settings.assignment_batch_size,
+    flush_interval=settings.assignment_flush_interval_seconds,
+)
@@ -0,0 +1,95 @@
+"""Thompson sampling traffic allocation for ``bandit`` tests.
+
+Each variant's share of new visitors is its posterior probability of having
+the best conversion rate, from the daily counters under Beta(1, 1) priors.
+A background task recomputes the shares and writes them to
+``TestVariant.bandit_weight``. It runs in the Celery worker, so API
+processes pick the new weights up when their experiment config snapshot
+expires, within ``experiment_config_ttl_seconds`` (far shorter than the
+task's five-minute schedule). Visitors keep the variant they were first
+given.
+"""
+
+import uuid
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from marketing_api.db.aggregates import sum_by_parent
+from marketing_api.db.models import ABTest, TestDailyStat, TestVariant
+from marketing_api.experiments import stats
+
+# Weights are published in basis points of traffic.
+WEIGHT_TOTAL = 10_000
+# Every variant keeps this share so a slow start can still recover.
+MIN_SHARE = 0.02
+POSTERIOR_DRAWS = 20_000
+
+
+def thompson_allocation(
+    conversions: list[int],
+    visitors: list[int],
+    *,
+    min_share: float = MIN_SHARE,
+    draws: int = POSTERIOR_DRAWS,
+    seed: int | None = None,
+) -> list[int]:
+    """Integer weights summing to ``WEIGHT_TOTAL``, proportional to P(best).
+
+    Sampling a variant with probability P(best) is Thompson sampling; doing
+    it through cached weights lets many requests share one posterior draw.
+    """
+    arms = len(visitors)
+    if arms == 0:
+        return []
+    _, best = stats.posterior_probabilities(conversions, visitors, draws=draws, seed=seed)
+    floor = min(min_share, 1 / arms)
+    shares = floor + (1 - floor * arms) * np.asarray(best)
+    # Largest remainder rounding keeps the total exact.
+    raw = shares * WEIGHT_TOTAL
+    weights = np.floor(raw).astype(int)
+    for index in np.argsort(weights - raw)[: WEIGHT_TOTAL - weights.sum()]:
+        weights[index] += 1
+    return weights.tolist()
+
+
+async def update_bandit_weights(session: AsyncSession) -> int:
+    """Recompute and publish the allocation of every active bandit test.
+
+    Returns the number of variants whose weight changed. Called by
+    background task.
+    """
+    tests = (
+        await session.execute(select(ABTest).where(ABTest.status == "active", ABTest.assignment_mode == "bandit"))
+    ).scalars().all()
+    if not tests:
+        return 0
+    variants = (
+        await session.execute(select(TestVariant).where(TestVariant.test_id.in_([test.id for test in tests])))
+    ).scalars().all()
+    counts = await sum_by_parent(
+        session,
+        TestDailyStat.variant_id,
+        [variant.id for variant in variants],
+        {"visitors": TestDailyStat.visitors, "conversions": TestDailyStat.conversions},
+    )
+
+    by_test: dict[uuid.UUID, list[TestVariant]] = {test.id: [] for test in tests}
+    for variant in variants:
+        by_test[variant.test_id].append(variant)
+    changed = 0
+    for test_id, arms in by_test.items():
+        arms.sort(key=lambda variant: (variant.variant_key, str(variant.id)))
+        weights = thompson_allocation(
+            [counts[variant.id]["conversions"] for variant in arms],
+            [counts[variant.id]["visitors"] for variant in arms],
+            seed=test_id.int % 2**32,
+        )
+        for variant, weight in zip(arms, weights):
+            if variant.bandit_weight != weight:
+                variant.bandit_weight = weight
+                changed += 1
+    if changed:
+        await session.commit()
+    return changed
@@ -0,0 +1,137 @@
+"""Bounded in-memory buffers drained into the database in multi-row batches."""
+
+import asyncio
+import logging
+from collections import deque
+from dataclasses import asdict, dataclass
+from typing import Any
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+logger = logging.getLogger(__name__)
+
+Row = dict[str, Any]
+
+
+@dataclass
+class WriterStats:
+    recorded: int = 0
+    written: int = 0
+    batches: int = 0
+    dropped_overflow: int = 0
+    dropped_failed: int = 0
+
+
+class BatchWriter:
+    """Ring buffer of rows drained by a background asyncio flusher.
+
+    Subclasses implement ``_insert``, which writes one batch in the session it
+    is given; the buffer commits it. Like the analytics pipeline, a full buffer
+    overwrites its oldest row and failed batches are dropped and counted
+    rather than retried, so a database outage cannot grow memory.
+    """
+
+    task_name = "batch-writer"
+
+    def __init__(self, *, capacity: int, batch_size: int, flush_interval: float) -> None:
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.stats = self._new_stats()
+        self._buffer: deque[Row] = deque(maxlen=capacity)
+        self._sessionmaker: async_sessionmaker[AsyncSession] | None = None
+        self._wakeup: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self._stopping = False
+
+    def _new_stats(self) -> WriterStats:
+        return WriterStats()
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def pending(self) -> int:
+        return len(self._buffer)
+
+    def _append(self, row: Row) -> None:
+        if len(self._buffer) == self._buffer.maxlen:
+            self.stats.dropped_overflow += 1
+        self._buffer.append(row)
+        self.stats.recorded += 1
+        if len(self._buffer) >= self.batch_size and self._wakeup is not None:
+            self._wakeup.set()
+
+    async def start(self, sessionmaker: async_sessionmaker[AsyncSession]) -> None:
+        if self.running:
+            return
+        self._sessionmaker = sessionmaker
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run(), name=self.task_name)
+
+    async def stop(self) -> None:
+        """Stop the flusher after its in-flight batch, then write what is left."""
+        if self._task is not None and self._wakeup is not None:
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        if self._sessionmaker is not None:
+            await self.flush(self._sessionmaker)
+        self._wakeup = None
+        self._stopping = False
+
+    async def flush(self, sessionmaker: async_sessionmaker[AsyncSession]) -> None:
+        """Write every buffered row, including a final partial batch."""
+        while self._buffer:
+            await self._write(sessionmaker, self._take_batch())
+
+    def reset(self) -> None:
+        self._buffer.clear()
+        self.stats = self._new_stats()
+
+    async def _run(self) -> None:
+        assert self._wakeup is not None and self._sessionmaker is not None
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+                full_batches_only = True
+            except asyncio.TimeoutError:
+                full_batches_only = False
+            self._wakeup.clear()
+            try:
+                while not self._stopping and self._buffer:
+                    if full_batches_only and len(self._buffer) < self.batch_size:
+                        break
+                    await self._write(self._sessionmaker, self._take_batch())
+            except Exception:
+                logger.exception("%s flush failed", self.task_name)
+
+    def _take_batch(self) -> list[Row]:
+        batch = []
+        while self._buffer and len(batch) < self.batch_size:
+            batch.append(self._buffer.popleft())
+        return batch
+
+    async def _write(self, sessionmaker: async_sessionmaker[AsyncSession], batch: list[Row]) -> None:
+        if not batch:
+            return
+        try:
+            async with sessionmaker() as session:
+                await self._insert(session, batch)
+                await session.commit()
+        except Exception:
+            self.stats.dropped_failed += len(batch)
+            self._failed(batch)
+            logger.exception("%s dropped %d rows", self.task_name, len(batch))
+        else:
+            self.stats.written += len(batch)
+            self.stats.batches += 1
+
+    async def _insert(self, session: AsyncSession, batch: list[Row]) -> None:
+        raise NotImplementedError
+
+    def _failed(self, batch: list[Row]) -> None:
+        pass
+
+    def snapshot(self) -> dict[str, int]:
+        return {**asdict(self.stats), "pending": self.pending()}
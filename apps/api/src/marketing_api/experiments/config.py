@@ -0,0 +1,252 @@
+"""In-process snapshot of active A/B tests, their variants and weights.
+
+Assignment reads from this snapshot instead of the database. It is rebuilt
+in two queries when it expires or after a commit in this process touches an
+``ABTest`` or ``TestVariant``; edits made by other processes show up within
+``experiment_config_ttl_seconds``. Each snapshot carries an ETag derived
+from its contents, so every process serving the same tests reports the
+same version and CDN revalidation works across them.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+import uuid
+from dataclasses import dataclass, field
+from itertools import accumulate
+from typing import Any
+from urllib.parse import urlsplit
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from marketing_api.db.models import ABTest, TestVariant
+from marketing_api.metrics import register_cache
+from marketing_api.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class VariantConfig:
+    id: uuid.UUID
+    key: str
+    name: str
+    weight: int
+    content: Any
+
+
+@dataclass(frozen=True)
+class ExperimentConfig:
+    id: uuid.UUID
+    name: str
+    status: str
+    target_url: str | None
+    conversion_event: str | None
+    assignment_mode: str
+    variants: tuple[VariantConfig, ...]
+    cumulative_weights: tuple[int, ...]
+
+    @property
+    def total_weight(self) -> int:
+        return self.cumulative_weights[-1] if self.cumulative_weights else 0
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "test_id": str(self.id),
+            "name": self.name,
+            "target_url": self.target_url,
+            "conversion_event": self.conversion_event,
+            "assignment_mode": self.assignment_mode,
+            "variants": [
+                {
+                    "variant_id": str(variant.id),
+                    "variant_key": variant.key,
+                    "name": variant.name,
+                    "weight": variant.weight,
+                    "content": variant.content,
+                }
+                for variant in self.variants
+            ],
+        }
+
+
+def target_path(url: str | None) -> str | None:
+    """The page path a test targets; scheme, host, query and fragment are ignored."""
+    if not url:
+        return None
+    path = urlsplit(url.strip()).path.rstrip("/")
+    return path or "/"
+
+
+def parse_content(content_json: str | None) -> Any:
+    if not content_json:
+        return None
+    try:
+        return json.loads(content_json)
+    except ValueError:
+        logger.warning("Variant content is not valid JSON; serving it as a string")
+        return content_json
+
+
+def build_test_config(test: ABTest, variants: list[TestVariant]) -> ExperimentConfig:
+    # Sorted so every process lays the buckets out in the same order.
+    ordered = sorted(variants, key=lambda variant: (variant.variant_key, str(variant.id)))
+    # Bandit weights are on their own scale; until every variant has one (e.g.
+    # right after a variant is added) the configured weights are used.
+    use_bandit = test.assignment_mode == "bandit" and all(variant.bandit_weight is not None for variant in ordered)
+    configs = tuple(
+        VariantConfig(
+            id=variant.id,
+            key=variant.variant_key,
+            name=variant.name,
+            weight=max(variant.bandit_weight if use_bandit else variant.weight, 0),
+            content=parse_content(variant.content_json),
+        )
+        for variant in ordered
+    )
+    return ExperimentConfig(
+        id=test.id,
+        name=test.name,
+        status=test.status,
+        target_url=test.target_url,
+        conversion_event=test.conversion_event,
+        assignment_mode=test.assignment_mode,
+        variants=configs,
+        cumulative_weights=tuple(accumulate(variant.weight for variant in configs)),
+    )
+
+
+def _encode(document: dict[str, Any]) -> bytes:
+    return json.dumps(document, separators=(",", ":"), sort_keys=True).encode()
+
+
+@dataclass(frozen=True)
+class ExperimentSnapshot:
+    tests: dict[uuid.UUID, ExperimentConfig]
+    by_path: dict[str, tuple[ExperimentConfig, ...]]
+    etag: str
+    _documents: dict[str | None, bytes] = field(default_factory=dict, compare=False, repr=False)
+
+    @classmethod
+    def build(cls, configs: list[ExperimentConfig]) -> "ExperimentSnapshot":
+        configs = sorted(configs, key=lambda config: str(config.id))
+        by_path: dict[str, list[ExperimentConfig]] = {}
+        for config in configs:
+            path = target_path(config.target_url)
+            if path is not None:
+                by_path.setdefault(path, []).append(config)
+        full = _encode({"tests": [config.as_dict() for config in configs]})
+        etag = f'"{hashlib.sha256(full).hexdigest()[:32]}"'
+        return cls(
+            tests={config.id: config for config in configs},
+            by_path={path: tuple(matches) for path, matches in by_path.items()},
+            etag=etag,
+        )
+
+    def matching(self, target_url: str) -> tuple[ExperimentConfig, ...]:
+        return self.by_path.get(target_path(target_url) or "/", ())
+
+    def document(self, target_url: str | None = None) -> bytes:
+        """The serialized config, optionally only the tests targeting one page.
+
+        Encoded once per snapshot and page, then served as-is.
+        """
+        key = target_path(target_url) if target_url else None
+        if key is not None and key not in self.by_path:
+            key = ""  # every page without tests shares one empty document
+        body = self._documents.get(key)
+        if body is None:
+            configs = self.tests.values() if key is None else self.by_path.get(key, ())
+            body = _encode({"version": self.etag, "tests": [config.as_dict() for config in configs]})
+            self._documents[key] = body
+        return body
+
+
+class ExperimentConfigCache:
+    def __init__(self, ttl_seconds: float) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._snapshot: ExperimentSnapshot | None = None
+        self._expires_at = 0.0
+        self._invalidations = 0
+        self._lock: asyncio.Lock | None = None
+        self._lock_loop: asyncio.AbstractEventLoop | None = None
+
+    async def snapshot(self, session: AsyncSession) -> ExperimentSnapshot:
+        """The current snapshot, reloading it with ``session`` if stale."""
+        snapshot = self._snapshot
+        if snapshot is not None and self._expires_at > time.monotonic():
+            self.hits += 1
+            return snapshot
+        async with self._reload_lock():
+            # Another request may have reloaded while this one waited.
+            if self._snapshot is not None and self._expires_at > time.monotonic():
+                self.hits += 1
+                return self._snapshot
+            self.misses += 1
+            invalidations = self._invalidations
+            expires_at = time.monotonic() + self.ttl_seconds
+            snapshot = await self._load(session)
+            self._snapshot = snapshot
+            # A commit that landed mid-load may not be in this snapshot.
+            self._expires_at = expires_at if invalidations == self._invalidations else 0.0
+            return snapshot
+
+    def _reload_lock(self) -> asyncio.Lock:
+        # One lock per event loop; the test suite runs each case on a fresh loop.
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._lock_loop is not loop:
+            self._lock = asyncio.Lock()
+            self._lock_loop = loop
+        return self._lock
+
+    async def get(self, session: AsyncSession, test_id: uuid.UUID) -> ExperimentConfig | None:
+        """The config of an active test, or ``None`` if it is not running."""
+        return (await self.snapshot(session)).tests.get(test_id)
+
+    async def _load(self, session: AsyncSession) -> ExperimentSnapshot:
+        tests = (await session.execute(select(ABTest).where(ABTest.status == "active"))).scalars().all()
+        variants_by_test: dict[uuid.UUID, list[TestVariant]] = {test.id: [] for test in tests}
+        if variants_by_test:
+            variants = await session.execute(
+                select(TestVariant).where(TestVariant.test_id.in_(list(variants_by_test)))
+            )
+            for variant in variants.scalars():
+                variants_by_test[variant.test_id].append(variant)
+        return ExperimentSnapshot.build([build_test_config(test, variants_by_test[test.id]) for test in tests])
+
+    def invalidate(self) -> None:
+        self._invalidations += 1
+        self._expires_at = 0.0
+
+    def clear(self) -> None:
+        self._snapshot = None
+        self._expires_at = 0.0
+
+
+experiment_cache = ExperimentConfigCache(settings.experiment_config_ttl_seconds)
+register_cache("experiments", lambda: (experiment_cache.hits, experiment_cache.misses))
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_experiment_changes(session: Session, flush_context) -> None:
+    for instance in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(instance, (ABTest, TestVariant)):
+            session.info["experiments_changed"] = True
+            return
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_experiments(session: Session) -> None:
+    if session.info.pop("experiments_changed", False):
+        experiment_cache.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_experiment_changes(session: Session) -> None:
+    session.info.pop("experiments_changed", None)
@@ -0,0 +1,192 @@
+"""Buffered ingestion of A/B test conversion events.
+
+Events are checked against the cached experiment config when they arrive and
+written later, a batch at a time: the missing deterministic assignments,
+one lookup of the batch's assignment ids, a multi-row ``INSERT ... ON
+CONFLICT (assignment_id, event_name) DO NOTHING`` and the daily counter
+upserts for whatever was actually inserted.
+Inserts go through SQLAlchemy's "insertmanyvalues" executemany, which sends
+multi-row VALUES statements from one cached compilation.
+"""
+
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from marketing_api.db.models import TestAssignment, TestConversion
+from marketing_api.db.upsert import dialect_insert
+from marketing_api.experiments.assignment import choose_variant
+from marketing_api.experiments.buffer import BatchWriter, Row, WriterStats
+from marketing_api.experiments.config import ExperimentConfig
+from marketing_api.experiments.counters import increment_daily_stats, utc_day
+from marketing_api.posthog_client import capture_feature_usage
+from marketing_api.settings import settings
+
+SEEN_CONVERSIONS_SIZE = 100_000
+
+
+@dataclass
+class ConversionStats(WriterStats):
+    skipped_seen: int = 0
+    duplicates: int = 0
+    unassigned: int = 0
+
+
+class ConversionBuffer(BatchWriter):
+    """Buffer of conversion events drained into ``test_conversions``.
+
+    Deterministic tests need no lookup to know the visitor's variant, so their
+    assignment row is written alongside the conversion if the assignment
+    recorder has not flushed it yet. Conversions in legacy random-mode tests
+    without a stored assignment are dropped and counted as ``unassigned``.
+    """
+
+    task_name = "conversion-buffer"
+
+    def __init__(
+        self,
+        *,
+        capacity: int = 50_000,
+        batch_size: int = 1000,
+        flush_interval: float = 1.0,
+        seen_size: int = SEEN_CONVERSIONS_SIZE,
+    ) -> None:
+        super().__init__(capacity=capacity, batch_size=batch_size, flush_interval=flush_interval)
+        self.seen_size = seen_size
+        self._seen: OrderedDict[tuple[uuid.UUID, str, str], None] = OrderedDict()
+
+    def _new_stats(self) -> ConversionStats:
+        return ConversionStats()
+
+    def track(
+        self,
+        test: ExperimentConfig,
+        event_name: str,
+        *,
+        user_id: str | None = None,
+        session_id: str | None = None,
+    ) -> None:
+        unit_id = user_id or session_id
+        if not unit_id:
+            raise ValueError("A user_id or session_id is required")
+        key = (test.id, unit_id, event_name)
+        if key in self._seen:
+            self._seen.move_to_end(key)
+            self.stats.skipped_seen += 1
+            return
+        self._seen[key] = None
+        if len(self._seen) > self.seen_size:
+            self._seen.popitem(last=False)
+
+        variant = choose_variant(test, unit_id) if test.assignment_mode == "deterministic" else None
+        self._append(
+            {
+                "test_id": test.id,
+                "unit_id": unit_id,
+                "user_id": user_id,
+                "session_id": session_id,
+                "variant_id": variant.id if variant else None,
+                "event_name": event_name,
+                "primary": event_name == test.conversion_event,
+                "converted_at": datetime.now(timezone.utc),
+            }
+        )
+
+    def reset(self) -> None:
+        super().reset()
+        self._seen.clear()
+
+    async def _insert(self, session: AsyncSession, batch: list[Row]) -> None:
+        known = {(row["test_id"], row["unit_id"]): row for row in batch if row["variant_id"] is not None}
+        if known:
+            missing = [
+                {
+                    "id": uuid.uuid4(),
+                    "test_id": row["test_id"],
+                    "variant_id": row["variant_id"],
+                    "user_id": row["user_id"],
+                    "session_id": row["session_id"],
+                    "unit_id": row["unit_id"],
+                    "assigned_at": row["converted_at"],
+                }
+                for row in known.values()
+            ]
+            stmt = (
+                dialect_insert(session, TestAssignment)
+                .on_conflict_do_nothing(index_elements=["test_id", "unit_id"])
+                .returning(TestAssignment.id)
+            )
+            created = set((await session.execute(stmt, missing)).scalars())
+            await increment_daily_stats(
+                session,
+                "visitors",
+                (
+                    (utc_day(row["assigned_at"]), row["test_id"], row["variant_id"])
+                    for row in missing
+                    if row["id"] in created
+                ),
+            )
+
+        result = await session.execute(
+            select(TestAssignment.id, TestAssignment.test_id, TestAssignment.unit_id, TestAssignment.variant_id)
+            .where(TestAssignment.test_id.in_({row["test_id"] for row in batch}))
+            .where(TestAssignment.unit_id.in_({row["unit_id"] for row in batch}))
+        )
+        assignments = {
+            (test_id, unit_id): (assignment_id, variant_id) for assignment_id, test_id, unit_id, variant_id in result
+        }
+
+        values = []
+        primary = set()
+        for row in batch:
+            assignment = assignments.get((row["test_id"], row["unit_id"]))
+            if assignment is None:
+                self.stats.unassigned += 1
+                continue
+            assignment_id, variant_id = assignment
+            conversion_id = uuid.uuid4()
+            if row["primary"]:
+                primary.add(conversion_id)
+            values.append(
+                {
+                    "id": conversion_id,
+                    "test_id": row["test_id"],
+                    "variant_id": variant_id,
+                    "assignment_id": assignment_id,
+                    "user_id": row["user_id"],
+                    "event_name": row["event_name"],
+                    "converted_at": row["converted_at"],
+                }
+            )
+        if not values:
+            return
+        stmt = (
+            dialect_insert(session, TestConversion)
+            .on_conflict_do_nothing(index_elements=["assignment_id", "event_name"])
+            .returning(TestConversion.id, TestConversion.test_id, TestConversion.variant_id, TestConversion.event_name)
+        )
+        rows = (await session.execute(stmt, values)).all()
+        self.stats.duplicates += len(values) - len(rows)
+        converted_at = {value["id"]: value["converted_at"] for value in values}
+        await increment_daily_stats(
+            session,
+            "conversions",
+            ((utc_day(converted_at[row.id]), row.test_id, row.variant_id) for row in rows if row.id in primary),
+        )
+        for row in rows:
+            capture_feature_usage("ab_test_conversion", {"test_id": str(row.test_id), "event": row.event_name})
+
+    def _failed(self, batch: list[Row]) -> None:
+        for row in batch:
+            self._seen.pop((row["test_id"], row["unit_id"], row["event_name"]), None)
+
+
+conversion_buffer = ConversionBuffer(
+    capacity=settings.conversion_buffer_size,
+    batch_size=settings.conversion_batch_size,
+    flush_interval=settings.conversion_flush_interval_seconds,
+)
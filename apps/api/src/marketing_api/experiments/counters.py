@@ -0,0 +1,121 @@
+"""Per-(test, variant, day) visitor and conversion counters.
+
+The assignment recorder, the conversion buffer and legacy inline assignment
+bump ``test_daily_stats`` in the same transaction as the rows they count, so
+results and listings read O(variants x days) rows instead of scanning
+``test_assignments`` and ``test_conversions``. ``reconcile_test_daily_stats``
+recomputes a trailing window from those tables to correct any drift.
+"""
+
+import uuid
+from collections import Counter
+from collections.abc import Iterable
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy import func, literal, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from marketing_api.db.aggregates import utc_day_column
+from marketing_api.db.models import ABTest, TestAssignment, TestConversion, TestDailyStat
+from marketing_api.db.upsert import dialect_insert
+from marketing_api.settings import settings
+
+DayKey = tuple[date, uuid.UUID, uuid.UUID]  # (day, test_id, variant_id)
+
+
+def utc_day(moment: datetime) -> date:
+    if moment.tzinfo is None:
+        return moment.date()
+    return moment.astimezone(timezone.utc).date()
+
+
+async def increment_daily_stats(session: AsyncSession, column: str, keys: Iterable[DayKey]) -> None:
+    """Add one to ``column`` for each (day, test, variant) key, in one upsert."""
+    increments = Counter(keys)
+    if not increments:
+        return
+    stmt = dialect_insert(session, TestDailyStat)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["day", "variant_id"],
+        set_={column: getattr(TestDailyStat, column) + getattr(stmt.excluded, column), "updated_at": func.now()},
+    )
+    # Sorted so concurrent writers lock rows in the same order.
+    await session.execute(
+        stmt,
+        [
+            {"id": uuid.uuid4(), "day": day, "test_id": test_id, "variant_id": variant_id, column: amount}
+            for (day, test_id, variant_id), amount in sorted(increments.items(), key=lambda item: str(item[0]))
+        ],
+    )
+
+
+async def reconcile_test_daily_stats(session: AsyncSession, lookback_days: int | None = None) -> int:
+    """Recompute the counters for the trailing window from the raw tables.
+
+    Counter rows in the window with nothing behind them are zeroed. An
+    increment committed while this runs can be overwritten; the next run
+    restores it. Called by background task.
+    """
+    lookback = lookback_days if lookback_days is not None else settings.experiment_reconcile_lookback_days
+    since_day = datetime.now(timezone.utc).date() - timedelta(days=lookback)
+    since = datetime.combine(since_day, datetime.min.time(), tzinfo=timezone.utc)
+
+    assigned_day = utc_day_column(session, TestAssignment.assigned_at)
+    converted_day = utc_day_column(session, TestConversion.converted_at)
+    visitors = (
+        select(
+            literal("visitors").label("kind"),
+            assigned_day.label("day"),
+            TestAssignment.test_id,
+            TestAssignment.variant_id,
+            func.count().label("total"),
+        )
+        .where(TestAssignment.assigned_at >= since)
+        .group_by(assigned_day, TestAssignment.test_id, TestAssignment.variant_id)
+    )
+    conversions = (
+        select(
+            literal("conversions").label("kind"),
+            converted_day.label("day"),
+            TestConversion.test_id,
+            TestConversion.variant_id,
+            func.count().label("total"),
+        )
+        .join(ABTest, ABTest.id == TestConversion.test_id)
+        .where(TestConversion.converted_at >= since, TestConversion.event_name == ABTest.conversion_event)
+        .group_by(converted_day, TestConversion.test_id, TestConversion.variant_id)
+    )
+    exact: dict[DayKey, dict[str, int]] = {}
+    for kind, day, test_id, variant_id, total in await session.execute(union_all(visitors, conversions)):
+        # SQLite returns the day as text.
+        day = day if isinstance(day, date) else date.fromisoformat(day)
+        exact.setdefault((day, test_id, variant_id), {"visitors": 0, "conversions": 0})[kind] = total
+
+    existing = await session.execute(
+        select(TestDailyStat.day, TestDailyStat.test_id, TestDailyStat.variant_id).where(
+            TestDailyStat.day >= since_day
+        )
+    )
+    for key in existing:
+        exact.setdefault(tuple(key), {"visitors": 0, "conversions": 0})
+    if not exact:
+        return 0
+
+    stmt = dialect_insert(session, TestDailyStat)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["day", "variant_id"],
+        set_={
+            "visitors": stmt.excluded.visitors,
+            "conversions": stmt.excluded.conversions,
+            "updated_at": func.now(),
+        },
+    )
+    await session.execute(
+        stmt,
+        [
+            {"id": uuid.uuid4(), "day": day, "test_id": test_id, "variant_id": variant_id, **counts}
+            for (day, test_id, variant_id), counts in sorted(exact.items(), key=lambda item: str(item[0]))
+        ],
+    )
+    await session.commit()
+    return len(exact)
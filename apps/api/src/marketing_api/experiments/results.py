@@ -0,0 +1,180 @@
+"""Per-variant A/B test results: counts, daily series and significance.
+
+Visitors and conversions per (variant, day) are read from the daily
+counters. The analysis built from them is memoized per test and only
+recomputed when those counts change.
+"""
+
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from marketing_api.db.models import ABTest, TestDailyStat, TestVariant
+from marketing_api.experiments import stats
+from marketing_api.metrics import register_cache
+
+RESULTS_CACHE_SIZE = 256
+CONFIDENCE = 0.95
+POSTERIOR_DRAWS = 20_000
+
+
+@dataclass(frozen=True)
+class DailyCount:
+    variant_id: uuid.UUID
+    day: str
+    visitors: int
+    conversions: int
+
+
+async def daily_counts(session: AsyncSession, test: ABTest) -> list[DailyCount]:
+    """Visitors and conversions per variant and day, from the daily counters."""
+    rows = await session.execute(
+        select(TestDailyStat.variant_id, TestDailyStat.day, TestDailyStat.visitors, TestDailyStat.conversions)
+        .where(TestDailyStat.test_id == test.id)
+        .order_by(TestDailyStat.day, TestDailyStat.variant_id)
+    )
+    return [
+        DailyCount(variant_id=variant_id, day=day.isoformat(), visitors=visitors, conversions=conversions)
+        for variant_id, day, visitors, conversions in rows
+    ]
+
+
+def _percent(value: float) -> float:
+    return round(value * 100, 2)
+
+
+def analyze(variants: list[TestVariant], counts: list[DailyCount], *, seed: int | None = None) -> dict[str, Any]:
+    """Significance of each variant against the control, plus the daily series.
+
+    The control is the variant keyed ``control``, or the first one by key.
+    """
+    ordered = sorted(variants, key=lambda variant: (variant.variant_key != "control", variant.variant_key))
+    index = {variant.id: position for position, variant in enumerate(ordered)}
+    days = sorted({count.day for count in counts})
+    day_index = {day: position for position, day in enumerate(days)}
+
+    # Visitors/conversions per variant (rows) and day (columns).
+    daily_visitors = np.zeros((len(ordered), len(days)), dtype=np.int64)
+    daily_conversions = np.zeros_like(daily_visitors)
+    for count in counts:
+        if count.variant_id in index:
+            daily_visitors[index[count.variant_id], day_index[count.day]] = count.visitors
+            daily_conversions[index[count.variant_id], day_index[count.day]] = count.conversions
+    cumulative_visitors = daily_visitors.cumsum(axis=1)
+    cumulative_conversions = daily_conversions.cumsum(axis=1)
+    visitors = daily_visitors.sum(axis=1).tolist() if days else [0] * len(ordered)
+    conversions = daily_conversions.sum(axis=1).tolist() if days else [0] * len(ordered)
+
+    beat_control, best = (
+        stats.posterior_probabilities(conversions, visitors, draws=POSTERIOR_DRAWS, seed=seed)
+        if ordered
+        else ([], [])
+    )
+
+    results = []
+    for position, variant in enumerate(ordered):
+        n, c = visitors[position], conversions[position]
+        low, high = stats.wilson_interval(c, n, CONFIDENCE)
+        result: dict[str, Any] = {
+            "variant_key": variant.variant_key,
+            "name": variant.name,
+            "visitors": n,
+            "conversions": c,
+            "conversion_rate": _percent(c / n) if n else 0,
+            "conversion_rate_interval": [_percent(low), _percent(high)],
+            "probability_best": round(best[position], 4),
+        }
+        if position > 0:
+            control_n, control_c = visitors[0], conversions[0]
+            z, p_value = stats.two_proportion_z_test(control_c, control_n, c, n)
+            low, high = stats.difference_interval(control_c, control_n, c, n, CONFIDENCE)
+            sequential = (
+                stats.always_valid_p_values(
+                    cumulative_conversions[0],
+                    cumulative_visitors[0],
+                    cumulative_conversions[position],
+                    cumulative_visitors[position],
+                )[-1]
+                if days
+                else 1.0
+            )
+            control_rate = control_c / control_n if control_n else 0
+            result.update(
+                {
+                    "lift": _percent((c / n - control_rate) / control_rate) if n and control_rate else None,
+                    "difference_interval": [_percent(low), _percent(high)],
+                    "z_score": round(z, 4),
+                    "p_value": round(p_value, 6),
+                    "always_valid_p_value": round(float(sequential), 6),
+                    # Safe to act on at any look, unlike p_value.
+                    "significant": bool(sequential < 1 - CONFIDENCE),
+                    "probability_to_beat_control": round(beat_control[position], 4),
+                }
+            )
+        results.append(result)
+
+    chi_square = stats.chi_square(conversions, visitors)
+    return {
+        "control_key": ordered[0].variant_key if ordered else None,
+        "confidence_level": CONFIDENCE,
+        "results": results,
+        "chi_square": (
+            {"statistic": round(chi_square[0], 4), "p_value": round(chi_square[1], 6), "dof": chi_square[2]}
+            if chi_square
+            else None
+        ),
+        "daily": [
+            {
+                "day": day,
+                "variants": {
+                    variant.variant_key: {
+                        "visitors": int(daily_visitors[position, column]),
+                        "conversions": int(daily_conversions[position, column]),
+                    }
+                    for position, variant in enumerate(ordered)
+                },
+            }
+            for column, day in enumerate(days)
+        ],
+    }
+
+
+class ResultsCache:
+    """Last analysis per test, reused while its counts are unchanged."""
+
+    def __init__(self, maxsize: int = RESULTS_CACHE_SIZE) -> None:
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[uuid.UUID, tuple[tuple, dict[str, Any]]] = OrderedDict()
+
+    async def results(self, session: AsyncSession, test: ABTest, variants: list[TestVariant]) -> dict[str, Any]:
+        counts = await daily_counts(session, test)
+        fingerprint = (
+            tuple((variant.id, variant.variant_key, variant.name) for variant in variants),
+            tuple(counts),
+        )
+        entry = self._entries.get(test.id)
+        if entry is not None and entry[0] == fingerprint:
+            self.hits += 1
+            self._entries.move_to_end(test.id)
+            return entry[1]
+        self.misses += 1
+        analysis = analyze(variants, counts, seed=test.id.int % 2**32)
+        self._entries[test.id] = (fingerprint, analysis)
+        self._entries.move_to_end(test.id)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return analysis
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+results_cache = ResultsCache()
+register_cache("ab_results", lambda: (results_cache.hits, results_cache.misses))
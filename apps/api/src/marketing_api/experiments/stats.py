@@ -0,0 +1,115 @@
+"""Significance tests for conversion-rate experiments.
+
+Every function takes plain counts so the maths can be checked without a
+database. Rates and intervals are proportions in [0, 1]; the results route
+converts them to percentages.
+"""
+
+import math
+
+import numpy as np
+from scipy import stats
+
+# Prior standard deviation of the absolute difference in conversion rate for
+# the mixture SPRT. Typical landing page lifts are a few points.
+MSPRT_TAU = 0.05
+
+
+def wilson_interval(conversions: int, visitors: int, confidence: float = 0.95) -> tuple[float, float]:
+    if visitors <= 0:
+        return (0.0, 0.0)
+    z = stats.norm.ppf(0.5 + confidence / 2)
+    rate = conversions / visitors
+    denominator = 1 + z**2 / visitors
+    centre = (rate + z**2 / (2 * visitors)) / denominator
+    margin = z * math.sqrt(rate * (1 - rate) / visitors + z**2 / (4 * visitors**2)) / denominator
+    return (max(0.0, centre - margin), min(1.0, centre + margin))
+
+
+def two_proportion_z_test(
+    control_conversions: int, control_visitors: int, conversions: int, visitors: int
+) -> tuple[float, float]:
+    """Pooled two-sided z-test of ``conversions/visitors`` against the control."""
+    if control_visitors <= 0 or visitors <= 0:
+        return (0.0, 1.0)
+    pooled = (control_conversions + conversions) / (control_visitors + visitors)
+    se = math.sqrt(pooled * (1 - pooled) * (1 / control_visitors + 1 / visitors))
+    if se == 0:
+        return (0.0, 1.0)
+    z = (conversions / visitors - control_conversions / control_visitors) / se
+    return (z, float(2 * stats.norm.sf(abs(z))))
+
+
+def difference_interval(
+    control_conversions: int,
+    control_visitors: int,
+    conversions: int,
+    visitors: int,
+    confidence: float = 0.95,
+) -> tuple[float, float]:
+    """Unpooled interval for ``rate - control_rate``."""
+    if control_visitors <= 0 or visitors <= 0:
+        return (0.0, 0.0)
+    control_rate = control_conversions / control_visitors
+    rate = conversions / visitors
+    se = math.sqrt(control_rate * (1 - control_rate) / control_visitors + rate * (1 - rate) / visitors)
+    z = stats.norm.ppf(0.5 + confidence / 2)
+    difference = rate - control_rate
+    return (difference - z * se, difference + z * se)
+
+
+def chi_square(conversions: list[int], visitors: list[int]) -> tuple[float, float, int] | None:
+    """Chi-square test of independence across all variants, if it is defined."""
+    table = np.array([[c, n - c] for c, n in zip(conversions, visitors) if n > 0], dtype=float)
+    if len(table) < 2 or (table.sum(axis=0) == 0).any():
+        return None
+    statistic, p_value, dof, _ = stats.chi2_contingency(table, correction=False)
+    return (float(statistic), float(p_value), int(dof))
+
+
+def posterior_probabilities(
+    conversions: list[int],
+    visitors: list[int],
+    *,
+    control_index: int = 0,
+    draws: int = 20_000,
+    seed: int | None = None,
+) -> tuple[list[float], list[float]]:
+    """P(beat control) and P(best) per variant under Beta(1, 1) priors.
+
+    All posteriors are sampled in one ``(draws, variants)`` array.
+    """
+    rng = np.random.default_rng(seed)
+    successes = np.asarray(conversions, dtype=float)
+    trials = np.asarray(visitors, dtype=float)
+    samples = rng.beta(1 + successes, 1 + trials - successes, size=(draws, len(successes)))
+    beat_control = (samples > samples[:, [control_index]]).mean(axis=0)
+    best = np.bincount(samples.argmax(axis=1), minlength=len(successes)) / draws
+    return beat_control.tolist(), best.tolist()
+
+
+def always_valid_p_values(
+    control_conversions: np.ndarray,
+    control_visitors: np.ndarray,
+    conversions: np.ndarray,
+    visitors: np.ndarray,
+    tau: float = MSPRT_TAU,
+) -> np.ndarray:
+    """Always-valid p-values from a normal-mixture SPRT over cumulative counts.
+
+    Each argument holds running totals, one entry per look (day). Unlike the
+    fixed-horizon z-test, stopping as soon as the value drops below alpha
+    keeps the false positive rate at alpha however often results are checked.
+    """
+    control_visitors = np.maximum(control_visitors, 1)
+    visitors = np.maximum(visitors, 1)
+    control_rate = control_conversions / control_visitors
+    rate = conversions / visitors
+    variance = control_rate * (1 - control_rate) / control_visitors + rate * (1 - rate) / visitors
+    tau2 = tau**2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        log_likelihood_ratio = 0.5 * np.log(variance / (variance + tau2)) + (
+            tau2 * (rate - control_rate) ** 2 / (2 * variance * (variance + tau2))
+        )
+    p_values = np.where(variance > 0, np.minimum(1.0, np.exp(-log_likelihood_ratio)), 1.0)
+    return np.minimum.accumulate(p_values)
@@ -0,0 +1,195 @@
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+from typing import Any
+
+from graphql import (
+    DocumentNode,
+    FieldNode,
+    FragmentDefinitionNode,
+    FragmentSpreadNode,
+    GraphQLInt,
+    GraphQLList,
+    GraphQLNonNull,
+    GraphQLSchema,
+    InlineFragmentNode,
+    OperationDefinitionNode,
+    SelectionSetNode,
+    get_named_type,
+    value_from_ast,
+)
+from graphql.error import GraphQLError
+from strawberry.extensions import SchemaExtension
+
+from marketing_api.auth.principal import Principal
+from marketing_api.settings import settings
+
+# Assumed size of list fields that take no ``first`` argument.
+LIST_SIZE_ESTIMATE = 20
+
+
+@dataclass(frozen=True)
+class QueryComplexity:
+    depth: int
+    cost: int
+
+
+def is_list_type(type_) -> bool:
+    while isinstance(type_, GraphQLNonNull):
+        type_ = type_.of_type
+    return isinstance(type_, GraphQLList)
+
+
+class _Analyzer:
+    def __init__(
+        self,
+        schema: GraphQLSchema,
+        fragments: dict[str, FragmentDefinitionNode],
+        variables: dict[str, Any],
+    ) -> None:
+        self.schema = schema
+        self.fragments = fragments
+        self.variables = variables
+
+    def page_size(self, node: FieldNode, field) -> int | None:
+        if "first" not in field.args:
+            return None
+        for argument in node.arguments:
+            if argument.name.value == "first":
+                value = value_from_ast(argument.value, GraphQLInt, self.variables)
+                return value if isinstance(value, int) else None
+        default = field.args["first"].default_value
+        return default if isinstance(default, int) else None
+
+    def walk(
+        self, selection_set: SelectionSetNode, parent_type, multiplier: int, paged: bool
+    ) -> QueryComplexity:
+        depth, cost = 0, 0
+        for selection in selection_set.selections:
+            if isinstance(selection, FieldNode):
+                name = selection.name.value
+                if name.startswith("__"):
+                    continue
+                field = parent_type.fields.get(name)
+                if field is None:
+                    continue
+                cost += multiplier
+                if not selection.selection_set:
+                    depth = max(depth, 1)
+                    continue
+                page_size = self.page_size(selection, field)
+                if page_size is not None:
+                    child_multiplier = multiplier * max(page_size, 1)
+                elif is_list_type(field.type) and not paged:
+                    child_multiplier = multiplier * LIST_SIZE_ESTIMATE
+                else:
+                    child_multiplier = multiplier
+                child = self.walk(
+                    selection.selection_set,
+                    get_named_type(field.type),
+                    child_multiplier,
+                    paged=page_size is not None,
+                )
+                depth = max(depth, child.depth + 1)
+                cost += child.cost
+                continue
+
+            if isinstance(selection, FragmentSpreadNode):
+                fragment = self.fragments.get(selection.name.value)
+                if fragment is None:
+                    continue
+                type_condition, child_selections = fragment.type_condition, fragment.selection_set
+            elif isinstance(selection, InlineFragmentNode):
+                type_condition, child_selections = selection.type_condition, selection.selection_set
+            else:
+                continue
+            fragment_type = (
+                self.schema.get_type(type_condition.name.value) if type_condition else parent_type
+            )
+            child = self.walk(child_selections, fragment_type, multiplier, paged)
+            depth = max(depth, child.depth)
+            cost += child.cost
+        return QueryComplexity(depth=depth, cost=cost)
+
+
+def analyze_query(
+    schema: GraphQLSchema,
+    document: DocumentNode,
+    operation_name: str | None = None,
+    variables: dict[str, Any] | None = None,
+) -> QueryComplexity:
+    """Estimate the depth and cost of one operation.
+
+    Each field costs 1 per parent row; fields taking ``first`` multiply their
+    children by the page size, other list fields by LIST_SIZE_ESTIMATE.
+    Introspection fields are free.
+    """
+    fragments = {
+        definition.name.value: definition
+        for definition in document.definitions
+        if isinstance(definition, FragmentDefinitionNode)
+    }
+    operations = [
+        definition
+        for definition in document.definitions
+        if isinstance(definition, OperationDefinitionNode)
+        and (operation_name is None or (definition.name and definition.name.value == operation_name))
+    ]
+    if not operations:
+        return QueryComplexity(depth=0, cost=0)
+    operation = operations[0]
+    root_type = schema.get_root_type(operation.operation)
+    analyzer = _Analyzer(schema, fragments, variables or {})
+    return analyzer.walk(operation.selection_set, root_type, multiplier=1, paged=False)
+
+
+def cost_budget(user: Principal | None) -> int:
+    """Largest cost budget among the user's roles."""
+    if user is None:
+        return settings.graphql_cost_budget_anonymous
+    role_budgets = {
+        "admin": settings.graphql_cost_budget_admin,
+        "manager": settings.graphql_cost_budget_manager,
+    }
+    return max(
+        [settings.graphql_cost_budget_user]
+        + [role_budgets[role] for role in user.roles if role in role_budgets]
+    )
+
+
+class QueryComplexityLimiter(SchemaExtension):
+    """Reject operations deeper than GRAPHQL_MAX_DEPTH or costlier than the caller's budget.
+
+    The user is only resolved when the cost exceeds the anonymous budget, so
+    cheap operations stay off the database.
+    """
+
+    async def on_execute(self) -> AsyncIterator[None]:
+        execution_context = self.execution_context
+        complexity = analyze_query(
+            execution_context.schema._schema,
+            execution_context.graphql_document,
+            execution_context.operation_name,
+            execution_context.variables,
+        )
+        if complexity.depth > settings.graphql_max_depth:
+            raise GraphQLError(
+                f"Query depth {complexity.depth} exceeds the limit of {settings.graphql_max_depth}.",
+                extensions={"code": "QUERY_TOO_DEEP"},
+            )
+        budget = settings.graphql_cost_budget_anonymous
+        if complexity.cost > budget:
+            budget = cost_budget(await execution_context.context.get_current_user())
+        if complexity.cost > budget:
+            raise GraphQLError(
+                f"Query cost {complexity.cost} exceeds the budget of {budget}.",
+                extensions={"code": "QUERY_TOO_COMPLEX"},
+            )
+        self.complexity = complexity
+        self.budget = budget
+        yield
+
+    def get_results(self) -> dict[str, Any]:
+        complexity = getattr(self, "complexity", None)
+        if complexity is None:
+            return {}
+        return {"cost": {"depth": complexity.depth, "cost": complexity.cost, "budget": self.budget}}
@@ -0,0 +1,89 @@
+import enum
+from collections.abc import Callable
+from typing import Generic, TypeVar
+
+import strawberry
+from graphql.error import GraphQLError
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from marketing_api.db.pagination import encode_cursor, keyset_page
+
+NodeType = TypeVar("NodeType")
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+@strawberry.enum
+class SortDirection(enum.Enum):
+    ASC = "asc"
+    DESC = "desc"
+
+
+@strawberry.type
+class PageInfo:
+    has_next_page: bool
+    end_cursor: str | None
+
+
+@strawberry.type
+class Edge(Generic[NodeType]):
+    cursor: str
+    node: NodeType
+
+
+@strawberry.type
+class Connection(Generic[NodeType]):
+    edges: list[Edge[NodeType]]
+    page_info: PageInfo
+
+    @strawberry.field
+    def nodes(self) -> list[NodeType]:
+        return [edge.node for edge in self.edges]
+
+
+def validate_page_size(first: int) -> None:
+    if first < 0 or first > MAX_PAGE_SIZE:
+        raise GraphQLError(f"first must be between 0 and {MAX_PAGE_SIZE}.")
+
+
+async def paginate(
+    session: AsyncSession,
+    query: Select,
+    model,
+    *,
+    sort_attr: str,
+    first: int,
+    after: str | None,
+    direction: SortDirection,
+    to_node: Callable,
+) -> Connection:
+    """Run one keyset page of ``query`` ordered by (sort_attr, id)."""
+    validate_page_size(first)
+    try:
+        query = keyset_page(
+            query,
+            getattr(model, sort_attr),
+            model.id,
+            cursor=after,
+            limit=first,
+            descending=direction == SortDirection.DESC,
+        )
+    except ValueError as exc:
+        raise GraphQLError("Invalid cursor.") from exc
+
+    result = await session.execute(query)
+    rows = result.scalars().all()
+    page = rows[:first]
+    edges = [
+        Edge(cursor=encode_cursor(getattr(row, sort_attr), row.id), node=to_node(row))
+        for row in page
+    ]
+    return Connection(
+        edges=edges,
+        page_info=PageInfo(
+            has_next_page=len(rows) > first,
+            end_cursor=edges[-1].cursor if edges else None,
+        ),
+    )
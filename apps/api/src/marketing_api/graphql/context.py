@@ -0,0 +1,37 @@
+import asyncio
+
+from fastapi import HTTPException
+from graphql.error import GraphQLError
+from sqlalchemy.ext.asyncio import AsyncSession
+from strawberry.fastapi import BaseContext
+
+from marketing_api.auth.dependencies import extract_bearer_token, resolve_user_from_token
+from marketing_api.auth.principal import Principal
+from marketing_api.graphql.loaders import create_loaders
+
+_UNRESOLVED = object()
+
+
+class GraphQLContext(BaseContext):
+    """Per-request context; the current user is only looked up when a resolver asks.
+
+    The session checks out a connection on its first query, so operations such
+    as ``health`` or introspection never touch the database.
+    """
+
+    def __init__(self, session: AsyncSession) -> None:
+        super().__init__()
+        self.session = session
+        self.loaders = create_loaders(session)
+        self._current_user = _UNRESOLVED
+        self._user_lock = asyncio.Lock()
+
+    async def get_current_user(self) -> Principal | None:
+        async with self._user_lock:
+            if self._current_user is _UNRESOLVED:
+                token = extract_bearer_token(self.request)
+                try:
+                    self._current_user = await resolve_user_from_token(self.session, token)
+                except HTTPException as exc:
+                    raise GraphQLError(exc.detail) from exc
+            return self._current_user
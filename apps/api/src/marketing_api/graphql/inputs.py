@@ -1,4 +1,5 @@
 import datetime as dt
+import enum
 
 import strawberry
 
@@ -65,3 +66,104 @@ class PipelineStageInput:
     name: str
     order: int
     probability: int
+
+
+@strawberry.enum
+class LeadSortField(enum.Enum):
+    created_at = "created_at"
+    updated_at = "updated_at"
+    full_name = "full_name"
+
+
+@strawberry.enum
+class CustomerSortField(enum.Enum):
+    created_at = "created_at"
+    updated_at = "updated_at"
+    name = "name"
+
+
+@strawberry.enum
+class ContactSortField(enum.Enum):
+    created_at = "created_at"
+    full_name = "full_name"
+
+
+@strawberry.enum
+class DealSortField(enum.Enum):
+    created_at = "created_at"
+    updated_at = "updated_at"
+    name = "name"
+
+
+@strawberry.enum
+class ActivitySortField(enum.Enum):
+    created_at = "created_at"
+    updated_at = "updated_at"
+
+
+@strawberry.enum
+class NoteSortField(enum.Enum):
+    created_at = "created_at"
+
+
+@strawberry.enum
+class PipelineStageSortField(enum.Enum):
+    order = "order"
+    created_at = "created_at"
+
+
+@strawberry.input
+class LeadFilter:
+    status: str | None = None
+    source: str | None = None
+    assigned_to_user_id: str | None = None
+    customer_id: str | None = None
+    created_after: dt.datetime | None = None
+    created_before: dt.datetime | None = None
+    search: str | None = None
+
+
+@strawberry.input
+class CustomerFilter:
+    status: str | None = None
+    industry: str | None = None
+    owner_user_id: str | None = None
+    created_after: dt.datetime | None = None
+    created_before: dt.datetime | None = None
+    search: str | None = None
+
+
+@strawberry.input
+class ContactFilter:
+    customer_id: str | None = None
+    search: str | None = None
+
+
+@strawberry.input
+class DealFilter:
+    status: str | None = None
+    customer_id: str | None = None
+    stage_id: str | None = None
+    close_date_from: dt.date | None = None
+    close_date_to: dt.date | None = None
+
+
+@strawberry.input
+class ActivityFilter:
+    type: str | None = None
+    status: str | None = None
+    assigned_to_user_id: str | None = None
+    lead_id: str | None = None
+    contact_id: str | None = None
+    customer_id: str | None = None
+    deal_id: str | None = None
+    due_before: dt.datetime | None = None
+
+
+@strawberry.input
+class NoteFilter:
+    author_user_id: str | None = None
+    lead_id: str | None = None
+    contact_id: str | None = None
+    customer_id: str | None = None
+    deal_id: str | None = None
@@ -0,0 +1,55 @@
+import uuid
+from collections import defaultdict
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from strawberry.dataloader import DataLoader
+
+from marketing_api.db import models
+
+
+def _by_id(session: AsyncSession, model) -> Callable:
+    async def load(keys: list[uuid.UUID]):
+        result = await session.execute(select(model).where(model.id.in_(keys)))
+        rows = {row.id: row for row in result.scalars().all()}
+        return [rows.get(key) for key in keys]
+
+    return load
+
+
+def _by_parent(session: AsyncSession, model, parent_column) -> Callable:
+    async def load(keys: list[uuid.UUID]):
+        result = await session.execute(
+            select(model)
+            .where(parent_column.in_(keys))
+            .order_by(model.created_at.desc(), model.id.desc())
+        )
+        grouped: dict[uuid.UUID, list] = defaultdict(list)
+        for row in result.scalars().all():
+            grouped[getattr(row, parent_column.key)].append(row)
+        return [grouped.get(key, []) for key in keys]
+
+    return load
+
+
+@dataclass
+class CrmLoaders:
+    """Per-request DataLoaders; each batches one relation into a single IN query."""
+
+    customer: DataLoader[uuid.UUID, models.Customer | None]
+    pipeline_stage: DataLoader[uuid.UUID, models.PipelineStage | None]
+    contacts_by_customer: DataLoader[uuid.UUID, list[models.Contact]]
+    deals_by_customer: DataLoader[uuid.UUID, list[models.Deal]]
+    deals_by_stage: DataLoader[uuid.UUID, list[models.Deal]]
+
+
+def create_loaders(session: AsyncSession) -> CrmLoaders:
+    return CrmLoaders(
+        customer=DataLoader(_by_id(session, models.Customer)),
+        pipeline_stage=DataLoader(_by_id(session, models.PipelineStage)),
+        contacts_by_customer=DataLoader(_by_parent(session, models.Contact, models.Contact.customer_id)),
+        deals_by_customer=DataLoader(_by_parent(session, models.Deal, models.Deal.customer_id)),
+        deals_by_stage=DataLoader(_by_parent(session, models.Deal, models.Deal.stage_id)),
+    )
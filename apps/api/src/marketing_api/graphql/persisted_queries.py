@@ -0,0 +1,108 @@
+import hashlib
+from collections import OrderedDict
+from collections.abc import Iterator
+from dataclasses import dataclass
+
+from graphql import DocumentNode
+from graphql.error import GraphQLError
+from strawberry.extensions import SchemaExtension
+
+from marketing_api.metrics import register_cache
+from marketing_api.settings import settings
+
+
+@dataclass(frozen=True)
+class PersistedQuery:
+    query: str
+    document: DocumentNode
+
+
+class PersistedQueryCache:
+    """LRU of sha256(query) -> parsed document that already passed validation."""
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self._entries: OrderedDict[str, PersistedQuery] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, query_hash: str) -> PersistedQuery | None:
+        entry = self._entries.get(query_hash)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(query_hash)
+        return entry
+
+    def put(self, query_hash: str, entry: PersistedQuery) -> None:
+        self._entries[query_hash] = entry
+        self._entries.move_to_end(query_hash)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+persisted_queries = PersistedQueryCache(settings.graphql_persisted_query_cache_size)
+register_cache("graphql_persisted_query", lambda: (persisted_queries.hits, persisted_queries.misses))
+
+
+def hash_query(query: str) -> str:
+    return hashlib.sha256(query.encode("utf-8")).hexdigest()
+
+
+class PersistedQueries(SchemaExtension):
+    """Automatic persisted queries plus a parse/validate cache for repeated operations.
+
+    Clients may send ``extensions.persistedQuery.sha256Hash`` without a query
+    (Apollo APQ); unknown hashes get ``PersistedQueryNotFound`` so the client
+    retries with the full text. Every valid query is cached by hash, so
+    repeated operations skip both parsing and validation.
+    """
+
+    def on_operation(self) -> Iterator[None]:
+        execution_context = self.execution_context
+        self.query_hash: str | None = None
+        self.cached = False
+        requested_hash = (
+            (execution_context.operation_extensions or {}).get("persistedQuery", {}).get("sha256Hash")
+        )
+        query = execution_context.query
+
+        if query is None and requested_hash:
+            entry = persisted_queries.get(requested_hash)
+            if entry is None:
+                raise GraphQLError(
+                    "PersistedQueryNotFound", extensions={"code": "PERSISTED_QUERY_NOT_FOUND"}
+                )
+            execution_context.query = entry.query
+        elif query is not None:
+            self.query_hash = hash_query(query)
+            if requested_hash and requested_hash != self.query_hash:
+                raise GraphQLError(
+                    "provided sha does not match query", extensions={"code": "INVALID_PERSISTED_QUERY_HASH"}
+                )
+            entry = persisted_queries.get(self.query_hash)
+        else:
+            entry = None
+
+        if entry is not None:
+            self.cached = True
+            execution_context.graphql_document = entry.document
+            # Only validated documents are cached; skip validating it again.
+            execution_context.pre_execution_errors = []
+        yield
+
+    def on_validate(self) -> Iterator[None]:
+        yield
+        execution_context = self.execution_context
+        if self.cached or self.query_hash is None or execution_context.pre_execution_errors:
+            return
+        persisted_queries.put(
+            self.query_hash, PersistedQuery(execution_context.query, execution_context.graphql_document)
+        )
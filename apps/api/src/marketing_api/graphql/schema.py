@@ -3,20 +3,46 @@ import uuid
 import strawberry
 from strawberry.schema.config import StrawberryConfig
 from graphql.error import GraphQLError
-from sqlalchemy import select
+from sqlalchemy import or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from marketing_api.auth.principal import Principal
 from marketing_api.db import models
+from marketing_api.db.pagination import keyset_page
+from marketing_api.graphql.complexity import QueryComplexityLimiter
+from marketing_api.graphql.connections import (
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    Connection,
+    SortDirection,
+    paginate,
+    validate_page_size,
+)
 from marketing_api.graphql.inputs import (
+    ActivityFilter,
     ActivityInput,
+    ActivitySortField,
+    ContactFilter,
+    ContactSortField,
+    CustomerFilter,
     CustomerInput,
+    CustomerSortField,
+    DealFilter,
     DealInput,
+    DealSortField,
+    LeadFilter,
     LeadInput,
+    LeadSortField,
+    NoteFilter,
     NoteInput,
+    NoteSortField,
     PipelineStageInput,
+    PipelineStageSortField,
 )
+from marketing_api.graphql.persisted_queries import PersistedQueries
 from marketing_api.graphql.types import (
     ActivityType,
+    ContactType,
     CustomerType,
     DealType,
     LeadType,
@@ -24,6 +50,7 @@ from marketing_api.graphql.types import (
     PipelineStageType,
     ServiceSummary,
     to_activity_type,
+    to_contact_type,
     to_customer_type,
     to_deal_type,
     to_lead_type,
@@ -32,9 +59,24 @@ from marketing_api.graphql.types import (
 )
 
 
-async def list_entities(session: AsyncSession, model):
-    result = await session.execute(select(model))
-    return result.scalars().all()
+async def list_entities(
+    session: AsyncSession,
+    model,
+    *,
+    first: int = DEFAULT_PAGE_SIZE,
+    after: str | None = None,
+):
+    """One page of rows newest first, by keyset on (created_at, id).
+
+    ``after`` is the ``cursor`` of the last row of the previous page.
+    """
+    validate_page_size(first)
+    try:
+        query = keyset_page(select(model), model.created_at, model.id, cursor=after, limit=first)
+    except ValueError as exc:
+        raise GraphQLError("Invalid after.") from exc
+    result = await session.execute(query)
+    return result.scalars().all()[:first]
 
 
 def parse_uuid(value: str | None, field: str) -> uuid.UUID | None:
@@ -55,18 +97,121 @@ def parse_enum(enum_cls, value: str | None, field: str):
         raise GraphQLError(f"Invalid {field}.") from exc
 
 
-def require_user(info) -> None:
-    if not info.context.get("current_user"):
+async def require_user(info) -> Principal:
+    user = await info.context.get_current_user()
+    if not user:
         raise GraphQLError("Authentication required.")
+    return user
 
 
-def require_role(info, allowed_roles: set[str]) -> None:
-    user = info.context.get("current_user")
-    if not user:
-        raise GraphQLError("Authentication required.")
-    user_roles = {role.name for role in getattr(user, "roles", [])}
-    if not user_roles.intersection(allowed_roles):
+async def require_role(info, allowed_roles: set[str]) -> Principal:
+    user = await require_user(info)
+    if not user.has_any_role(allowed_roles):
         raise GraphQLError("Insufficient permissions.")
+    return user
+
+
+def filter_equal(query, column, value):
+    return query.where(column == value) if value is not None else query
+
+
+def filter_uuid(query, column, value: str | None, field: str):
+    return query.where(column == parse_uuid(value, field)) if value else query
+
+
+def filter_created(query, model, created_after, created_before):
+    if created_after:
+        query = query.where(model.created_at >= created_after)
+    if created_before:
+        query = query.where(model.created_at < created_before)
+    return query
+
+
+def filter_search(query, value: str | None, *columns):
+    if not value:
+        return query
+    pattern = f"%{value}%"
+    return query.where(or_(*(column.ilike(pattern) for column in columns)))
+
+
+def lead_query(where: LeadFilter | None):
+    model = models.Lead
+    query = select(model)
+    if where:
+        query = filter_equal(query, model.status, parse_enum(models.LeadStatus, where.status, "lead status"))
+        query = filter_equal(query, model.source, where.source)
+        query = filter_uuid(query, model.assigned_to_user_id, where.assigned_to_user_id, "assigned_to_user_id")
+        query = filter_uuid(query, model.customer_id, where.customer_id, "customer_id")
+        query = filter_created(query, model, where.created_after, where.created_before)
+        query = filter_search(query, where.search, model.full_name, model.email, model.company)
+    return query
+
+
+def customer_query(where: CustomerFilter | None):
+    model = models.Customer
+    query = select(model)
+    if where:
+        query = filter_equal(
+            query, model.status, parse_enum(models.CustomerStatus, where.status, "customer status")
+        )
+        query = filter_equal(query, model.industry, where.industry)
+        query = filter_uuid(query, model.owner_user_id, where.owner_user_id, "owner_user_id")
+        query = filter_created(query, model, where.created_after, where.created_before)
+        query = filter_search(query, where.search, model.name, model.website)
+    return query
+
+
+def contact_query(where: ContactFilter | None):
+    model = models.Contact
+    query = select(model)
+    if where:
+        query = filter_uuid(query, model.customer_id, where.customer_id, "customer_id")
+        query = filter_search(query, where.search, model.full_name, model.email)
+    return query
+
+
+def deal_query(where: DealFilter | None):
+    model = models.Deal
+    query = select(model)
+    if where:
+        query = filter_equal(query, model.status, parse_enum(models.DealStatus, where.status, "deal status"))
+        query = filter_uuid(query, model.customer_id, where.customer_id, "customer_id")
+        query = filter_uuid(query, model.stage_id, where.stage_id, "stage_id")
+        if where.close_date_from:
+            query = query.where(model.close_date >= where.close_date_from)
+        if where.close_date_to:
+            query = query.where(model.close_date <= where.close_date_to)
+    return query
+
+
+def activity_query(where: ActivityFilter | None):
+    model = models.Activity
+    query = select(model)
+    if where:
+        query = filter_equal(query, model.type, parse_enum(models.ActivityType, where.type, "activity type"))
+        query = filter_equal(
+            query, model.status, parse_enum(models.ActivityStatus, where.status, "activity status")
+        )
+        query = filter_uuid(query, model.assigned_to_user_id, where.assigned_to_user_id, "assigned_to_user_id")
+        query = filter_uuid(query, model.lead_id, where.lead_id, "lead_id")
+        query = filter_uuid(query, model.contact_id, where.contact_id, "contact_id")
+        query = filter_uuid(query, model.customer_id, where.customer_id, "customer_id")
+        query = filter_uuid(query, model.deal_id, where.deal_id, "deal_id")
+        if where.due_before:
+            query = query.where(model.due_at < where.due_before)
+    return query
+
+
+def note_query(where: NoteFilter | None):
+    model = models.Note
+    query = select(model)
+    if where:
+        query = filter_uuid(query, model.author_user_id, where.author_user_id, "author_user_id")
+        query = filter_uuid(query, model.lead_id, where.lead_id, "lead_id")
+        query = filter_uuid(query, model.contact_id, where.contact_id, "contact_id")
+        query = filter_uuid(query, model.customer_id, where.customer_id, "customer_id")
+        query = filter_uuid(query, model.deal_id, where.deal_id, "deal_id")
+    return query
 
 
 @strawberry.type
@@ -91,54 +236,218 @@ class Query:
         ]
 
     @strawberry.field
-    async def leads(self, info) -> list[LeadType]:
-        require_user(info)
-        session: AsyncSession = info.context["session"]
-        leads = await list_entities(session, models.Lead)
+    async def leads(
+        self, info, first: int = DEFAULT_PAGE_SIZE, after: str | None = None
+    ) -> list[LeadType]:
+        await require_user(info)
+        session: AsyncSession = info.context.session
+        leads = await list_entities(session, models.Lead, first=first, after=after)
         return [to_lead_type(lead) for lead in leads]
 
     @strawberry.field
-    async def customers(self, info) -> list[CustomerType]:
-        require_user(info)
-        session: AsyncSession = info.context["session"]
-        customers = await list_entities(session, models.Customer)
+    async def customers(
+        self, info, first: int = DEFAULT_PAGE_SIZE, after: str | None = None
+    ) -> list[CustomerType]:
+        await require_user(info)
+        session: AsyncSession = info.context.session
+        customers = await list_entities(session, models.Customer, first=first, after=after)
         return [to_customer_type(customer) for customer in customers]
 
     @strawberry.field
-    async def deals(self, info) -> list[DealType]:
-        require_user(info)
-        session: AsyncSession = info.context["session"]
-        deals = await list_entities(session, models.Deal)
+    async def deals(
+        self, info, first: int = DEFAULT_PAGE_SIZE, after: str | None = None
+    ) -> list[DealType]:
+        await require_user(info)
+        session: AsyncSession = info.context.session
+        deals = await list_entities(session, models.Deal, first=first, after=after)
         return [to_deal_type(deal) for deal in deals]
 
     @strawberry.field
-    async def activities(self, info) -> list[ActivityType]:
-        require_user(info)
-        session: AsyncSession = info.context["session"]
-        activities = await list_entities(session, models.Activity)
+    async def activities(
+        self, info, first: int = DEFAULT_PAGE_SIZE, after: str | None = None
+    ) -> list[ActivityType]:
+        await require_user(info)
+        session: AsyncSession = info.context.session
+        activities = await list_entities(session, models.Activity, first=first, after=after)
         return [to_activity_type(activity) for activity in activities]
 
     @strawberry.field
     async def pipeline_stages(self, info) -> list[PipelineStageType]:
-        require_user(info)
-        session: AsyncSession = info.context["session"]
-        stages = await list_entities(session, models.PipelineStage)
+        await require_user(info)
+        session: AsyncSession = info.context.session
+        # Stages are a short fixed list; one page holds them all.
+        stages = await list_entities(session, models.PipelineStage, first=MAX_PAGE_SIZE)
         return [to_pipeline_stage_type(stage) for stage in stages]
 
     @strawberry.field
-    async def notes(self, info) -> list[NoteType]:
-        require_user(info)
-        session: AsyncSession = info.context["session"]
-        notes = await list_entities(session, models.Note)
+    async def notes(
+        self, info, first: int = DEFAULT_PAGE_SIZE, after: str | None = None
+    ) -> list[NoteType]:
+        await require_user(info)
+        session: AsyncSession = info.context.session
+        notes = await list_entities(session, models.Note, first=first, after=after)
         return [to_note_type(note) for note in notes]
 
+    @strawberry.field
+    async def leads_connection(
+        self,
+        info,
+        first: int = DEFAULT_PAGE_SIZE,
+        after: str | None = None,
+        where: LeadFilter | None = None,
+        order_by: LeadSortField = LeadSortField.created_at,
+        direction: SortDirection = SortDirection.DESC,
+    ) -> Connection[LeadType]:
+        await require_user(info)
+        return await paginate(
+            info.context.session,
+            lead_query(where),
+            models.Lead,
+            sort_attr=order_by.value,
+            first=first,
+            after=after,
+            direction=direction,
+            to_node=to_lead_type,
+        )
+
+    @strawberry.field
+    async def customers_connection(
+        self,
+        info,
+        first: int = DEFAULT_PAGE_SIZE,
+        after: str | None = None,
+        where: CustomerFilter | None = None,
+        order_by: CustomerSortField = CustomerSortField.created_at,
+        direction: SortDirection = SortDirection.DESC,
+    ) -> Connection[CustomerType]:
+        await require_user(info)
+        return await paginate(
+            info.context.session,
+            customer_query(where),
+            models.Customer,
+            sort_attr=order_by.value,
+            first=first,
+            after=after,
+            direction=direction,
+            to_node=to_customer_type,
+        )
+
+    @strawberry.field
+    async def contacts_connection(
+        self,
+        info,
+        first: int = DEFAULT_PAGE_SIZE,
+        after: str | None = None,
+        where: ContactFilter | None = None,
+        order_by: ContactSortField = ContactSortField.created_at,
+        direction: SortDirection = SortDirection.DESC,
+    ) -> Connection[ContactType]:
+        await require_user(info)
+        return await paginate(
+            info.context.session,
+            contact_query(where),
+            models.Contact,
+            sort_attr=order_by.value,
+            first=first,
+            after=after,
+            direction=direction,
+            to_node=to_contact_type,
+        )
+
+    @strawberry.field
+    async def deals_connection(
+        self,
+        info,
+        first: int = DEFAULT_PAGE_SIZE,
+        after: str | None = None,
+        where: DealFilter | None = None,
+        order_by: DealSortField = DealSortField.created_at,
+        direction: SortDirection = SortDirection.DESC,
+    ) -> Connection[DealType]:
+        await require_user(info)
+        return await paginate(
+            info.context.session,
+            deal_query(where),
+            models.Deal,
+            sort_attr=order_by.value,
+            first=first,
+            after=after,
+            direction=direction,
+            to_node=to_deal_type,
+        )
+
+    @strawberry.field
+    async def activities_connection(
+        self,
+        info,
+        first: int = DEFAULT_PAGE_SIZE,
+        after: str | None = None,
+        where: ActivityFilter | None = None,
+        order_by: ActivitySortField = ActivitySortField.created_at,
+        direction: SortDirection = SortDirection.DESC,
+    ) -> Connection[ActivityType]:
+        await require_user(info)
+        return await paginate(
+            info.context.session,
+            activity_query(where),
+            models.Activity,
+            sort_attr=order_by.value,
+            first=first,
+            after=after,
+            direction=direction,
+            to_node=to_activity_type,
+        )
+
+    @strawberry.field
+    async def notes_connection(
+        self,
+        info,
+        first: int = DEFAULT_PAGE_SIZE,
+        after: str | None = None,
+        where: NoteFilter | None = None,
+        order_by: NoteSortField = NoteSortField.created_at,
+        direction: SortDirection = SortDirection.DESC,
+    ) -> Connection[NoteType]:
+        await require_user(info)
+        return await paginate(
+            info.context.session,
+            note_query(where),
+            models.Note,
+            sort_attr=order_by.value,
+            first=first,
+            after=after,
+            direction=direction,
+            to_node=to_note_type,
+        )
+
+    @strawberry.field
+    async def pipeline_stages_connection(
+        self,
+        info,
+        first: int = DEFAULT_PAGE_SIZE,
+        after: str | None = None,
+        order_by: PipelineStageSortField = PipelineStageSortField.order,
+        direction: SortDirection = SortDirection.ASC,
+    ) -> Connection[PipelineStageType]:
+        await require_user(info)
+        return await paginate(
+            info.context.session,
+            select(models.PipelineStage),
+            models.PipelineStage,
+            sort_attr=order_by.value,
+            first=first,
+            after=after,
+            direction=direction,
+            to_node=to_pipeline_stage_type,
+        )
+
 
 @strawberry.type
 class Mutation:
     @strawberry.mutation
     async def create_lead(self, info, payload: LeadInput) -> LeadType:
-        require_user(info)
-        session: AsyncSession = info.context["session"]
+        await require_user(info)
+        session: AsyncSession = info.context.session
         lead = models.Lead(
             full_name=payload.full_name,
             email=payload.email,
@@ -160,8 +469,8 @@ class Mutation:
 
     @strawberry.mutation
     async def create_customer(self, info, payload: CustomerInput) -> CustomerType:
-        require_user(info)
-        session: AsyncSession = info.context["session"]
+        await require_user(info)
+        session: AsyncSession = info.context.session
         customer = models.Customer(
             name=payload.name,
             industry=payload.industry,
@@ -179,8 +488,8 @@ class Mutation:
 
     @strawberry.mutation
     async def create_deal(self, info, payload: DealInput) -> DealType:
-        require_user(info)
-        session: AsyncSession = info.context["session"]
+        await require_user(info)
+        session: AsyncSession = info.context.session
         deal = models.Deal(
             name=payload.name,
             customer_id=parse_uuid(payload.customer_id, "customer_id"),
@@ -197,8 +506,8 @@ class Mutation:
 
     @strawberry.mutation
     async def create_activity(self, info, payload: ActivityInput) -> ActivityType:
-        require_user(info)
-        session: AsyncSession = info.context["session"]
+        await require_user(info)
+        session: AsyncSession = info.context.session
         activity = models.Activity(
             type=parse_enum(models.ActivityType, payload.type, "activity type"),
             status=(
@@ -220,8 +529,8 @@ class Mutation:
 
     @strawberry.mutation
     async def create_note(self, info, payload: NoteInput) -> NoteType:
-        require_user(info)
-        session: AsyncSession = info.context["session"]
+        await require_user(info)
+        session: AsyncSession = info.context.session
         note = models.Note(
             body=payload.body,
             author_user_id=parse_uuid(payload.author_user_id, "author_user_id"),
@@ -237,8 +546,8 @@ class Mutation:
 
     @strawberry.mutation
     async def create_pipeline_stage(self, info, payload: PipelineStageInput) -> PipelineStageType:
-        require_role(info, {"admin", "manager"})
-        session: AsyncSession = info.context["session"]
+        await require_role(info, {"admin", "manager"})
+        session: AsyncSession = info.context.session
         stage = models.PipelineStage(
             name=payload.name,
             order=payload.order,
@@ -254,4 +563,5 @@ schema = strawberry.Schema(
     query=Query,
     mutation=Mutation,
     config=StrawberryConfig(auto_camel_case=False),
+    extensions=[PersistedQueries, QueryComplexityLimiter],
 )
@@ -1,8 +1,15 @@
 import datetime as dt
+import uuid
 
 import strawberry
 
 from marketing_api.db import models
+from marketing_api.db.pagination import encode_cursor
+from marketing_api.graphql.loaders import CrmLoaders
+
+
+def get_loaders(info: strawberry.Info) -> CrmLoaders:
+    return info.context.loaders
 
 
 @strawberry.type
@@ -29,6 +36,36 @@ class CustomerType:
     status: str
     owner_user_id: strawberry.ID | None = strawberry.field(name="owner_user_id")
     created_at: dt.datetime
+    # Pass as ``after`` to the list query to fetch the rows after this one.
+    cursor: str
+
+    @strawberry.field
+    async def contacts(self, info: strawberry.Info) -> list["ContactType"]:
+        rows = await get_loaders(info).contacts_by_customer.load(uuid.UUID(self.id))
+        return [to_contact_type(row) for row in rows]
+
+    @strawberry.field
+    async def deals(self, info: strawberry.Info) -> list["DealType"]:
+        rows = await get_loaders(info).deals_by_customer.load(uuid.UUID(self.id))
+        return [to_deal_type(row) for row in rows]
+
+
+@strawberry.type(name="ContactType")
+class ContactType:
+    id: strawberry.ID
+    customer_id: strawberry.ID | None = strawberry.field(name="customer_id")
+    full_name: str = strawberry.field(name="full_name")
+    email: str | None
+    phone: str | None
+    title: str | None
+    created_at: dt.datetime
+
+    @strawberry.field
+    async def customer(self, info: strawberry.Info) -> CustomerType | None:
+        if not self.customer_id:
+            return None
+        row = await get_loaders(info).customer.load(uuid.UUID(self.customer_id))
+        return to_customer_type(row) if row else None
 
 
 @strawberry.type(name="LeadType")
@@ -46,6 +83,15 @@ class LeadType:
     assigned_to_user_id: strawberry.ID | None = strawberry.field(name="assigned_to_user_id")
     customer_id: strawberry.ID | None = strawberry.field(name="customer_id")
     created_at: dt.datetime
+    # Pass as ``after`` to the list query to fetch the rows after this one.
+    cursor: str
+
+    @strawberry.field
+    async def customer(self, info: strawberry.Info) -> CustomerType | None:
+        if not self.customer_id:
+            return None
+        row = await get_loaders(info).customer.load(uuid.UUID(self.customer_id))
+        return to_customer_type(row) if row else None
 
 
 @strawberry.type
@@ -55,6 +101,11 @@ class PipelineStageType:
     order: int
     probability: int
 
+    @strawberry.field
+    async def deals(self, info: strawberry.Info) -> list["DealType"]:
+        rows = await get_loaders(info).deals_by_stage.load(uuid.UUID(self.id))
+        return [to_deal_type(row) for row in rows]
+
 
 @strawberry.type(name="DealType")
 class DealType:
@@ -65,6 +116,20 @@ class DealType:
     value: int | None
     close_date: dt.date | None = strawberry.field(name="close_date")
     status: str
+    # Pass as ``after`` to the list query to fetch the rows after this one.
+    cursor: str
+
+    @strawberry.field
+    async def customer(self, info: strawberry.Info) -> CustomerType | None:
+        row = await get_loaders(info).customer.load(uuid.UUID(self.customer_id))
+        return to_customer_type(row) if row else None
+
+    @strawberry.field
+    async def stage(self, info: strawberry.Info) -> PipelineStageType | None:
+        if not self.stage_id:
+            return None
+        row = await get_loaders(info).pipeline_stage.load(uuid.UUID(self.stage_id))
+        return to_pipeline_stage_type(row) if row else None
 
 
 @strawberry.type(name="ActivityType")
@@ -79,6 +144,8 @@ class ActivityType:
     contact_id: strawberry.ID | None = strawberry.field(name="contact_id")
     customer_id: strawberry.ID | None = strawberry.field(name="customer_id")
     deal_id: strawberry.ID | None = strawberry.field(name="deal_id")
+    # Pass as ``after`` to the list query to fetch the rows after this one.
+    cursor: str
 
 
 @strawberry.type(name="NoteType")
@@ -91,6 +158,8 @@ class NoteType:
     customer_id: strawberry.ID | None = strawberry.field(name="customer_id")
     deal_id: strawberry.ID | None = strawberry.field(name="deal_id")
     created_at: dt.datetime
+    # Pass as ``after`` to the list query to fetch the rows after this one.
+    cursor: str
 
 
 def to_customer_type(customer: models.Customer) -> CustomerType:
@@ -102,6 +171,19 @@ def to_customer_type(customer: models.Customer) -> CustomerType:
         status=customer.status.value,
         owner_user_id=str(customer.owner_user_id) if customer.owner_user_id else None,
         created_at=customer.created_at,
+        cursor=encode_cursor(customer.created_at, customer.id),
+    )
+
+
+def to_contact_type(contact: models.Contact) -> ContactType:
+    return ContactType(
+        id=str(contact.id),
+        customer_id=str(contact.customer_id) if contact.customer_id else None,
+        full_name=contact.full_name,
+        email=contact.email,
+        phone=contact.phone,
+        title=contact.title,
+        created_at=contact.created_at,
     )
 
 
@@ -120,6 +202,7 @@ def to_lead_type(lead: models.Lead) -> LeadType:
         assigned_to_user_id=str(lead.assigned_to_user_id) if lead.assigned_to_user_id else None,
         customer_id=str(lead.customer_id) if lead.customer_id else None,
         created_at=lead.created_at,
+        cursor=encode_cursor(lead.created_at, lead.id),
     )
 
 
@@ -141,6 +224,7 @@ def to_deal_type(deal: models.Deal) -> DealType:
         value=deal.value,
         close_date=deal.close_date,
         status=deal.status.value,
+        cursor=encode_cursor(deal.created_at, deal.id),
     )
 
 
@@ -156,6 +240,7 @@ def to_activity_type(activity: models.Activity) -> ActivityType:
         contact_id=str(activity.contact_id) if activity.contact_id else None,
         customer_id=str(activity.customer_id) if activity.customer_id else None,
         deal_id=str(activity.deal_id) if activity.deal_id else None,
+        cursor=encode_cursor(activity.created_at, activity.id),
     )
 
 
@@ -169,4 +254,5 @@ def to_note_type(note: models.Note) -> NoteType:
         customer_id=str(note.customer_id) if note.customer_id else None,
         deal_id=str(note.deal_id) if note.deal_id else None,
         created_at=note.created_at,
+        cursor=encode_cursor(note.created_at, note.id),
     )
@@ -1,4 +1,158 @@
+import ipaddress
+import time
+from dataclasses import dataclass
+
+from limits import RateLimitItem
+from limits.strategies import FixedWindowRateLimiter, RateLimiter, SlidingWindowCounterRateLimiter
 from slowapi import Limiter
-from slowapi.util import get_remote_address
+from starlette.requests import Request
+
+from marketing_api.settings import settings
+
+# Limits of at least LEASE_MIN_AMOUNT per window are served from local leases of
+# up to amount // LEASE_DIVISOR tokens, each valid for window // LEASE_DIVISOR.
+LEASE_MIN_AMOUNT = 60
+LEASE_DIVISOR = 10
+MAX_LEASES = 10_000
+
+
+def parse_networks(value: str) -> list[ipaddress.IPv4Network | ipaddress.IPv6Network]:
+    return [ipaddress.ip_network(item.strip(), strict=False) for item in value.split(",") if item.strip()]
+
+
+TRUSTED_PROXIES = parse_networks(settings.rate_limit_trusted_proxies)
+
+
+def is_trusted_proxy(address: str) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in TRUSTED_PROXIES)
+
+
+def client_ip(request: Request) -> str:
+    """Client address, following X-Forwarded-For only through trusted proxies.
+
+    Walks the forwarded chain from the right and returns the first hop that is
+    not a trusted proxy, so clients cannot spoof their address by sending
+    their own X-Forwarded-For header.
+    """
+    peer = request.client.host if request.client else "127.0.0.1"
+    if not is_trusted_proxy(peer):
+        return peer
+    forwarded = request.headers.get("x-forwarded-for", "")
+    hops = [hop.strip() for hop in forwarded.split(",") if hop.strip()]
+    for hop in reversed(hops):
+        if not is_trusted_proxy(hop):
+            return hop
+    return hops[0] if hops else peer
+
+
+@dataclass
+class Lease:
+    size: int
+    tokens: int
+    expires_at: float
+    window: int  # storage window the tokens were taken from
+
+
+class LeasedRateLimiter(RateLimiter):
+    """Wrap a shared-storage strategy with per-process token leases.
+
+    High-volume limits reserve a batch of tokens from storage in one hit and
+    spend them locally, so most allowed requests skip the Redis round trip.
+    Leases are sized from the previous lease's use, and unspent tokens are
+    given back when a lease runs out of time, so idle reservations in one
+    process do not crowd out another. Whenever a lease cannot be taken (near
+    the limit) each request goes to shared storage, exactly as without leases;
+    nothing is ever refused locally.
+    """
+
+    def __init__(self, backend: RateLimiter) -> None:
+        super().__init__(backend.storage)
+        self.backend = backend
+        self._leases: dict[str, Lease] = {}
+        # Refunds are negative hits, which only counter strategies support.
+        self._refundable = isinstance(backend, (FixedWindowRateLimiter, SlidingWindowCounterRateLimiter))
+
+    def lease_size(self, item: RateLimitItem) -> int:
+        if item.amount < LEASE_MIN_AMOUNT or not self._refundable:
+            return 1
+        return item.amount // LEASE_DIVISOR
+
+    def hit(self, item: RateLimitItem, *identifiers: str, cost: int = 1) -> bool:
+        max_size = self.lease_size(item)
+        if max_size <= 1 or cost != 1:
+            return self.backend.hit(item, *identifiers, cost=cost)
+
+        key = item.key_for(*identifiers)
+        now = time.monotonic()
+        lease = self._leases.pop(key, None)
+        size = max_size
+        if lease is not None:
+            if lease.expires_at > now and lease.tokens > 0:
+                lease.tokens -= 1
+                self._leases[key] = lease
+                return True
+            if lease.tokens:
+                self._refund(item, identifiers, lease)
+            # Twice what the last lease used, so a steady rate keeps little in reserve.
+            size = min(max_size, max(2, 2 * (lease.size - lease.tokens)))
+
+        if len(self._leases) >= MAX_LEASES:
+            self._prune(now)
+        if self.backend.hit(item, *identifiers, cost=size):
+            self._leases[key] = Lease(
+                size=size,
+                tokens=size - 1,
+                expires_at=now + item.get_expiry() / LEASE_DIVISOR,
+                window=self._window(item),
+            )
+            return True
+        # Not enough room for a lease; near the limit every request asks storage.
+        return self.backend.hit(item, *identifiers, cost=1)
+
+    def _window(self, item: RateLimitItem) -> int:
+        return int(time.time() // item.get_expiry())
+
+    def _refund(self, item: RateLimitItem, identifiers: tuple[str, ...], lease: Lease) -> None:
+        # Only the window the tokens were counted in can take them back. Redis
+        # rolls its windows from the first hit rather than the clock, so a
+        # refund there can at worst credit one lease to the next window.
+        if lease.window == self._window(item):
+            self.backend.hit(item, *identifiers, cost=-lease.tokens)
+
+    def test(self, item: RateLimitItem, *identifiers: str, cost: int = 1) -> bool:
+        return self.backend.test(item, *identifiers, cost=cost)
+
+    def get_window_stats(self, item: RateLimitItem, *identifiers: str):
+        return self.backend.get_window_stats(item, *identifiers)
+
+    def clear(self, item: RateLimitItem, *identifiers: str) -> None:
+        self._leases.pop(item.key_for(*identifiers), None)
+        self.backend.clear(item, *identifiers)
+
+    def _prune(self, now: float) -> None:
+        expired = [key for key, lease in self._leases.items() if lease.expires_at <= now]
+        for key in expired:
+            del self._leases[key]
+        if len(self._leases) >= MAX_LEASES:
+            self._leases.clear()
+
+
+class SharedLimiter(Limiter):
+    """slowapi Limiter whose primary strategy spends locally leased tokens."""
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._limiter = LeasedRateLimiter(self._limiter)
+
 
-limiter = Limiter(key_func=get_remote_address)
+limiter = SharedLimiter(
+    key_func=client_ip,
+    storage_uri=settings.rate_limit_storage_url or settings.celery_broker_url,
+    strategy="sliding-window-counter",
+    # Keep limiting per process if Redis is unreachable rather than failing requests.
+    in_memory_fallback_enabled=True,
+)
@@ -0,0 +1,193 @@
+"""Shared gateway to the OpenAI chat completions API.
+
+One ``AsyncOpenAI`` client, and so one httpx connection pool, serves every
+caller instead of a new client (and TLS handshake) per request. Each call
+gets the configured timeout and retry policy unless it overrides them, and
+the prompt and completion tokens it used are counted per feature in
+``llm_tokens_total``. ``stream`` yields text as it is generated so routes
+can forward it to the browser without waiting for the whole completion.
+"""
+
+import asyncio
+import logging
+import time
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+from typing import Any
+
+import httpx
+from openai import AsyncOpenAI
+
+from marketing_api.metrics import observe_outbound, registry
+from marketing_api.settings import settings
+
+logger = logging.getLogger(__name__)
+
+llm_tokens = registry.counter(
+    "llm_tokens",
+    "Tokens used in OpenAI chat completions.",
+    ("feature", "kind"),
+)
+llm_time_to_first_token = registry.histogram(
+    "llm_time_to_first_token_seconds",
+    "Time from sending a streamed completion request to its first token.",
+    ("feature",),
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+
+
+@dataclass(frozen=True)
+class Completion:
+    text: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+
+class LLMGateway:
+    def __init__(
+        self,
+        *,
+        api_key: str | None,
+        base_url: str | None = None,
+        model: str = "gpt-3.5-turbo",
+        timeout: float = 30.0,
+        max_retries: int = 2,
+        max_connections: int = 20,
+    ) -> None:
+        self.api_key = api_key
+        self.base_url = base_url or None
+        self.model = model
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.max_connections = max_connections
+        self._client: AsyncOpenAI | None = None
+        self._client_loop: asyncio.AbstractEventLoop | None = None
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.api_key)
+
+    def _get_client(self, timeout: float | None, max_retries: int | None) -> AsyncOpenAI:
+        # Pooled connections belong to the loop that opened them; the test
+        # suite runs each case on a fresh loop.
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop:
+            self._client = AsyncOpenAI(
+                api_key=self.api_key,
+                base_url=self.base_url,
+                timeout=self.timeout,
+                max_retries=self.max_retries,
+                http_client=httpx.AsyncClient(
+                    limits=httpx.Limits(
+                        max_connections=self.max_connections,
+                        max_keepalive_connections=self.max_connections,
+                    ),
+                ),
+            )
+            self._client_loop = loop
+        if timeout is None and max_retries is None:
+            return self._client
+        return self._client.with_options(
+            timeout=self.timeout if timeout is None else timeout,
+            max_retries=self.max_retries if max_retries is None else max_retries,
+        )
+
+    def _account(self, feature: str, usage: Any) -> tuple[int, int]:
+        if usage is None:
+            return 0, 0
+        llm_tokens.inc(usage.prompt_tokens, feature=feature, kind="prompt")
+        llm_tokens.inc(usage.completion_tokens, feature=feature, kind="completion")
+        return usage.prompt_tokens, usage.completion_tokens
+
+    async def complete(
+        self,
+        messages: list[dict[str, str]],
+        *,
+        feature: str,
+        max_tokens: int,
+        temperature: float = 0.7,
+        timeout: float | None = None,
+        max_retries: int | None = None,
+    ) -> Completion:
+        client = self._get_client(timeout, max_retries)
+        with observe_outbound("openai"):
+            response = await client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                max_tokens=max_tokens,
+                temperature=temperature,
+            )
+        prompt_tokens, completion_tokens = self._account(feature, response.usage)
+        return Completion(response.choices[0].message.content or "", prompt_tokens, completion_tokens)
+
+    async def stream(
+        self,
+        messages: list[dict[str, str]],
+        *,
+        feature: str,
+        max_tokens: int,
+        temperature: float = 0.7,
+        timeout: float | None = None,
+        max_retries: int | None = None,
+    ) -> AsyncIterator[str]:
+        """Yield the completion's text as it arrives.
+
+        Retries only cover opening the stream; a failure partway through is
+        raised to the caller, which has already forwarded the earlier text.
+        """
+        client = self._get_client(timeout, max_retries)
+        started = time.perf_counter()
+        first = True
+        with observe_outbound("openai"):
+            chunks = await client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                stream=True,
+                stream_options={"include_usage": True},
+            )
+            try:
+                async for chunk in chunks:
+                    # The last chunk carries the usage and no choices.
+                    self._account(feature, chunk.usage)
+                    if not chunk.choices or not chunk.choices[0].delta.content:
+                        continue
+                    if first:
+                        llm_time_to_first_token.observe(time.perf_counter() - started, feature=feature)
+                        first = False
+                    yield chunk.choices[0].delta.content
+            finally:
+                await chunks.close()
+
+    async def embed(
+        self,
+        texts: list[str],
+        *,
+        feature: str,
+        model: str = "text-embedding-3-small",
+        timeout: float | None = None,
+        max_retries: int | None = None,
+    ) -> list[list[float]]:
+        client = self._get_client(timeout, max_retries)
+        with observe_outbound("openai"):
+            response = await client.embeddings.create(model=model, input=texts)
+        if response.usage is not None:
+            llm_tokens.inc(response.usage.prompt_tokens, feature=feature, kind="prompt")
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+    async def aclose(self) -> None:
+        if self._client is not None and self._client_loop is asyncio.get_running_loop():
+            await self._client.close()
+        self._client = None
+        self._client_loop = None
+
+
+llm_gateway = LLMGateway(
+    api_key=settings.openai_api_key,
+    base_url=settings.openai_base_url,
+    model=settings.openai_model,
+    timeout=settings.openai_timeout_seconds,
+    max_retries=settings.openai_max_retries,
+    max_connections=settings.openai_max_connections,
+)
@@ -1,18 +1,30 @@
 import logging
 
-from fastapi import FastAPI, Request
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
 from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
+from sqlalchemy.ext.asyncio import AsyncSession
 from strawberry.fastapi import GraphQLRouter
 
 from marketing_api.auth.bootstrap import ensure_admin_user
-from marketing_api.auth.dependencies import extract_bearer_token, resolve_user_from_token
+from marketing_api.graphql.context import GraphQLContext
 from marketing_api.graphql.schema import schema
 from marketing_api.limits import limiter
 from marketing_api.middleware.posthog import PostHogMiddleware
 from marketing_api.middleware.alerts import ErrorAlertMiddleware
+from marketing_api.middleware.metrics import MetricsMiddleware
+from marketing_api.middleware.query_profiler import QueryProfilerMiddleware
+from marketing_api.metrics import instrument_stripe, loop_lag_monitor, register_pool
+from marketing_api.chat_transcripts import transcript_store
+from marketing_api.experiments.assignment import assignment_recorder
+from marketing_api.experiments.conversions import conversion_buffer
+from marketing_api.llm import llm_gateway
+from marketing_api.notifications.alerts import alert_aggregator
+from marketing_api.posthog_client import start_event_pipeline, stop_event_pipeline
+from marketing_api.watchdog import loop_watchdog
+from marketing_api.routes.ab_testing import router as ab_testing_router
 from marketing_api.routes.admin_dashboard import router as admin_dashboard_router
 from marketing_api.routes.auth import router as auth_router
 from marketing_api.routes.backlink_analyzer import router as backlink_analyzer_router
@@ -27,11 +39,12 @@ from marketing_api.routes.health import router as health_router
 from marketing_api.routes.intelligence import router as intelligence_router
 from marketing_api.routes.keyword_research import router as keyword_research_router
 from marketing_api.routes.lead_potential import router as lead_potential_router
+from marketing_api.routes.metrics import router as metrics_router
 from marketing_api.routes.public import router as public_router
 from marketing_api.routes.readiness import router as readiness_router
 from marketing_api.routes.seo import router as seo_router
 from marketing_api.routes.webhooks import router as webhooks_router
-from marketing_api.db.session import get_session
+from marketing_api.db.session import SessionLocal, engine, get_session
 from marketing_api.settings import settings
 
 logger = logging.getLogger(__name__)
@@ -57,6 +70,8 @@ def create_app() -> FastAPI:
         openapi_url=None if docs_disabled else "/openapi.json",
     )
     app.state.limiter = limiter
+    register_pool(engine)
+    instrument_stripe()
     app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
     
     # GZip compression
@@ -68,6 +83,13 @@ def create_app() -> FastAPI:
     # PostHog middleware for error tracking and performance monitoring
     app.add_middleware(PostHogMiddleware)
     
+    # Request latency per route template for /metrics
+    app.add_middleware(MetricsMiddleware)
+
+    # Per-request SQL statement counts, DB time and N+1 warnings
+    if settings.sql_profiling_enabled:
+        app.add_middleware(QueryProfilerMiddleware)
+
     app.add_middleware(
         CORSMiddleware,
         allow_origins=build_cors_origins(),
@@ -76,15 +98,13 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
     )
 
-    async def get_context(request: Request):
-        async for session in get_session():
-            token = extract_bearer_token(request)
-            user = await resolve_user_from_token(session, token)
-            return {"session": session, "current_user": user}
+    async def get_context(session: AsyncSession = Depends(get_session)) -> GraphQLContext:
+        return GraphQLContext(session)
 
     graphql_app = GraphQLRouter(schema, context_getter=get_context)
 
     app.include_router(health_router)
+    app.include_router(metrics_router)
     app.include_router(admin_dashboard_router)
     app.include_router(auth_router)
     app.include_router(public_router)
@@ -115,6 +135,59 @@ def create_app() -> FastAPI:
             )
             break
 
+    @app.on_event("startup")
+    async def start_analytics() -> None:
+        await start_event_pipeline()
+
+    @app.on_event("shutdown")
+    async def stop_analytics() -> None:
+        await stop_event_pipeline()
+
+    @app.on_event("startup")
+    async def start_assignment_recorder() -> None:
+        await assignment_recorder.start(SessionLocal)
+
+    @app.on_event("shutdown")
+    async def stop_assignment_recorder() -> None:
+        await assignment_recorder.stop()
+
+    @app.on_event("startup")
+    async def start_conversion_buffer() -> None:
+        await conversion_buffer.start(SessionLocal)
+
+    @app.on_event("shutdown")
+    async def stop_conversion_buffer() -> None:
+        await conversion_buffer.stop()
+
+    @app.on_event("shutdown")
+    async def close_llm_gateway() -> None:
+        await llm_gateway.aclose()
+
+    @app.on_event("shutdown")
+    async def close_transcript_store() -> None:
+        await transcript_store.aclose()
+
+    @app.on_event("shutdown")
+    async def flush_alerts() -> None:
+        await alert_aggregator.flush()
+
+    @app.on_event("startup")
+    async def start_loop_lag_monitor() -> None:
+        await loop_lag_monitor.start()
+
+    @app.on_event("shutdown")
+    async def stop_loop_lag_monitor() -> None:
+        await loop_lag_monitor.stop()
+
+    @app.on_event("startup")
+    async def start_loop_watchdog() -> None:
+        if settings.loop_stall_threshold_seconds > 0:
+            await loop_watchdog.start()
+
+    @app.on_event("shutdown")
+    async def stop_loop_watchdog() -> None:
+        await loop_watchdog.stop()
+
     return app
 
 
@@ -0,0 +1,442 @@
+"""In-process metrics rendered in the Prometheus text exposition format.
+
+Metrics live in a module-level ``registry`` and are rendered by ``/metrics``.
+Values computed from other state (pool sizes, cache counters) are registered
+as collector callbacks and read only at scrape time, so nothing here costs
+more than a dict update on the request path.
+"""
+
+import asyncio
+import logging
+import math
+import threading
+import time
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager
+from typing import TypeVar
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelValues = tuple[str, ...]
+Sample = tuple[str, dict[str, str], float]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key: LabelValues) -> dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+    def samples(self) -> Iterator[Sample]:
+        raise NotImplementedError
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for name, labels, value in self.samples():
+            if labels:
+                rendered = ",".join(f'{key}="{_escape(val)}"' for key, val in labels.items())
+                lines.append(f"{name}{{{rendered}}} {_format_value(value)}")
+            else:
+                lines.append(f"{name} {_format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> Iterator[Sample]:
+        for key, value in list(self._values.items()):
+            yield f"{self.name}_total", self._labels(key), value
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[LabelValues, float] = {}
+
+    def set(self, value: float, **labels: str) -> None:
+        self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> Iterator[Sample]:
+        for key, value in list(self._values.items()):
+            yield self.name, self._labels(key), value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._series: dict[LabelValues, tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = ([0] * len(self.buckets), [0.0])
+            counts, total = series
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            total[0] += value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels: str) -> int:
+        series = self._series.get(self._key(labels))
+        return sum(series[0]) if series else 0
+
+    def samples(self) -> Iterator[Sample]:
+        for key, (counts, total) in list(self._series.items()):
+            labels = self._labels(key)
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                yield f"{self.name}_bucket", {**labels, "le": _format_value(bound)}, cumulative
+            yield f"{self.name}_count", labels, cumulative
+            yield f"{self.name}_sum", labels, total[0]
+
+
+class CollectedMetric(Metric):
+    """A gauge or counter whose samples are produced by a callback at scrape time."""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str],
+        collect: Callable[[], dict[LabelValues, float]],
+        kind: str = "gauge",
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.kind = kind
+        self.collect = collect
+
+    def samples(self) -> Iterator[Sample]:
+        name = f"{self.name}_total" if self.kind == "counter" else self.name
+        try:
+            values = self.collect()
+        except Exception:
+            logger.exception("Metric collector %s failed", self.name)
+            return
+        for key, value in values.items():
+            yield name, self._labels(key), value
+
+
+MetricT = TypeVar("MetricT", bound=Metric)
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: dict[str, Metric] = {}
+
+    def register(self, metric: MetricT) -> MetricT:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def collected(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str],
+        collect: Callable[[], dict[LabelValues, float]],
+        kind: str = "gauge",
+    ) -> CollectedMetric:
+        return self.register(CollectedMetric(name, documentation, labelnames, collect, kind))
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template.",
+    ("method", "route", "status"),
+)
+http_requests_in_progress = registry.gauge(
+    "http_requests_in_progress",
+    "HTTP requests currently being served.",
+)
+outbound_request_duration = registry.histogram(
+    "outbound_request_duration_seconds",
+    "Latency of calls to third-party services.",
+    ("service", "outcome"),
+)
+celery_queue_length = registry.gauge(
+    "celery_queue_length",
+    "Messages waiting in a Celery broker queue.",
+    ("queue",),
+)
+event_loop_lag = registry.histogram(
+    "event_loop_lag_seconds",
+    "How late the event loop ran a scheduled callback.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+event_loop_lag_last = registry.gauge(
+    "event_loop_lag_last_seconds",
+    "Most recent event loop lag sample.",
+)
+
+
+@contextmanager
+def observe_outbound(service: str) -> Iterator[None]:
+    """Time a call to a third-party service; works around sync and awaited calls."""
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        outbound_request_duration.observe(time.perf_counter() - started, service=service, outcome=outcome)
+
+
+caches: dict[str, Callable[[], tuple[int, int]]] = {}
+
+
+def register_cache(name: str, stats: Callable[[], tuple[int, int]]) -> None:
+    """Expose a cache's (hits, misses) counters as ``cache_requests_total``."""
+    caches[name] = stats
+
+
+def _collect_caches() -> dict[LabelValues, float]:
+    values: dict[LabelValues, float] = {}
+    for name, stats in caches.items():
+        hits, misses = stats()
+        values[(name, "hit")] = hits
+        values[(name, "miss")] = misses
+    return values
+
+
+registry.collected(
+    "cache_requests",
+    "Cache lookups by result.",
+    ("cache", "result"),
+    _collect_caches,
+    kind="counter",
+)
+
+
+def register_pool(engine) -> None:
+    """Expose SQLAlchemy connection pool occupancy as ``db_pool_connections``."""
+    pool = engine.sync_engine.pool
+
+    def collect() -> dict[LabelValues, float]:
+        values: dict[LabelValues, float] = {}
+        for state, method in (
+            ("size", "size"),
+            ("checked_in", "checkedin"),
+            ("checked_out", "checkedout"),
+            ("overflow", "overflow"),
+        ):
+            reader = getattr(pool, method, None)
+            if callable(reader):
+                values[(state,)] = reader()
+        return values
+
+    registry.collected("db_pool_connections", "Database connection pool occupancy.", ("state",), collect)
+
+
+class InstrumentedStripeClient:
+    """Wraps the Stripe SDK's HTTP client to time every API call."""
+
+    def __init__(self, client) -> None:
+        self._client = client
+
+    def __getattr__(self, name: str):
+        return getattr(self._client, name)
+
+    def request_with_retries(self, *args, **kwargs):
+        with observe_outbound("stripe"):
+            return self._client.request_with_retries(*args, **kwargs)
+
+    def request_stream_with_retries(self, *args, **kwargs):
+        with observe_outbound("stripe"):
+            return self._client.request_stream_with_retries(*args, **kwargs)
+
+
+def instrument_stripe() -> None:
+    import stripe
+
+    if isinstance(stripe.default_http_client, InstrumentedStripeClient):
+        return
+    client = stripe.default_http_client or stripe.new_default_http_client(
+        verify_ssl_certs=stripe.verify_ssl_certs,
+        proxy=stripe.proxy,
+    )
+    stripe.default_http_client = InstrumentedStripeClient(client)
+
+
+_queue_length_refreshed_at = 0.0
+
+
+async def refresh_celery_queue_length(
+    broker_url: str,
+    queues: Iterable[str] = ("celery",),
+    max_age: float = 10.0,
+) -> None:
+    """Read queue depths from a Redis broker at most every ``max_age`` seconds.
+
+    Skipped quietly (keeping the previous values) if the broker is unreachable.
+    """
+    global _queue_length_refreshed_at
+
+    if not broker_url.startswith(("redis://", "rediss://")):
+        return
+    now = time.monotonic()
+    if now - _queue_length_refreshed_at < max_age:
+        return
+    _queue_length_refreshed_at = now
+    from redis.asyncio import Redis
+
+    client = Redis.from_url(broker_url, socket_timeout=0.5, socket_connect_timeout=0.5)
+    try:
+        for queue in queues:
+            length = await asyncio.wait_for(client.llen(queue), timeout=1.0)
+            celery_queue_length.set(length, queue=queue)
+    except Exception as exc:
+        logger.debug("Could not read Celery queue length: %s", exc)
+    finally:
+        await client.aclose()
+
+
+class LoopLagMonitor:
+    """Samples event loop lag by measuring how late a periodic sleep wakes up.
+
+    ``last_tick`` is the monotonic time of the latest wake-up, readable from
+    other threads, and every listener is called with each lag sample.
+    """
+
+    def __init__(self, interval: float = 0.5) -> None:
+        self.interval = interval
+        self.last_tick = time.monotonic()
+        self._listeners: list[Callable[[float], None]] = []
+        self._task: asyncio.Task | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def add_listener(self, listener: Callable[[float], None]) -> None:
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[float], None]) -> None:
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    async def start(self) -> None:
+        if not self.running:
+            self.last_tick = time.monotonic()
+            self._task = asyncio.create_task(self._run(), name="loop-lag-monitor")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.last_tick = time.monotonic()
+            lag = max(0.0, loop.time() - expected)
+            event_loop_lag.observe(lag)
+            event_loop_lag_last.set(lag)
+            for listener in self._listeners:
+                try:
+                    listener(lag)
+                except Exception:
+                    logger.exception("Loop lag listener failed")
+
+
+loop_lag_monitor = LoopLagMonitor()
@@ -1,41 +1,57 @@
 import logging
 import traceback
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
-from marketing_api.notifications.pushover import send_pushover
-from marketing_api.notifications.email import notify_admin
+
+from starlette.requests import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from marketing_api.notifications.alerts import alert_aggregator
 from marketing_api.settings import settings
 
 logger = logging.getLogger(__name__)
 
-class ErrorAlertMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next) -> Response:
-        try:
-            response = await call_next(request)
-            if response.status_code >= 500:
-                self._send_alert(request, response.status_code)
-            return response
-        except Exception as exc:
-            self._send_alert(request, 500, exc)
-            raise exc
 
-    def _send_alert(self, request: Request, status_code: int, exc: Exception | None = None):
-        if settings.app_env != "production":
+class ErrorAlertMiddleware:
+    """Pure ASGI middleware that reports 5xx responses in production to the alert aggregator."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or settings.app_env != "production":
+            await self.app(scope, receive, send)
             return
 
-        method = request.method
-        url = str(request.url)
-        error_msg = f"Critical API Error: {status_code} {method} {url}"
-        
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        except Exception as exc:
+            self._send_alert(scope, 500, exc)
+            raise
+        if status_code >= 500:
+            self._send_alert(scope, status_code)
+
+    def _send_alert(self, scope: Scope, status_code: int, exc: Exception | None = None):
+        request = Request(scope)
+        route = getattr(scope.get("route"), "path", scope["path"])
+        detail = ""
         if exc:
             error_trace = "".join(traceback.format_exception(type(exc), exc, exc.__traceback__))
-            full_msg = f"{error_msg}\n\nException: {str(exc)}\n\n{error_trace}"
-        else:
-            full_msg = error_msg
-
-        # Throttling alerts could be added here to avoid spamming
+            detail = f"Exception: {str(exc)}\n\n{error_trace}"
         try:
-            send_pushover(title="API Error Alert", message=error_msg)
-            notify_admin(subject=f"🚨 API Error Alert: {status_code}", body=full_msg)
+            alert_aggregator.record(
+                method=request.method,
+                route=route,
+                url=str(request.url),
+                status_code=status_code,
+                exc=exc,
+                detail=detail,
+            )
         except Exception:
-            logger.exception("Failed to send error alerts")
+            logger.exception("Failed to record error alert")
@@ -0,0 +1,53 @@
+import asyncio
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from marketing_api.metrics import http_request_duration, http_requests_in_progress
+from marketing_api.watchdog import active_requests
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording request latency per route template.
+
+    Routes are labelled by their template (``/crm/leads/{lead_id}``), never the
+    raw path, so label cardinality stays bounded by the number of routes. It
+    also tells the loop watchdog which request each task is serving.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        task = asyncio.current_task()
+        if task is not None:
+            active_requests[task] = scope
+        http_requests_in_progress.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            http_requests_in_progress.dec()
+            if task is not None:
+                active_requests.pop(task, None)
+            route = getattr(scope.get("route"), "path", UNMATCHED_ROUTE)
+            http_request_duration.observe(
+                time.perf_counter() - start_time,
+                method=scope["method"],
+                route=route,
+                status=str(status_code),
+            )
@@ -1,77 +1,104 @@
 """PostHog middleware for error tracking and performance monitoring."""
 
+import random
 import time
-from typing import Callable
+from urllib.parse import parse_qsl
 
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.types import ASGIApp
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
-from marketing_api.posthog_client import capture_api_error, capture_performance
+from marketing_api.posthog_client import analytics_enabled, capture_api_error, capture_performance
+from marketing_api.settings import settings
 
 
-class PostHogMiddleware(BaseHTTPMiddleware):
-    """Middleware to track API errors and performance with PostHog."""
+def parse_paths(value: str) -> tuple[str, ...]:
+    return tuple(path.strip() for path in value.split(",") if path.strip())
 
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        """Process request and track metrics."""
-        start_time = time.time()
 
-        # Get user ID if available (from token or session)
-        user_id = None
-        if hasattr(request.state, "user") and request.state.user:
-            user_id = str(getattr(request.state.user, "id", None))
+class PostHogMiddleware:
+    """Pure ASGI middleware that tracks API errors and sampled performance in PostHog.
 
-        # Process request
-        try:
-            response = await call_next(request)
-            status_code = response.status_code
+    Paths starting with any of ``exclude_paths`` are passed straight through;
+    errors are always reported, performance events only for ``sample_rate``
+    of requests.
+    """
 
-            # Calculate duration
-            duration_ms = (time.time() - start_time) * 1000
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        exclude_paths: tuple[str, ...] | None = None,
+        sample_rate: float | None = None,
+    ) -> None:
+        self.app = app
+        self.exclude_paths = (
+            exclude_paths if exclude_paths is not None else parse_paths(settings.posthog_exclude_paths)
+        )
+        self.sample_rate = (
+            sample_rate if sample_rate is not None else settings.posthog_performance_sample_rate
+        )
 
-            # Track performance
-            capture_performance(
-                endpoint=str(request.url.path),
-                method=request.method,
-                duration_ms=duration_ms,
-                user_id=user_id,
-                additional_context={
-                    "status_code": status_code,
-                    "query_params": dict(request.query_params) if request.query_params else None,
-                },
-            )
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["path"].startswith(self.exclude_paths)
+            or not analytics_enabled()
+        ):
+            await self.app(scope, receive, send)
+            return
 
-            # Track errors (4xx and 5xx)
-            if status_code >= 400:
-                capture_api_error(
-                    endpoint=str(request.url.path),
-                    method=request.method,
-                    status_code=status_code,
-                    user_id=user_id,
-                    additional_context={
-                        "query_params": dict(request.query_params) if request.query_params else None,
-                    },
-                )
+        start_time = time.perf_counter()
+        status_code = 500
 
-            return response
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
 
+        try:
+            await self.app(scope, receive, send_with_status)
         except Exception as exc:
-            # Calculate duration even on exception
-            duration_ms = (time.time() - start_time) * 1000
-
-            # Track exception
             capture_api_error(
-                endpoint=str(request.url.path),
-                method=request.method,
+                endpoint=scope["path"],
+                method=scope["method"],
                 status_code=500,
                 error=exc,
-                user_id=user_id,
+                user_id=self._user_id(scope),
                 additional_context={
-                    "duration_ms": duration_ms,
-                    "query_params": dict(request.query_params) if request.query_params else None,
+                    "duration_ms": (time.perf_counter() - start_time) * 1000,
+                    "query_params": self._query_params(scope),
                 },
             )
-
-            # Re-raise exception
             raise
+
+        duration_ms = (time.perf_counter() - start_time) * 1000
+        if self.sample_rate >= 1 or random.random() < self.sample_rate:
+            capture_performance(
+                endpoint=scope["path"],
+                method=scope["method"],
+                duration_ms=duration_ms,
+                user_id=self._user_id(scope),
+                additional_context={
+                    "status_code": status_code,
+                    "query_params": self._query_params(scope),
+                    "sample_rate": self.sample_rate,
+                },
+            )
+        if status_code >= 400:
+            capture_api_error(
+                endpoint=scope["path"],
+                method=scope["method"],
+                status_code=status_code,
+                user_id=self._user_id(scope),
+                additional_context={"query_params": self._query_params(scope)},
+            )
+
+    @staticmethod
+    def _user_id(scope: Scope) -> str | None:
+        user = (scope.get("state") or {}).get("user")
+        return str(getattr(user, "id", None)) if user else None
+
+    @staticmethod
+    def _query_params(scope: Scope) -> dict[str, str] | None:
+        query_string = scope.get("query_string", b"")
+        return dict(parse_qsl(query_string.decode("latin-1"))) if query_string else None
@@ -0,0 +1,57 @@
+import logging
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from marketing_api.db.profiler import profile_queries
+from marketing_api.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class QueryProfilerMiddleware:
+    """Pure ASGI middleware profiling the SQL each request runs.
+
+    Outside production it adds a ``Server-Timing: db;dur=…`` header; in every
+    environment it logs a warning when a request exceeds the statement or DB
+    time budget, or repeats one statement shape often enough to look like an
+    N+1 loop. Only installed when ``SQL_PROFILING_ENABLED`` is set.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        self.server_timing = settings.app_env != "production"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with profile_queries() as profile:
+
+            async def send_with_timing(message: Message) -> None:
+                if message["type"] == "http.response.start" and self.server_timing:
+                    headers = MutableHeaders(scope=message)
+                    headers.append(
+                        "Server-Timing",
+                        f'db;dur={profile.duration_ms:.1f};desc="{profile.statements} queries"',
+                    )
+                await send(message)
+
+            await self.app(scope, receive, send_with_timing)
+
+        repeated = profile.repeated(settings.sql_repeat_threshold)
+        if (
+            profile.statements > settings.sql_budget_statements
+            or profile.duration_ms > settings.sql_budget_ms
+            or repeated
+        ):
+            route = getattr(scope.get("route"), "path", scope["path"])
+            logger.warning(
+                "SQL budget exceeded on %s %s: %d statements, %.1f ms%s",
+                scope["method"],
+                route,
+                profile.statements,
+                profile.duration_ms,
+                "".join(f"\n  {count}x {shape}" for shape, count in repeated),
+            )
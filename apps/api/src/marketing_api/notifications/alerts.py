@@ -0,0 +1,176 @@
+"""Throttled, deduplicated fan-out of API error alerts to Pushover and email."""
+
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable
+
+from marketing_api.notifications.email import notify_admin
+from marketing_api.notifications.pushover import send_pushover
+from marketing_api.settings import settings
+
+logger = logging.getLogger(__name__)
+
+AlertSender = Callable[[str, str, str], None]
+
+
+def send_alert(subject: str, message: str, body: str) -> None:
+    send_pushover(title="API Error Alert", message=message)
+    notify_admin(subject=subject, body=body)
+
+
+@dataclass
+class AlertCounter:
+    fingerprint: str
+    first_seen: datetime
+    last_seen: datetime
+    last_status: int
+    last_message: str
+    last_detail: str
+    total: int = 0
+    pending: int = 0
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "fingerprint": self.fingerprint,
+            "total": self.total,
+            "pending": self.pending,
+            "last_status": self.last_status,
+            "last_message": self.last_message,
+            "first_seen": self.first_seen.isoformat(),
+            "last_seen": self.last_seen.isoformat(),
+        }
+
+
+class AlertAggregator:
+    """Coalesce error alerts by fingerprint and send at most one per window.
+
+    Errors are fingerprinted by method, route template and exception type (or
+    status code). The first error after a quiet period is sent immediately
+    and opens a window; anything recorded while the window is open is folded
+    into a single digest sent when it closes. Sending happens on a dedicated
+    worker thread so blocking SMTP and Pushover calls never run on the event
+    loop.
+    """
+
+    def __init__(
+        self,
+        sender: AlertSender = send_alert,
+        *,
+        window_seconds: float = 60.0,
+        max_fingerprints: int = 1000,
+    ) -> None:
+        self.sender = sender
+        self.window_seconds = window_seconds
+        self.max_fingerprints = max_fingerprints
+        self.alerts_sent = 0
+        self._counters: dict[str, AlertCounter] = {}
+        self._window: asyncio.TimerHandle | None = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="alerts")
+
+    @staticmethod
+    def fingerprint(method: str, route: str, status_code: int, exc: BaseException | None = None) -> str:
+        return f"{method} {route} {type(exc).__name__ if exc else status_code}"
+
+    def record(
+        self,
+        *,
+        method: str,
+        route: str,
+        url: str,
+        status_code: int,
+        exc: BaseException | None = None,
+        detail: str = "",
+        message: str | None = None,
+    ) -> None:
+        """Count an error and alert now or with the current window's digest."""
+        fingerprint = self.fingerprint(method, route, status_code, exc)
+        now = datetime.now(timezone.utc)
+        message = message or f"Critical API Error: {status_code} {method} {url}"
+        counter = self._counters.get(fingerprint)
+        if counter is None:
+            if len(self._counters) >= self.max_fingerprints:
+                self._evict()
+            counter = AlertCounter(
+                fingerprint=fingerprint,
+                first_seen=now,
+                last_seen=now,
+                last_status=status_code,
+                last_message=message,
+                last_detail=detail,
+            )
+            self._counters[fingerprint] = counter
+        counter.total += 1
+        counter.last_seen = now
+        counter.last_status = status_code
+        counter.last_message = message
+        counter.last_detail = detail
+
+        if self._window is not None:
+            counter.pending += 1
+            return
+        # Quiet period: alert right away and coalesce whatever follows.
+        subject = f"🚨 API Error Alert: {status_code}" if status_code else f"🚨 API Alert: {route}"
+        self._dispatch(subject, message, f"{message}\n\n{detail}".rstrip())
+        self._open_window()
+
+    def snapshot(self) -> dict[str, Any]:
+        counters = sorted(self._counters.values(), key=lambda counter: counter.last_seen, reverse=True)
+        return {
+            "window_seconds": self.window_seconds,
+            "alerts_sent": self.alerts_sent,
+            "fingerprints": [counter.as_dict() for counter in counters],
+        }
+
+    async def flush(self) -> None:
+        """Send any pending digest now and wait for queued alerts to go out."""
+        if self._window is not None:
+            self._window.cancel()
+            self._close_window(reopen=False)
+        await asyncio.wrap_future(self._executor.submit(lambda: None))
+
+    def reset(self) -> None:
+        if self._window is not None:
+            self._window.cancel()
+            self._window = None
+        self._counters.clear()
+        self.alerts_sent = 0
+
+    def _open_window(self) -> None:
+        loop = asyncio.get_running_loop()
+        self._window = loop.call_later(self.window_seconds, self._close_window)
+
+    def _close_window(self, reopen: bool = True) -> None:
+        self._window = None
+        pending = [counter for counter in self._counters.values() if counter.pending]
+        if not pending:
+            return
+        total = sum(counter.pending for counter in pending)
+        lines = [f"{counter.pending}x {counter.fingerprint} (last: {counter.last_message})" for counter in pending]
+        message = f"{total} more API errors in the last {self.window_seconds:g}s:\n" + "\n".join(lines)
+        details = "\n\n".join(f"{counter.fingerprint}\n{counter.last_detail}" for counter in pending)
+        for counter in pending:
+            counter.pending = 0
+        self._dispatch(f"🚨 API Error Digest: {total} errors", message, f"{message}\n\n{details}".rstrip())
+        if reopen:
+            self._open_window()
+
+    def _dispatch(self, subject: str, message: str, body: str) -> None:
+        self.alerts_sent += 1
+        self._executor.submit(self._send, subject, message, body)
+
+    def _send(self, subject: str, message: str, body: str) -> None:
+        try:
+            self.sender(subject, message, body)
+        except Exception:
+            logger.exception("Failed to send error alerts")
+
+    def _evict(self) -> None:
+        idle = [counter for counter in self._counters.values() if not counter.pending]
+        oldest = min(idle or self._counters.values(), key=lambda counter: counter.last_seen)
+        del self._counters[oldest.fingerprint]
+
+
+alert_aggregator = AlertAggregator(window_seconds=settings.alert_window_seconds)
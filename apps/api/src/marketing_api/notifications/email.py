@@ -2,6 +2,7 @@ import logging
 import smtplib
 from email.message import EmailMessage
 
+from marketing_api.metrics import observe_outbound
 from marketing_api.settings import settings
 
 logger = logging.getLogger(__name__)
@@ -27,7 +28,7 @@ def send_email(
     msg.set_content(body)
 
     try:
-        with smtplib.SMTP(settings.smtp_host, settings.smtp_port, timeout=15) as server:
+        with observe_outbound("smtp"), smtplib.SMTP(settings.smtp_host, settings.smtp_port, timeout=15) as server:
             server.starttls()
             server.login(settings.smtp_user, settings.smtp_password)
             server.send_message(msg)
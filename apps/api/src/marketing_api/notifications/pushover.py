@@ -3,6 +3,7 @@ import logging
 import urllib.parse
 import urllib.request
 
+from marketing_api.metrics import observe_outbound
 from marketing_api.settings import settings
 
 logger = logging.getLogger(__name__)
@@ -28,7 +29,7 @@ def send_pushover(title: str, message: str) -> None:
     data = urllib.parse.urlencode(payload).encode("utf-8")
     req = urllib.request.Request("https://api.pushover.net/1/messages.json", data=data)
     try:
-        with urllib.request.urlopen(req, timeout=10) as response:
+        with observe_outbound("pushover"), urllib.request.urlopen(req, timeout=10) as response:
             if response.status >= 400:
                 body = response.read().decode("utf-8")
                 logger.error("Pushover error %s: %s", response.status, body)
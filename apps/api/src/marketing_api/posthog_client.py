@@ -6,21 +6,22 @@ from typing import Any
 
 from posthog import Posthog
 
+from marketing_api.analytics import EventPipeline
 from marketing_api.settings import settings
 
 logger = logging.getLogger(__name__)
 
 # Initialize PostHog client
 _posthog_client: Posthog | None = None
+# Set once initialization has been skipped so per-request callers don't retry it.
+_posthog_disabled = False
+# In the API process events go through the batched pipeline; workers and
+# scripts without a running event loop fall back to the SDK client.
+_pipeline: EventPipeline | None = None
 
 
-def get_posthog_client() -> Posthog | None:
-    """Get or create PostHog client instance."""
-    global _posthog_client
-
-    if _posthog_client is not None:
-        return _posthog_client
-
+def _resolve_api_key() -> tuple[str | None, bool]:
+    """Return the API key to use and whether it is a personal key."""
     # Use personal API key if available, otherwise fallback to project API key
     # Check both settings and environment variables for maximum compatibility
     personal_key = (
@@ -29,9 +30,22 @@ def get_posthog_client() -> Posthog | None:
         or os.getenv("POSTHOG_PERSONAL_KEY")
     )
     api_key_to_use = personal_key or settings.posthog_api_key
-
     if not api_key_to_use or api_key_to_use == "phc_change_me":
+        return None, False
+    return api_key_to_use, bool(personal_key)
+
+
+def get_posthog_client() -> Posthog | None:
+    """Get or create PostHog client instance."""
+    global _posthog_client, _posthog_disabled
+
+    if _posthog_client is not None or _posthog_disabled:
+        return _posthog_client
+
+    api_key_to_use, is_personal = _resolve_api_key()
+    if not api_key_to_use:
         logger.warning("PostHog API key not configured, skipping PostHog initialization")
+        _posthog_disabled = True
         return None
 
     try:
@@ -41,7 +55,7 @@ def get_posthog_client() -> Posthog | None:
         )
         logger.info(
             "PostHog client initialized with %s key",
-            "personal" if personal_key else "project",
+            "personal" if is_personal else "project",
         )
         return _posthog_client
     except Exception as exc:
@@ -49,11 +63,58 @@ def get_posthog_client() -> Posthog | None:
         return None
 
 
+def get_event_pipeline() -> EventPipeline | None:
+    """Return the running event pipeline, if this process started one."""
+    if _pipeline is not None and _pipeline.running:
+        return _pipeline
+    return None
+
+
+def analytics_enabled() -> bool:
+    """Whether captured events will be delivered anywhere."""
+    return get_event_pipeline() is not None or get_posthog_client() is not None
+
+
+async def start_event_pipeline() -> EventPipeline | None:
+    """Start the batched event pipeline on the running loop (API startup)."""
+    global _pipeline
+
+    api_key, _ = _resolve_api_key()
+    if not api_key:
+        return None
+    if _pipeline is None:
+        _pipeline = EventPipeline(
+            host=settings.posthog_host,
+            api_key=api_key,
+            capacity=settings.analytics_buffer_size,
+            batch_size=settings.analytics_batch_size,
+            flush_interval=settings.analytics_flush_interval_seconds,
+            timeout=settings.analytics_request_timeout_seconds,
+        )
+    await _pipeline.start()
+    return _pipeline
+
+
+async def stop_event_pipeline() -> None:
+    """Flush buffered events and stop the pipeline (API shutdown)."""
+    global _pipeline
+
+    if _pipeline is not None:
+        await _pipeline.stop()
+        logger.info("Analytics pipeline stopped: %s", _pipeline.snapshot())
+        _pipeline = None
+
+
 def identify_user(
     distinct_id: str,
     properties: dict[str, Any] | None = None,
 ) -> None:
     """Identify a user with properties."""
+    pipeline = get_event_pipeline()
+    if pipeline:
+        pipeline.enqueue(distinct_id, "$identify", {"$set": properties or {}})
+        return
+
     client = get_posthog_client()
     if not client:
         return
@@ -72,17 +133,7 @@ def set_user_properties(
     properties: dict[str, Any],
 ) -> None:
     """Set user properties."""
-    client = get_posthog_client()
-    if not client:
-        return
-
-    try:
-        client.identify(
-            distinct_id=distinct_id,
-            properties=properties,
-        )
-    except Exception as exc:
-        logger.error("Failed to set user properties in PostHog: %s", exc)
+    identify_user(distinct_id, properties)
 
 
 def capture_event(
@@ -91,6 +142,11 @@ def capture_event(
     properties: dict[str, Any] | None = None,
 ) -> None:
     """Capture an event to PostHog."""
+    pipeline = get_event_pipeline()
+    if pipeline:
+        pipeline.enqueue(distinct_id, event, properties)
+        return
+
     client = get_posthog_client()
     if not client:
         return
@@ -111,10 +167,6 @@ def capture_exception(
     context: dict[str, Any] | None = None,
 ) -> None:
     """Capture an exception to PostHog."""
-    client = get_posthog_client()
-    if not client:
-        return
-
     try:
         properties = {
             "$exception_type": type(exception).__name__,
@@ -135,7 +187,7 @@ def capture_exception(
         if context:
             properties.update(context)
 
-        client.capture(
+        capture_event(
             distinct_id=distinct_id,
             event="$exception",
             properties=properties,
@@ -246,10 +298,12 @@ def capture_conversion(
 
 
 def flush() -> None:
-    """Flush pending PostHog events."""
-    client = get_posthog_client()
-    if client:
+    """Flush events queued in the SDK client without shutting it down.
+
+    The batched pipeline is flushed by ``stop_event_pipeline`` on shutdown.
+    """
+    if _posthog_client is not None:
         try:
-            client.shutdown()
+            _posthog_client.flush()
         except Exception as exc:
             logger.error("Failed to flush PostHog events: %s", exc)
@@ -1,22 +1,32 @@
 import json
 import logging
-import random
 import uuid
 from datetime import datetime, timezone
+from typing import Literal
 
-from fastapi import APIRouter, Depends, HTTPException, Request, status
-from pydantic import BaseModel
-from sqlalchemy import select, func
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from pydantic import BaseModel, Field
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from marketing_api.db.models import ABTest, TestAssignment, TestConversion, TestVariant
+from marketing_api.db.aggregates import count_by_parent, sum_by_parent
+from marketing_api.db.models import ABTest, TestAssignment, TestDailyStat, TestVariant
 from marketing_api.db.session import get_session
+from marketing_api.db.upsert import dialect_insert
+from marketing_api.experiments.assignment import assignment_recorder, choose_variant
+from marketing_api.experiments.config import ExperimentConfig, ExperimentSnapshot, VariantConfig, experiment_cache
+from marketing_api.experiments.conversions import conversion_buffer
+from marketing_api.experiments.counters import increment_daily_stats, utc_day
+from marketing_api.experiments.results import results_cache
 from marketing_api.limits import limiter
 from marketing_api.posthog_client import capture_feature_usage
+from marketing_api.settings import settings
 
 router = APIRouter(prefix="/public/ab-testing", tags=["ab-testing"])
 logger = logging.getLogger(__name__)
 
+MAX_CONVERSION_BATCH = 1000
+
 
 class CreateTestRequest(BaseModel):
     name: str
@@ -24,6 +34,7 @@ class CreateTestRequest(BaseModel):
     target_url: str
     conversion_event: str
     traffic_split: dict[str, int]  # {"control": 50, "variant": 50}
+    assignment_mode: Literal["deterministic", "random", "bandit"] = "deterministic"
 
 
 class VariantRequest(BaseModel):
@@ -39,6 +50,12 @@ class AssignVariantRequest(BaseModel):
     session_id: str | None = None
 
 
+class BulkAssignRequest(BaseModel):
+    target_url: str
+    user_id: str | None = None
+    session_id: str | None = None
+
+
 class TrackConversionRequest(BaseModel):
     test_id: str
     event_name: str
@@ -46,6 +63,10 @@ class TrackConversionRequest(BaseModel):
     session_id: str | None = None
 
 
+class TrackConversionsRequest(BaseModel):
+    events: list[TrackConversionRequest] = Field(max_length=MAX_CONVERSION_BATCH)
+
+
 @router.post("/tests")
 @limiter.limit("10/minute")
 async def create_test(
@@ -60,6 +81,7 @@ async def create_test(
         target_url=body.target_url,
         conversion_event=body.conversion_event,
         traffic_split=json.dumps(body.traffic_split),
+        assignment_mode=body.assignment_mode,
         status="draft",
     )
     session.add(test)
@@ -79,10 +101,19 @@ async def add_variant(
     body: VariantRequest,
     session: AsyncSession = Depends(get_session),
 ):
-    """Add a variant to an A/B test."""
+    """Add a variant to an A/B test.
+
+    Active deterministic tests are refused: their buckets come from the
+    cumulative weights, so a new variant would move existing visitors.
+    """
     test = await session.get(ABTest, uuid.UUID(test_id))
     if not test:
         raise HTTPException(status_code=404, detail="Test not found")
+    if test.status == "active" and test.assignment_mode == "deterministic":
+        raise HTTPException(
+            status_code=409,
+            detail="Variants of an active deterministic test cannot change; pause the test or start a new one.",
+        )
     
     variant = TestVariant(
         test_id=test.id,
@@ -105,62 +136,107 @@ async def assign_variant(
     session: AsyncSession = Depends(get_session),
 ):
     """Assign a user/session to a test variant."""
-    test = await session.get(ABTest, uuid.UUID(body.test_id))
-    if not test or test.status != "active":
+    test = await experiment_cache.get(session, uuid.UUID(body.test_id))
+    if not test:
         return {"variant_key": "control", "content": None}
-    
-    # Check if already assigned
-    query = select(TestAssignment).where(TestAssignment.test_id == test.id)
-    if body.user_id:
-        query = query.where(TestAssignment.user_id == body.user_id)
-    elif body.session_id:
-        query = query.where(TestAssignment.session_id == body.session_id)
-    
-    result = await session.execute(query.limit(1))
-    existing = result.scalar_one_or_none()
-    
-    if existing:
-        variant = await session.get(TestVariant, existing.variant_id)
-        return {
-            "variant_key": variant.variant_key,
-            "content": json.loads(variant.content_json) if variant.content_json else None,
-        }
-    
-    # Get all variants with weights
-    variants_result = await session.execute(
-        select(TestVariant).where(TestVariant.test_id == test.id)
-    )
-    variants = variants_result.scalars().all()
-    
-    if not variants:
+    return await _assign(session, test, body.user_id, body.session_id)
+
+
+@router.post("/assign/bulk")
+@limiter.limit("100/minute")
+async def assign_variants(
+    request: Request,
+    body: BulkAssignRequest,
+    session: AsyncSession = Depends(get_session),
+):
+    """Assign a user/session to every active test on a page in one call."""
+    snapshot = await experiment_cache.snapshot(session)
+    assignments = []
+    for test in snapshot.matching(body.target_url):
+        assignment = await _assign(session, test, body.user_id, body.session_id)
+        assignments.append({"test_id": str(test.id), **assignment})
+    return {"version": snapshot.etag, "assignments": assignments}
+
+
+@router.get("/config")
+@limiter.limit("100/minute")
+async def experiment_config(
+    request: Request,
+    target_url: str | None = None,
+    session: AsyncSession = Depends(get_session),
+):
+    """Active tests with variants, weights and content, for CDN caching.
+
+    Revalidate with ``If-None-Match``; the ETag changes whenever a test or
+    variant does.
+    """
+    snapshot = await experiment_cache.snapshot(session)
+    headers = {
+        "ETag": snapshot.etag,
+        "Cache-Control": f"public, max-age={int(settings.experiment_config_ttl_seconds)}",
+    }
+    if snapshot.etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(snapshot.document(target_url), media_type="application/json", headers=headers)
+
+
+async def _assign(
+    session: AsyncSession, test: ExperimentConfig, user_id: str | None, session_id: str | None
+) -> dict:
+    if test.assignment_mode in ("random", "bandit"):
+        # Bandit weights move, so a hash would move visitors between variants.
+        variant = await _stored_variant(session, test, user_id, session_id)
+    else:
+        variant = choose_variant(test, user_id or session_id)
+        if variant:
+            assignment_recorder.record(test.id, variant.id, user_id=user_id, session_id=session_id)
+    if not variant:
         return {"variant_key": "control", "content": None}
+    return {"variant_key": variant.key, "content": variant.content}
+
+
+async def _stored_variant(
+    session: AsyncSession, test: ExperimentConfig, user_id: str | None, session_id: str | None
+) -> VariantConfig | None:
+    """Random weighted pick, kept sticky by looking up the stored row."""
+    unit_id = user_id or session_id
+    if unit_id:
+        existing = await _stored_variant_id(session, test.id, unit_id)
+        if existing:
+            return next((variant for variant in test.variants if variant.id == existing), None)
     
-    # Weighted random selection
-    total_weight = sum(v.weight for v in variants)
-    rand = random.randint(1, total_weight)
-    cumulative = 0
-    selected_variant = variants[0]
-    
-    for variant in variants:
-        cumulative += variant.weight
-        if rand <= cumulative:
-            selected_variant = variant
-            break
+    variant = choose_variant(test, None)
+    if not variant:
+        return None
     
-    # Create assignment
-    assignment = TestAssignment(
+    # Create assignment; if a concurrent request for this visitor won, use theirs
+    stmt = dialect_insert(session, TestAssignment).values(
+        id=uuid.uuid4(),
         test_id=test.id,
-        variant_id=selected_variant.id,
-        user_id=body.user_id,
-        session_id=body.session_id,
+        variant_id=variant.id,
+        user_id=user_id,
+        session_id=session_id,
+        unit_id=unit_id,
+    )
+    result = await session.execute(stmt.on_conflict_do_nothing(index_elements=["test_id", "unit_id"]))
+    if result.rowcount == 0:
+        await session.commit()
+        existing = await _stored_variant_id(session, test.id, unit_id)
+        return next((variant for variant in test.variants if variant.id == existing), None)
+    await increment_daily_stats(
+        session, "visitors", [(utc_day(datetime.now(timezone.utc)), test.id, variant.id)]
     )
-    session.add(assignment)
     await session.commit()
-    
-    return {
-        "variant_key": selected_variant.variant_key,
-        "content": json.loads(selected_variant.content_json) if selected_variant.content_json else None,
-    }
+    return variant
+
+
+async def _stored_variant_id(session: AsyncSession, test_id: uuid.UUID, unit_id: str) -> uuid.UUID | None:
+    result = await session.execute(
+        select(TestAssignment.variant_id)
+        .where(TestAssignment.test_id == test_id)
+        .where(TestAssignment.unit_id == unit_id)
+    )
+    return result.scalar_one_or_none()
 
 
 @router.post("/conversion")
@@ -170,47 +246,49 @@ async def track_conversion(
     body: TrackConversionRequest,
     session: AsyncSession = Depends(get_session),
 ):
-    """Track a conversion event for an A/B test."""
-    test = await session.get(ABTest, uuid.UUID(body.test_id))
+    """Track a conversion event for an A/B test.
+
+    Events are validated now and written in the background; a repeat of the
+    same event by the same visitor is ignored.
+    """
+    snapshot = await experiment_cache.snapshot(session)
+    test = _conversion_test(snapshot, body)
+    conversion_buffer.track(test, body.event_name, user_id=body.user_id, session_id=body.session_id)
+    return {"status": "accepted"}
+
+
+@router.post("/conversions")
+@limiter.limit("100/minute")
+async def track_conversions(
+    request: Request,
+    body: TrackConversionsRequest,
+    session: AsyncSession = Depends(get_session),
+):
+    """Track a batch of conversion events; invalid events are reported by index."""
+    snapshot = await experiment_cache.snapshot(session)
+    accepted = 0
+    rejected = []
+    for index, event in enumerate(body.events):
+        try:
+            test = _conversion_test(snapshot, event)
+        except HTTPException as exc:
+            rejected.append({"index": index, "detail": exc.detail})
+            continue
+        conversion_buffer.track(test, event.event_name, user_id=event.user_id, session_id=event.session_id)
+        accepted += 1
+    return {"accepted": accepted, "rejected": rejected}
+
+
+def _conversion_test(snapshot: ExperimentSnapshot, event: TrackConversionRequest) -> ExperimentConfig:
+    try:
+        test = snapshot.tests.get(uuid.UUID(event.test_id))
+    except ValueError:
+        test = None
     if not test:
         raise HTTPException(status_code=404, detail="Test not found")
-    
-    # Find assignment
-    query = select(TestAssignment).where(TestAssignment.test_id == test.id)
-    if body.user_id:
-        query = query.where(TestAssignment.user_id == body.user_id)
-    elif body.session_id:
-        query = query.where(TestAssignment.session_id == body.session_id)
-    
-    result = await session.execute(query.order_by(TestAssignment.assigned_at.desc()).limit(1))
-    assignment = result.scalar_one_or_none()
-    
-    if not assignment:
-        raise HTTPException(status_code=400, detail="No assignment found for this user/session")
-    
-    # Check if conversion already tracked
-    existing = await session.execute(
-        select(TestConversion)
-        .where(TestConversion.assignment_id == assignment.id)
-        .where(TestConversion.event_name == body.event_name)
-        .limit(1)
-    )
-    if existing.scalar_one_or_none():
-        return {"status": "already_tracked"}
-    
-    conversion = TestConversion(
-        test_id=test.id,
-        variant_id=assignment.variant_id,
-        assignment_id=assignment.id,
-        user_id=body.user_id,
-        event_name=body.event_name,
-    )
-    session.add(conversion)
-    await session.commit()
-    
-    capture_feature_usage("ab_test_conversion", {"test_id": body.test_id, "event": body.event_name})
-    
-    return {"status": "tracked"}
+    if not (event.user_id or event.session_id):
+        raise HTTPException(status_code=400, detail="A user_id or session_id is required")
+    return test
 
 
 @router.get("/tests")
@@ -224,21 +302,13 @@ async def list_tests(
         select(ABTest).order_by(ABTest.created_at.desc())
     )
     tests = result.scalars().all()
+    test_ids = [test.id for test in tests]
+    
+    variant_counts = await count_by_parent(session, TestVariant.test_id, test_ids, {"variants": None})
+    visitor_counts = await sum_by_parent(session, TestDailyStat.test_id, test_ids, {"visitors": TestDailyStat.visitors})
     
     test_list = []
     for test in tests:
-        # Get variant count
-        variants_result = await session.execute(
-            select(func.count(TestVariant.id)).where(TestVariant.test_id == test.id)
-        )
-        variant_count = variants_result.scalar() or 0
-        
-        # Get total visitors
-        assignments_result = await session.execute(
-            select(func.count(TestAssignment.id)).where(TestAssignment.test_id == test.id)
-        )
-        total_visitors = assignments_result.scalar() or 0
-        
         test_list.append({
             "test_id": str(test.id),
             "name": test.name,
@@ -246,8 +316,9 @@ async def list_tests(
             "target_url": test.target_url,
             "status": test.status,
             "conversion_event": test.conversion_event,
-            "variant_count": variant_count,
-            "total_visitors": total_visitors,
+            "assignment_mode": test.assignment_mode,
+            "variant_count": variant_counts[test.id]["variants"],
+            "total_visitors": visitor_counts[test.id]["visitors"],
             "created_at": test.created_at.isoformat() if test.created_at else None,
         })
     
@@ -271,33 +342,7 @@ async def get_test_results(
         select(TestVariant).where(TestVariant.test_id == test.id)
     )
     variants = variants_result.scalars().all()
-    
-    results = []
-    for variant in variants:
-        # Count assignments
-        assignments_count = await session.execute(
-            select(func.count(TestAssignment.id))
-            .where(TestAssignment.variant_id == variant.id)
-        )
-        visitors = assignments_count.scalar() or 0
-        
-        # Count conversions
-        conversions_count = await session.execute(
-            select(func.count(TestConversion.id))
-            .where(TestConversion.variant_id == variant.id)
-            .where(TestConversion.event_name == test.conversion_event)
-        )
-        conversions = conversions_count.scalar() or 0
-        
-        conversion_rate = (conversions / visitors * 100) if visitors > 0 else 0
-        
-        results.append({
-            "variant_key": variant.variant_key,
-            "name": variant.name,
-            "visitors": visitors,
-            "conversions": conversions,
-            "conversion_rate": round(conversion_rate, 2),
-        })
+    analysis = await results_cache.results(session, test, list(variants))
     
     return {
         "test_id": test_id,
@@ -305,5 +350,5 @@ async def get_test_results(
         "test_description": test.description,
         "test_status": test.status,
         "conversion_event": test.conversion_event,
-        "results": results,
+        **analysis,
     }
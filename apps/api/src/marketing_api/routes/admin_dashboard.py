@@ -1,20 +1,25 @@
 from datetime import datetime, timedelta, timezone
 from typing import Any
 
-from fastapi import APIRouter, Depends, HTTPException, Security
+from fastapi import APIRouter, Depends, HTTPException, Query, Security
+from fastapi.responses import StreamingResponse
 from sqlalchemy import func, select, text
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from marketing_api.auth.dependencies import get_current_user
-from marketing_api.db.models import Lead, LeadStatus, NewsletterSignup, ChatMessage, StripeTransaction, BugReport, User
-from marketing_api.db.session import get_session
+from marketing_api.auth.principal import Principal
+from marketing_api.chat_cache import chat_cache
+from marketing_api.db.models import Lead, LeadStatus, NewsletterSignup, ChatMessage, StripeTransaction, BugReport
+from marketing_api.db.session import get_session, get_sessionmaker
+from marketing_api.notifications.alerts import alert_aggregator
+from marketing_api.utils.exports import ExportFormat, export_response
 
 router = APIRouter(prefix="/admin/dashboard", tags=["admin"])
 
 @router.get("/metrics")
 async def get_dashboard_metrics(
     session: AsyncSession = Depends(get_session),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ) -> dict[str, Any]:
     """Lightweight health dashboard for lead volume and funnel status."""
     
@@ -68,7 +73,7 @@ async def get_dashboard_metrics(
 @router.get("/delivery-verification")
 async def verify_lead_delivery(
     session: AsyncSession = Depends(get_session),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ) -> list[dict[str, Any]]:
     """E2E lead delivery verification (Last 50 leads)."""
     stmt = select(Lead).order_by(Lead.created_at.desc()).limit(50)
@@ -88,3 +93,65 @@ async def verify_lead_delivery(
         })
     
     return verification
+
+
+@router.get("/alerts")
+async def get_alert_counters(
+    current_user: Principal = Depends(get_current_user),
+) -> dict[str, Any]:
+    """Per-fingerprint API error counters from the alert aggregator."""
+    return alert_aggregator.snapshot()
+
+
+@router.get("/chat-cache")
+async def get_chat_cache_stats(
+    current_user: Principal = Depends(get_current_user),
+) -> dict[str, Any]:
+    """Size and hit rate of the AI chatbot answer cache in the worker that answers.
+
+    Each API process caches separately; ``process_id`` says which one this is.
+    """
+    return chat_cache.snapshot()
+
+
+@router.delete("/chat-cache")
+async def invalidate_chat_cache(
+    message: str | None = None,
+    session: AsyncSession = Depends(get_session),
+    current_user: Principal = Depends(get_current_user),
+) -> dict[str, Any]:
+    """Drop one cached question, or every cached answer (e.g. after a pricing change).
+
+    Applies to every worker: each drops the answers on its next lookup.
+    """
+    if message is not None:
+        return {"scope": "question", "generation": await chat_cache.invalidate(session, message)}
+    return {"scope": "all", "generation": await chat_cache.invalidate_all(session)}
+
+
+@router.get("/leads/export")
+async def export_leads(
+    export_format: ExportFormat = Query("csv", alias="format"),
+    sessionmaker: async_sessionmaker[AsyncSession] = Depends(get_sessionmaker),
+    current_user: Principal = Depends(get_current_user),
+) -> StreamingResponse:
+    """Stream every lead as CSV or NDJSON."""
+    return export_response(
+        select(Lead).order_by(Lead.created_at, Lead.id),
+        [
+            "id",
+            "full_name",
+            "email",
+            "phone",
+            "company",
+            "budget",
+            "source",
+            "status",
+            "score",
+            "customer_id",
+            "created_at",
+        ],
+        export_format=export_format,
+        filename="leads",
+        sessionmaker=sessionmaker,
+    )
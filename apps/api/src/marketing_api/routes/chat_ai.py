@@ -1,19 +1,25 @@
+import logging
 import uuid
+from collections.abc import AsyncIterator
 from typing import Any
 
 from fastapi import APIRouter, Depends, Request, status
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from marketing_api.db.models import ChatMessage
+from marketing_api.chat_cache import chat_cache
+from marketing_api.chat_transcripts import Turn, history_messages, transcript_store, trim_history
 from marketing_api.db.session import get_session
 from marketing_api.limits import limiter
+from marketing_api.llm import llm_gateway
 from marketing_api.posthog_client import capture_feature_usage
 from marketing_api.routes.public import should_bypass_turnstile, verify_turnstile
 from marketing_api.settings import settings
+from marketing_api.utils.sse import sse_event, sse_response
 
 router = APIRouter(prefix="/public/chat", tags=["chat-ai"])
+logger = logging.getLogger(__name__)
 
 
 class ChatAiRequest(BaseModel):
@@ -22,6 +28,7 @@ class ChatAiRequest(BaseModel):
     name: str | None = None
     email: str | None = None
     turnstile_token: str | None = None
+    stream: bool = False
 
 
 def get_ai_system_prompt() -> str:
@@ -45,63 +52,127 @@ Key information:
 Keep responses under 150 words when possible. Be conversational and helpful."""
 
 
-async def get_chat_history(session: AsyncSession, session_id: str, limit: int = 10) -> list[dict[str, Any]]:
-    """Get recent chat history for context."""
-    result = await session.execute(
-        select(ChatMessage)
-        .where(ChatMessage.chat_session_id == session_id)
-        .order_by(ChatMessage.created_at.desc())
-        .limit(limit)
-    )
-    messages = result.scalars().all()
-    # Reverse to get chronological order
-    messages = list(reversed(messages))
-    
-    history = []
-    for msg in messages:
-        if not msg.is_ai_response:
-            history.append({"role": "user", "content": msg.message})
-        if msg.is_ai_response and msg.ai_response_text:
-            history.append({"role": "assistant", "content": msg.ai_response_text})
-    
-    return history
+async def get_chat_history(session: AsyncSession, session_id: str) -> list[dict[str, Any]]:
+    """Get recent chat history for context, trimmed to the token budget."""
+    turns = await transcript_store.recent_turns(session, session_id)
+    return history_messages(trim_history(turns, settings.chat_history_token_budget))
+
+
+UNAVAILABLE_RESPONSE = "I'm currently unavailable. Please contact us directly using the contact form or book a call."
+
+
+def build_chat_messages(message: str, history: list[dict[str, Any]]) -> list[dict[str, str]]:
+    messages = [{"role": "system", "content": get_ai_system_prompt()}]
+    messages.extend(history)
+    messages.append({"role": "user", "content": message})
+    return messages
 
 
-async def get_ai_response(message: str, history: list[dict[str, Any]], name: str | None = None) -> str:
+def _error_response(exc: Exception) -> str:
+    return f"I'm having trouble right now. Please contact us directly - we'd love to help! Error: {str(exc)[:50]}"
+
+
+async def get_ai_response(
+    session: AsyncSession, message: str, history: list[dict[str, Any]], name: str | None = None
+) -> str:
     """Get AI response using OpenAI API."""
-    if not settings.openai_api_key:
-        return "I'm currently unavailable. Please contact us directly using the contact form or book a call."
+    if not llm_gateway.configured:
+        return UNAVAILABLE_RESPONSE
+    
+    # Opening questions repeat; answer them from the cache.
+    cached = await chat_cache.lookup(session, message) if not history else None
+    if cached is not None and cached.answer is not None:
+        return cached.answer
     
     try:
-        from openai import AsyncOpenAI
-        
-        client = AsyncOpenAI(api_key=settings.openai_api_key)
-        
-        messages = [{"role": "system", "content": get_ai_system_prompt()}]
-        messages.extend(history[-10:])  # Last 10 messages for context
-        messages.append({"role": "user", "content": message})
-        
-        response = await client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=messages,
-            max_tokens=200,
-            temperature=0.7,
+        completion = await llm_gateway.complete(
+            build_chat_messages(message, history), feature="ai_chatbot", max_tokens=200, temperature=0.7
         )
-        
-        return response.choices[0].message.content or "I apologize, I couldn't generate a response."
     except Exception as exc:
         # Fallback response if AI fails
-        return f"I'm having trouble right now. Please contact us directly - we'd love to help! Error: {str(exc)[:50]}"
+        return _error_response(exc)
+    if not completion.text:
+        return "I apologize, I couldn't generate a response."
+    if cached is not None:
+        chat_cache.store(cached, completion.text)
+    return completion.text
+
+
+async def stream_ai_response(
+    session: AsyncSession, message: str, history: list[dict[str, Any]]
+) -> AsyncIterator[str]:
+    """Yield the AI response as it is generated, with the same fallbacks."""
+    if not llm_gateway.configured:
+        yield UNAVAILABLE_RESPONSE
+        return
+    
+    cached = await chat_cache.lookup(session, message) if not history else None
+    if cached is not None and cached.answer is not None:
+        yield cached.answer
+        return
+    
+    parts = []
+    try:
+        async for text in llm_gateway.stream(
+            build_chat_messages(message, history), feature="ai_chatbot", max_tokens=200, temperature=0.7
+        ):
+            parts.append(text)
+            yield text
+    except Exception as exc:
+        if not parts:
+            yield _error_response(exc)
+        else:
+            # The visitor already has part of the answer; keep it, but don't cache it.
+            logger.warning("AI chat stream ended early: %s", exc)
+        return
+    if cached is not None and parts:
+        chat_cache.store(cached, "".join(parts))
+
+
+async def store_chat_exchange(
+    session: AsyncSession, payload: ChatAiRequest, session_id: str, ai_response: str
+) -> bool:
+    """Store the turn and report whether it needs a human."""
+    await transcript_store.record_turn(
+        session,
+        session_id,
+        Turn(payload.message, ai_response),
+        name=payload.name,
+        email=payload.email,
+        new_session=payload.session_id is None,
+    )
+    
+    # Check if escalation needed
+    escalation_keywords = ["speak to human", "talk to someone", "contact", "call me", "human agent"]
+    return any(keyword in payload.message.lower() for keyword in escalation_keywords)
 
 
-@router.post("/ai-response", status_code=status.HTTP_200_OK)
+def track_chat_usage(payload: ChatAiRequest, session_id: str, has_history: bool, needs_escalation: bool) -> None:
+    capture_feature_usage(
+        feature="ai_chatbot",
+        user_id=payload.email or "anonymous",
+        metadata={
+            "session_id": session_id,
+            "message_length": len(payload.message),
+            "has_history": has_history,
+            "needs_escalation": needs_escalation,
+        },
+    )
+
+
+@router.post("/ai-response", status_code=status.HTTP_200_OK, response_model=None)
 @limiter.limit("20/hour")
 async def get_ai_chat_response(
     request: Request,
     payload: ChatAiRequest,
     session: AsyncSession = Depends(get_session),
-) -> dict[str, Any]:
-    """Get AI response to a chat message."""
+) -> dict[str, Any] | StreamingResponse:
+    """Get AI response to a chat message.
+
+    With ``stream`` set, the response is server-sent events: ``token`` events
+    carrying ``{"text": ...}`` as the answer is generated, then one ``done``
+    event with the session id and escalation flag.
+    """
     if not should_bypass_turnstile(request):
         await verify_turnstile(payload.turnstile_token)
     
@@ -111,47 +182,25 @@ async def get_ai_chat_response(
     # Get chat history for context
     history = await get_chat_history(session, session_id) if payload.session_id else []
     
-    # Get AI response
-    ai_response = await get_ai_response(payload.message, history, payload.name)
-    
-    # Store user message
-    user_message = ChatMessage(
-        name=payload.name or "Anonymous",
-        email=payload.email,
-        message=payload.message,
-        chat_session_id=session_id,
-        is_ai_response=False,
-    )
-    session.add(user_message)
-    await session.flush()
-    
-    # Store AI response
-    ai_message = ChatMessage(
-        name="Carolina Growth AI",
-        email=None,
-        message=payload.message,  # Original message for reference
-        ai_response_text=ai_response,
-        chat_session_id=session_id,
-        is_ai_response=True,
-    )
-    session.add(ai_message)
-    await session.commit()
+    if payload.stream:
+        async def events() -> AsyncIterator[str]:
+            parts = []
+            async for text in stream_ai_response(session, payload.message, history):
+                parts.append(text)
+                yield sse_event("token", {"text": text})
+            ai_response = "".join(parts) or "I apologize, I couldn't generate a response."
+            needs_escalation = await store_chat_exchange(session, payload, session_id, ai_response)
+            track_chat_usage(payload, session_id, bool(history), needs_escalation)
+            yield sse_event("done", {"session_id": session_id, "needs_escalation": needs_escalation})
+
+        return sse_response(events())
     
-    # Check if escalation needed
-    escalation_keywords = ["speak to human", "talk to someone", "contact", "call me", "human agent"]
-    needs_escalation = any(keyword in payload.message.lower() for keyword in escalation_keywords)
+    # Get AI response
+    ai_response = await get_ai_response(session, payload.message, history, payload.name)
+    needs_escalation = await store_chat_exchange(session, payload, session_id, ai_response)
     
     # Track feature usage
-    capture_feature_usage(
-        feature="ai_chatbot",
-        user_id=payload.email or "anonymous",
-        metadata={
-            "session_id": session_id,
-            "message_length": len(payload.message),
-            "has_history": len(history) > 0,
-            "needs_escalation": needs_escalation,
-        },
-    )
+    track_chat_usage(payload, session_id, bool(history), needs_escalation)
     
     return {
         "response": ai_response,
@@ -3,13 +3,15 @@ from datetime import datetime, timedelta, timezone
 from typing import Any
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from pydantic import BaseModel, EmailStr
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from marketing_api.auth.dependencies import get_current_user
-from marketing_api.db.models import ConsultationBooking, User
+from marketing_api.auth.principal import Principal
+from marketing_api.db.models import ConsultationBooking
+from marketing_api.db.pagination import keyset_page, split_page
 from marketing_api.db.session import get_session
 
 router = APIRouter(prefix="/admin/consultation", tags=["consultation-admin"])
@@ -38,10 +40,16 @@ async def list_bookings(
     start_date: datetime | None = None,
     end_date: datetime | None = None,
     status_filter: str | None = None,
+    limit: int = Query(200, ge=1, le=1000),
+    cursor: str | None = None,
     session: AsyncSession = Depends(get_session),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ) -> dict[str, Any]:
-    """List consultation bookings with optional filtering."""
+    """List consultation bookings with optional filtering.
+
+    Bookings are paged in calendar order by keyset on (scheduled_at, id);
+    pass ``next_cursor`` back as ``cursor`` for the following page.
+    """
     query = select(ConsultationBooking)
     
     if start_date:
@@ -51,10 +59,20 @@ async def list_bookings(
     if status_filter:
         query = query.where(ConsultationBooking.status == status_filter)
     
-    query = query.order_by(ConsultationBooking.scheduled_at.asc())
+    try:
+        query = keyset_page(
+            query,
+            ConsultationBooking.scheduled_at,
+            ConsultationBooking.id,
+            cursor=cursor,
+            limit=limit,
+            descending=False,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
     
     result = await session.execute(query)
-    bookings = result.scalars().all()
+    bookings, next_cursor = split_page(result.scalars().all(), limit, "scheduled_at")
     
     return {
         "bookings": [
@@ -71,7 +89,8 @@ async def list_bookings(
                 "created_at": b.created_at.isoformat() if b.created_at else None,
             }
             for b in bookings
-        ]
+        ],
+        "next_cursor": next_cursor,
     }
 
 
@@ -79,7 +98,7 @@ async def list_bookings(
 async def create_booking(
     payload: BookingCreate,
     session: AsyncSession = Depends(get_session),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ) -> dict[str, Any]:
     """Create a new consultation booking."""
     booking = ConsultationBooking(
@@ -109,7 +128,7 @@ async def update_booking(
     booking_id: UUID,
     payload: BookingUpdate,
     session: AsyncSession = Depends(get_session),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ) -> dict[str, Any]:
     """Update a consultation booking."""
     result = await session.execute(
@@ -145,7 +164,7 @@ async def update_booking(
 async def delete_booking(
     booking_id: UUID,
     session: AsyncSession = Depends(get_session),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ) -> None:
     """Delete a consultation booking."""
     result = await session.execute(
@@ -165,7 +184,7 @@ async def get_availability(
     start_date: datetime,
     end_date: datetime,
     session: AsyncSession = Depends(get_session),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ) -> dict[str, Any]:
     """Get available time slots between start_date and end_date."""
     # Get all bookings in the date range
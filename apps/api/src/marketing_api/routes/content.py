@@ -1,21 +1,32 @@
+import asyncio
+import hashlib
 import json
+import random
 import uuid
+from collections.abc import AsyncIterator
+from datetime import date, datetime, timedelta, timezone
 from typing import Literal
 
 from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, EmailStr
-from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
-from marketing_api.db.models import GeneratedContent, Lead, LeadStatus
-from marketing_api.db.session import get_session
+from marketing_api.db.models import ContentQuota, GeneratedContent, Lead, LeadStatus
+from marketing_api.db.session import get_session, get_sessionmaker
+from marketing_api.db.upsert import dialect_insert
 from marketing_api.limits import limiter
+from marketing_api.llm import llm_gateway
 from marketing_api.routes.public import should_bypass_turnstile, verify_turnstile
 from marketing_api.posthog_client import capture_feature_usage
 from marketing_api.settings import settings
+from marketing_api.utils.sse import sse_event, sse_response
 
 router = APIRouter(prefix="/public/content", tags=["content"])
 
+FREE_MONTHLY_LIMIT = 3
+
 
 class ContentGenerateRequest(BaseModel):
     content_type: Literal["blog_post", "social_media", "email_campaign"]
@@ -24,6 +35,7 @@ class ContentGenerateRequest(BaseModel):
     length: Literal["short", "medium", "long"] = "medium"
     email: EmailStr | None = None
     turnstile_token: str | None = None
+    stream: bool = False
 
 
 def get_content_prompt(
@@ -67,66 +79,70 @@ Requirements:
     return prompts.get(content_type, prompts["blog_post"]), length_words
 
 
-async def generate_content_with_ai(prompt: str, max_tokens: int) -> str:
-    """Generate content using OpenAI API."""
-    if not settings.openai_api_key:
+CONTENT_SYSTEM_PROMPT = "You are a professional content writer specializing in marketing content for local businesses. Write engaging, helpful, and conversion-focused content."
+
+
+def build_content_messages(prompt: str) -> list[dict[str, str]]:
+    return [
+        {"role": "system", "content": CONTENT_SYSTEM_PROMPT},
+        {"role": "user", "content": prompt},
+    ]
+
+
+EMPTY_GENERATION_DETAIL = "Content generation failed: the model returned no content."
+
+
+def ensure_content_generation_available() -> None:
+    if not llm_gateway.configured:
         raise HTTPException(
             status_code=503,
             detail="Content generation is currently unavailable. Please try again later.",
         )
+
+
+async def generate_content_with_ai(prompt: str, max_tokens: int) -> str:
+    """Generate content using OpenAI API."""
+    ensure_content_generation_available()
     
     try:
-        from openai import AsyncOpenAI
-        
-        client = AsyncOpenAI(api_key=settings.openai_api_key)
-        
-        response = await client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are a professional content writer specializing in marketing content for local businesses. Write engaging, helpful, and conversion-focused content.",
-                },
-                {"role": "user", "content": prompt},
-            ],
-            max_tokens=max_tokens,
-            temperature=0.8,
+        completion = await llm_gateway.complete(
+            build_content_messages(prompt), feature="content_generator", max_tokens=max_tokens, temperature=0.8
         )
-        
-        return response.choices[0].message.content or "Content generation failed."
     except Exception as exc:
         raise HTTPException(
             status_code=500, detail=f"Content generation failed: {str(exc)[:100]}"
         ) from exc
+    if not completion.text:
+        raise HTTPException(status_code=500, detail=EMPTY_GENERATION_DETAIL)
+    return completion.text
 
 
-@router.post("/generate", status_code=status.HTTP_200_OK)
+@router.post("/generate", status_code=status.HTTP_200_OK, response_model=None)
 @limiter.limit("10/hour")
 async def generate_content(
     request: Request,
     payload: ContentGenerateRequest,
     session: AsyncSession = Depends(get_session),
-) -> dict:
-    """Generate AI content (blog post, social media, or email)."""
+    sessionmaker: async_sessionmaker[AsyncSession] = Depends(get_sessionmaker),
+) -> dict | StreamingResponse:
+    """Generate AI content (blog post, social media, or email).
+
+    Identical requests (after normalizing the topic) are served a recent
+    earlier generation instead of calling the model again.
+
+    With ``stream`` set, the response is server-sent events: ``token`` events
+    as the content is written, then ``done`` with the usage summary, or
+    ``error`` if generation fails partway.
+    """
     if not should_bypass_turnstile(request):
         await verify_turnstile(payload.turnstile_token)
     
     # Check usage limits (free tier: 3/month, premium: unlimited)
-    usage_count = 0
+    quota_month = current_quota_month()
+    usage_count = None
     if payload.email:
-        # Check monthly usage
-        from datetime import datetime, timezone
-        month_start = datetime.now(timezone.utc).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        usage = await session.execute(
-            select(GeneratedContent)
-            .where(
-                GeneratedContent.email == payload.email,
-                GeneratedContent.created_at >= month_start,
-            )
-        )
-        usage_count = len(usage.scalars().all())
-        # Free tier limit: 3 per month
-        if usage_count >= 3:
+        usage_count = await reserve_quota(session, payload.email, quota_month)
+        if usage_count is None:
             raise HTTPException(
                 status_code=429,
                 detail="Monthly limit reached. Upgrade to premium for unlimited content generation.",
@@ -141,19 +157,165 @@ async def generate_content(
     token_limits = {"short": 300, "medium": 700, "long": 1500}
     max_tokens = token_limits[payload.length]
     
+    cache_key = content_cache_key(payload)
+    cached_text = await cached_content(session, cache_key)
+    if cached_text is not None:
+        await capture_content_lead(session, payload)
+        summary = generation_summary(payload, usage_count, cached=True)
+        if payload.stream:
+            async def cached_events() -> AsyncIterator[str]:
+                yield sse_event("token", {"text": cached_text})
+                yield sse_event("done", summary)
+            
+            return sse_response(cached_events())
+        return {"content": cached_text, **summary}
+    
+    if payload.stream:
+        try:
+            ensure_content_generation_available()
+        except HTTPException:
+            await release_quota(session, payload.email, quota_month)
+            raise
+        
+        async def events() -> AsyncIterator[str]:
+            parts = []
+            stored = False
+            try:
+                async for text in llm_gateway.stream(
+                    build_content_messages(prompt),
+                    feature="content_generator",
+                    max_tokens=max_tokens,
+                    temperature=0.8,
+                ):
+                    parts.append(text)
+                    yield sse_event("token", {"text": text})
+                generated_text = "".join(parts)
+                if not generated_text:
+                    yield sse_event("error", {"detail": EMPTY_GENERATION_DETAIL})
+                    return
+                await store_generated_content(session, payload, prompt, generated_text, cache_key)
+                stored = True
+                yield sse_event("done", generation_summary(payload, usage_count))
+            except Exception as exc:
+                yield sse_event("error", {"detail": f"Content generation failed: {str(exc)[:100]}"})
+            finally:
+                # Unless the content was stored, nothing counts against the quota:
+                # failures, empty answers, and visitors who disconnect mid-stream.
+                if not stored:
+                    await release_quota_detached(sessionmaker, payload.email, quota_month)
+        
+        return sse_response(events())
+    
     # Generate content
-    generated_text = await generate_content_with_ai(prompt, max_tokens)
+    try:
+        generated_text = await generate_content_with_ai(prompt, max_tokens)
+    except HTTPException:
+        await release_quota(session, payload.email, quota_month)
+        raise
+    await store_generated_content(session, payload, prompt, generated_text, cache_key)
     
+    return {"content": generated_text, **generation_summary(payload, usage_count)}
+
+
+def current_quota_month() -> date:
+    return datetime.now(timezone.utc).date().replace(day=1)
+
+
+async def reserve_quota(session: AsyncSession, email: str, month: date) -> int | None:
+    """Count one generation against ``email``'s month; ``None`` if none are left.
+
+    One upsert both checks and increments, so concurrent requests cannot
+    overshoot the limit.
+    """
+    stmt = dialect_insert(session, ContentQuota).values(id=uuid.uuid4(), email=email.lower(), month=month, used=1)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["email", "month"],
+        set_={"used": ContentQuota.used + 1, "updated_at": func.now()},
+        where=ContentQuota.used < FREE_MONTHLY_LIMIT,
+    ).returning(ContentQuota.used)
+    used = (await session.execute(stmt)).scalar_one_or_none()
+    await session.commit()
+    return used
+
+
+_releases: set[asyncio.Task] = set()
+
+
+async def release_quota_detached(
+    sessionmaker: async_sessionmaker[AsyncSession], email: str | None, month: date
+) -> None:
+    """``release_quota`` in a task and session of its own.
+
+    For cleanup in a stream the client may have cancelled: the request's
+    session can be mid-operation, and the release finishes even if this
+    await is cancelled again.
+    """
+    if not email:
+        return
+
+    async def release() -> None:
+        async with sessionmaker() as session:
+            await release_quota(session, email, month)
+
+    task = asyncio.create_task(release())
+    _releases.add(task)
+    task.add_done_callback(_releases.discard)
+    await asyncio.shield(task)
+
+
+async def release_quota(session: AsyncSession, email: str | None, month: date) -> None:
+    """Give back a reservation whose generation failed."""
+    if not email:
+        return
+    await session.execute(
+        update(ContentQuota)
+        .where(ContentQuota.email == email.lower(), ContentQuota.month == month, ContentQuota.used > 0)
+        .values(used=ContentQuota.used - 1)
+    )
+    await session.commit()
+
+
+def content_cache_key(payload: ContentGenerateRequest) -> str:
+    topic = " ".join(payload.topic.lower().split()).strip(" .!?")
+    parts = [llm_gateway.model, payload.content_type, topic, payload.tone, payload.length]
+    return hashlib.sha256(json.dumps(parts).encode()).hexdigest()
+
+
+async def cached_content(session: AsyncSession, cache_key: str) -> str | None:
+    """A recent generation for the same request, once enough variants exist."""
+    variants = settings.content_cache_variants
+    if variants <= 0:
+        return None
+    since = datetime.now(timezone.utc) - timedelta(days=settings.content_cache_max_age_days)
+    result = await session.execute(
+        select(GeneratedContent.generated_text)
+        .where(GeneratedContent.cache_key == cache_key, GeneratedContent.created_at >= since)
+        .order_by(GeneratedContent.created_at.desc())
+        .limit(variants)
+    )
+    texts = result.scalars().all()
+    if len(texts) < variants:
+        return None
+    return random.choice(texts)
+
+
+async def store_generated_content(
+    session: AsyncSession, payload: ContentGenerateRequest, prompt: str, generated_text: str, cache_key: str
+) -> None:
     # Store in database
     content = GeneratedContent(
         email=payload.email,
         content_type=payload.content_type,
         prompt=prompt,
         generated_text=generated_text,
+        cache_key=cache_key,
     )
     session.add(content)
     await session.commit()
-    
+    await capture_content_lead(session, payload)
+
+
+async def capture_content_lead(session: AsyncSession, payload: ContentGenerateRequest) -> None:
     # If email provided, capture as lead
     if payload.email:
         from marketing_api.routes.public import upsert_lead
@@ -165,11 +327,13 @@ async def generate_content(
             details=f"Content generation requested\nType: {payload.content_type}\nTopic: {payload.topic}",
             source="content-generator",
         )
-    
+
+
+def generation_summary(payload: ContentGenerateRequest, usage_count: int | None, *, cached: bool = False) -> dict:
     return {
-        "content": generated_text,
         "content_type": payload.content_type,
         "topic": payload.topic,
-        "usage_count": usage_count + 1 if payload.email else None,
-        "limit": 3,
+        "usage_count": usage_count,
+        "limit": FREE_MONTHLY_LIMIT,
+        "cached": cached,
     }
@@ -1,20 +1,41 @@
 import logging
-from datetime import datetime, timezone
+from datetime import date, datetime, timedelta, timezone
 from typing import Any
-from uuid import UUID
+from uuid import UUID, uuid4
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, EmailStr
-from sqlalchemy import func, select
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import DateTime, func, literal, select, true
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from marketing_api.auth.dependencies import get_current_user
-from marketing_api.db.models import EmailCampaign, EmailSequence, EmailSend, EmailSubscriber, Lead, NewsletterSignup, User
-from marketing_api.db.session import get_session
+from marketing_api.auth.principal import Principal
+from marketing_api.db.aggregates import count_by_parent, utc_day_column
+from marketing_api.db.pagination import CountMode, count_rows, keyset_page, split_page
+from marketing_api.db.models import (
+    EmailCampaign,
+    EmailDailyStat,
+    EmailSequence,
+    EmailSend,
+    EmailSubscriber,
+    Lead,
+    NewsletterSignup,
+)
+from marketing_api.db.session import get_session, get_sessionmaker
+from marketing_api.db.upsert import dialect_insert
+from marketing_api.settings import settings
+from marketing_api.utils.exports import ExportFormat, export_response
 
 router = APIRouter(prefix="/admin/email", tags=["email-admin"])
 logger = logging.getLogger(__name__)
 
+SEND_METRICS = {
+    "sends": None,
+    "opens": EmailSend.opened_at.isnot(None),
+    "clicks": EmailSend.clicked_at.isnot(None),
+}
+
 
 # Request/Response Models
 class CampaignCreate(BaseModel):
@@ -52,7 +73,7 @@ class SubscriberUpdate(BaseModel):
 @router.get("/campaigns")
 async def list_campaigns(
     session: AsyncSession = Depends(get_session),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ) -> dict[str, Any]:
     """List all email campaigns."""
     result = await session.execute(select(EmailCampaign).order_by(EmailCampaign.created_at.desc()))
@@ -92,7 +113,7 @@ async def list_campaigns(
 async def create_campaign(
     payload: CampaignCreate,
     session: AsyncSession = Depends(get_session),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ) -> dict[str, Any]:
     """Create a new email campaign."""
     campaign = EmailCampaign(
@@ -117,7 +138,7 @@ async def update_campaign(
     campaign_id: UUID,
     payload: CampaignUpdate,
     session: AsyncSession = Depends(get_session),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ) -> dict[str, Any]:
     """Update an email campaign."""
     result = await session.execute(select(EmailCampaign).where(EmailCampaign.id == campaign_id))
@@ -146,7 +167,7 @@ async def update_campaign(
 async def delete_campaign(
     campaign_id: UUID,
     session: AsyncSession = Depends(get_session),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ) -> None:
     """Delete an email campaign (cascades to sequences)."""
     result = await session.execute(select(EmailCampaign).where(EmailCampaign.id == campaign_id))
@@ -164,7 +185,7 @@ async def delete_campaign(
 async def list_sequences(
     campaign_id: UUID,
     session: AsyncSession = Depends(get_session),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ) -> dict[str, Any]:
     """List sequences for a campaign."""
     result = await session.execute(
@@ -173,15 +194,14 @@ async def list_sequences(
         .order_by(EmailSequence.step_number)
     )
     sequences = result.scalars().all()
-    
+
+    send_counts = await count_by_parent(
+        session, EmailSend.sequence_id, [seq.id for seq in sequences], SEND_METRICS
+    )
+
     sequences_data = []
     for seq in sequences:
-        # Count sends
-        send_count = await session.execute(
-            select(func.count(EmailSend.id)).where(EmailSend.sequence_id == seq.id)
-        )
-        sends = send_count.scalar() or 0
-        
+        counts = send_counts[seq.id]
         sequences_data.append({
             "id": str(seq.id),
             "campaign_id": str(seq.campaign_id),
@@ -189,7 +209,9 @@ async def list_sequences(
             "delay_days": seq.delay_days,
             "subject": seq.subject,
             "body": seq.body,
-            "sends": sends,
+            "sends": counts["sends"],
+            "opens": counts["opens"],
+            "clicks": counts["clicks"],
             "created_at": seq.created_at.isoformat() if seq.created_at else None,
         })
     
@@ -200,7 +222,7 @@ async def list_sequences(
 async def create_sequence(
     payload: SequenceCreate,
     session: AsyncSession = Depends(get_session),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ) -> dict[str, Any]:
     """Create a new email sequence."""
     # Verify campaign exists
@@ -236,7 +258,7 @@ async def update_sequence(
     sequence_id: UUID,
     payload: SequenceUpdate,
     session: AsyncSession = Depends(get_session),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ) -> dict[str, Any]:
     """Update an email sequence."""
     result = await session.execute(select(EmailSequence).where(EmailSequence.id == sequence_id))
@@ -271,7 +293,7 @@ async def update_sequence(
 async def delete_sequence(
     sequence_id: UUID,
     session: AsyncSession = Depends(get_session),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ) -> None:
     """Delete an email sequence."""
     result = await session.execute(select(EmailSequence).where(EmailSequence.id == sequence_id))
@@ -285,67 +307,75 @@ async def delete_sequence(
 
 
 # Subscriber Management
+# subscribed_at is nullable; keyset paging needs a non-NULL sort key.
+NEVER_SUBSCRIBED = datetime(1970, 1, 1, tzinfo=timezone.utc)
+SUBSCRIBED_AT_KEY = func.coalesce(
+    EmailSubscriber.subscribed_at, literal(NEVER_SUBSCRIBED, DateTime(timezone=True))
+)
+
+
 @router.get("/subscribers")
 async def list_subscribers(
     status_filter: str | None = None,
-    limit: int = 100,
+    limit: int = Query(100, ge=1, le=500),
     offset: int = 0,
+    cursor: str | None = None,
+    count: CountMode = "exact",
     session: AsyncSession = Depends(get_session),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ) -> dict[str, Any]:
-    """List email subscribers with optional filtering."""
+    """List email subscribers with optional filtering.
+
+    Pass ``next_cursor`` back as ``cursor`` to page by keyset on
+    (subscribed_at, id), with subscribers missing ``subscribed_at`` last;
+    ``offset`` is kept for older clients.
+    """
     query = select(EmailSubscriber)
     
     if status_filter:
         query = query.where(EmailSubscriber.status == status_filter)
     
-    query = query.order_by(EmailSubscriber.subscribed_at.desc()).limit(limit).offset(offset)
+    try:
+        query = keyset_page(
+            query, SUBSCRIBED_AT_KEY, EmailSubscriber.id, cursor=cursor, limit=limit
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    if offset and not cursor:
+        query = query.offset(offset)
     
     result = await session.execute(query)
-    subscribers = result.scalars().all()
+    subscribers, next_cursor = split_page(
+        result.scalars().all(), limit, "subscribed_at", default=NEVER_SUBSCRIBED
+    )
     
-    # Get total count
-    count_query = select(func.count(EmailSubscriber.id))
-    if status_filter:
-        count_query = count_query.where(EmailSubscriber.status == status_filter)
-    total_result = await session.execute(count_query)
-    total = total_result.scalar() or 0
-    
-    # Optimize: Batch query for send counts
-    subscriber_ids = [sub.id for sub in subscribers]
-    if subscriber_ids:
-        send_counts = await session.execute(
-            select(EmailSend.subscriber_id, func.count(EmailSend.id).label("count"))
-            .where(EmailSend.subscriber_id.in_(subscriber_ids))
-            .group_by(EmailSend.subscriber_id)
-        )
-        send_count_map = {str(row[0]): row[1] for row in send_counts.all()}
-        
-        open_counts = await session.execute(
-            select(EmailSend.subscriber_id, func.count(EmailSend.id).label("count"))
-            .where(
-                EmailSend.subscriber_id.in_(subscriber_ids),
-                EmailSend.opened_at.isnot(None),
-            )
-            .group_by(EmailSend.subscriber_id)
+    total = None
+    if count != "none":
+        count_query = select(func.count(EmailSubscriber.id))
+        if status_filter:
+            count_query = count_query.where(EmailSubscriber.status == status_filter)
+        total = await count_rows(
+            session,
+            count_query,
+            table_name=EmailSubscriber.__tablename__,
+            approximate=count == "approximate" and not status_filter,
         )
-        open_count_map = {str(row[0]): row[1] for row in open_counts.all()}
-    else:
-        send_count_map = {}
-        open_count_map = {}
+    
+    send_counts = await count_by_parent(
+        session, EmailSend.subscriber_id, [sub.id for sub in subscribers], SEND_METRICS
+    )
     
     subscribers_data = []
     for sub in subscribers:
-        sends = send_count_map.get(str(sub.id), 0)
-        opens = open_count_map.get(str(sub.id), 0)
+        counts = send_counts[sub.id]
         
         subscribers_data.append({
             "id": str(sub.id),
             "email": sub.email,
             "status": sub.status,
             "tags": sub.tags,
-            "sends": sends,
-            "opens": opens,
+            "sends": counts["sends"],
+            "opens": counts["opens"],
             "subscribed_at": sub.subscribed_at.isoformat() if sub.subscribed_at else None,
         })
     
@@ -354,15 +384,36 @@ async def list_subscribers(
         "total": total,
         "limit": limit,
         "offset": offset,
+        "next_cursor": next_cursor,
     }
 
 
+@router.get("/subscribers/export")
+async def export_subscribers(
+    status_filter: str | None = None,
+    export_format: ExportFormat = Query("csv", alias="format"),
+    sessionmaker: async_sessionmaker[AsyncSession] = Depends(get_sessionmaker),
+    current_user: Principal = Depends(get_current_user),
+) -> StreamingResponse:
+    """Stream all subscribers as CSV or NDJSON."""
+    query = select(EmailSubscriber).order_by(EmailSubscriber.subscribed_at, EmailSubscriber.id)
+    if status_filter:
+        query = query.where(EmailSubscriber.status == status_filter)
+    return export_response(
+        query,
+        ["id", "email", "status", "tags", "subscribed_at"],
+        export_format=export_format,
+        filename="subscribers",
+        sessionmaker=sessionmaker,
+    )
+
+
 @router.put("/subscribers/{subscriber_id}")
 async def update_subscriber(
     subscriber_id: UUID,
     payload: SubscriberUpdate,
     session: AsyncSession = Depends(get_session),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ) -> dict[str, Any]:
     """Update a subscriber."""
     result = await session.execute(
@@ -393,7 +444,7 @@ async def update_subscriber(
 async def delete_subscriber(
     subscriber_id: UUID,
     session: AsyncSession = Depends(get_session),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ) -> None:
     """Delete a subscriber."""
     result = await session.execute(
@@ -409,89 +460,300 @@ async def delete_subscriber(
 
 
 # Analytics & Statistics
+def _rate(part: int, total: int) -> float:
+    return round(part / total * 100, 2) if total > 0 else 0
+
+
+async def rollup_email_daily_stats(session: AsyncSession, lookback_days: int | None = None) -> int:
+    """Re-aggregate recent sends into email_daily_stats.
+
+    Sends are bucketed by the UTC day they went out; opens and clicks are
+    credited to the day of the send they belong to. Because opens and clicks
+    arrive after the send, the trailing window is recomputed on every run.
+    Stat rows in the window with no sends behind them any more are zeroed.
+    Called by background task.
+    """
+    lookback = lookback_days if lookback_days is not None else settings.email_rollup_lookback_days
+    since_day = datetime.now(timezone.utc).date() - timedelta(days=lookback)
+    since = datetime.combine(since_day, datetime.min.time(), tzinfo=timezone.utc)
+
+    day = utc_day_column(session, EmailSend.sent_at)
+    aggregated = await session.execute(
+        select(
+            day,
+            EmailSequence.campaign_id,
+            EmailSend.sequence_id,
+            func.count(EmailSend.id),
+            func.count(EmailSend.id).filter(EmailSend.opened_at.isnot(None)),
+            func.count(EmailSend.id).filter(EmailSend.clicked_at.isnot(None)),
+        )
+        .join(EmailSequence, EmailSequence.id == EmailSend.sequence_id)
+        .where(EmailSend.sent_at >= since)
+        .group_by(day, EmailSequence.campaign_id, EmailSend.sequence_id)
+    )
+    exact: dict[tuple[date, UUID], dict[str, Any]] = {}
+    for send_day, campaign_id, sequence_id, sends, opens, clicks in aggregated:
+        # SQLite returns the day as text.
+        send_day = send_day if isinstance(send_day, date) else date.fromisoformat(send_day)
+        exact[(send_day, sequence_id)] = {
+            "campaign_id": campaign_id,
+            "sends": sends,
+            "opens": opens,
+            "clicks": clicks,
+        }
+
+    existing = await session.execute(
+        select(EmailDailyStat.day, EmailDailyStat.sequence_id, EmailDailyStat.campaign_id).where(
+            EmailDailyStat.day >= since_day
+        )
+    )
+    for stat_day, sequence_id, campaign_id in existing:
+        exact.setdefault(
+            (stat_day, sequence_id), {"campaign_id": campaign_id, "sends": 0, "opens": 0, "clicks": 0}
+        )
+    if not exact:
+        return 0
+    rows = [
+        {"id": uuid4(), "day": stat_day, "sequence_id": sequence_id, **counts}
+        for (stat_day, sequence_id), counts in exact.items()
+    ]
+
+    stmt = dialect_insert(session, EmailDailyStat)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["day", "sequence_id"],
+        set_={
+            "sends": stmt.excluded.sends,
+            "opens": stmt.excluded.opens,
+            "clicks": stmt.excluded.clicks,
+            "updated_at": func.now(),
+        },
+    )
+    # Sorted so overlapping runs lock rows in the same order.
+    await session.execute(stmt, sorted(rows, key=lambda row: (row["day"], str(row["sequence_id"]))))
+    await session.commit()
+    return len(rows)
+
+
 @router.get("/analytics")
 async def get_email_analytics(
     session: AsyncSession = Depends(get_session),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ) -> dict[str, Any]:
-    """Get email automation analytics."""
-    # Total subscribers
-    total_subs = await session.execute(select(func.count(EmailSubscriber.id)))
-    total_subscribers = total_subs.scalar() or 0
-    
-    # Active subscribers
-    active_subs = await session.execute(
-        select(func.count(EmailSubscriber.id)).where(EmailSubscriber.status == "active")
-    )
-    active_subscribers = active_subs.scalar() or 0
-    
-    # Total campaigns
-    total_camps = await session.execute(select(func.count(EmailCampaign.id)))
-    total_campaigns = total_camps.scalar() or 0
-    
-    # Active campaigns
-    active_camps = await session.execute(
-        select(func.count(EmailCampaign.id)).where(EmailCampaign.status == "active")
-    )
-    active_campaigns = active_camps.scalar() or 0
-    
-    # Total sends
-    total_sends_result = await session.execute(select(func.count(EmailSend.id)))
-    total_sends = total_sends_result.scalar() or 0
-    
-    # Opens
-    opens_result = await session.execute(
-        select(func.count(EmailSend.id)).where(EmailSend.opened_at.isnot(None))
-    )
-    opens = opens_result.scalar() or 0
-    
-    # Clicks
-    clicks_result = await session.execute(
-        select(func.count(EmailSend.id)).where(EmailSend.clicked_at.isnot(None))
-    )
-    clicks = clicks_result.scalar() or 0
-    
-    # Open rate
-    open_rate = (opens / total_sends * 100) if total_sends > 0 else 0
-    
-    # Click rate
-    click_rate = (clicks / total_sends * 100) if total_sends > 0 else 0
-    
-    # Recent activity (last 30 days)
-    thirty_days_ago = datetime.now(timezone.utc) - timedelta(days=30)
-    recent_sends = await session.execute(
-        select(func.count(EmailSend.id))
-        .where(EmailSend.sent_at >= thirty_days_ago)
-    )
-    recent_sends_count = recent_sends.scalar() or 0
-    
+    """Get email automation analytics.
+
+    Subscriber and campaign totals come from one FILTER aggregate; send
+    totals are summed from the daily rollup so the cost tracks days, not sends.
+    The rollup only covers sends that went out, so queued and failed sends
+    (no ``sent_at``) are counted from the indexed column and added to
+    ``sends.total``.
+    """
+    subscriber_counts = select(
+        func.count(EmailSubscriber.id).label("subscribers_total"),
+        func.count(EmailSubscriber.id)
+        .filter(EmailSubscriber.status == "active")
+        .label("subscribers_active"),
+    ).subquery()
+    campaign_counts = select(
+        func.count(EmailCampaign.id).label("campaigns_total"),
+        func.count(EmailCampaign.id)
+        .filter(EmailCampaign.status == "active")
+        .label("campaigns_active"),
+    ).subquery()
+    # Both subqueries return a single row; join them explicitly.
+    counts = (
+        await session.execute(
+            select(subscriber_counts, campaign_counts).select_from(
+                subscriber_counts.join(campaign_counts, true())
+            )
+        )
+    ).one()
+
+    thirty_days_ago = datetime.now(timezone.utc).date() - timedelta(days=30)
+    send_totals = (
+        await session.execute(
+            select(
+                func.coalesce(func.sum(EmailDailyStat.sends), 0),
+                func.coalesce(func.sum(EmailDailyStat.opens), 0),
+                func.coalesce(func.sum(EmailDailyStat.clicks), 0),
+                func.coalesce(
+                    func.sum(EmailDailyStat.sends).filter(EmailDailyStat.day >= thirty_days_ago), 0
+                ),
+            )
+        )
+    ).one()
+    sent, opens, clicks, recent_sends_count = (int(value) for value in send_totals)
+    unsent = await session.scalar(select(func.count(EmailSend.id)).where(EmailSend.sent_at.is_(None)))
+    total_sends = sent + (unsent or 0)
+
     return {
         "subscribers": {
-            "total": total_subscribers,
-            "active": active_subscribers,
-            "unsubscribed": total_subscribers - active_subscribers,
+            "total": counts.subscribers_total,
+            "active": counts.subscribers_active,
+            "unsubscribed": counts.subscribers_total - counts.subscribers_active,
         },
         "campaigns": {
-            "total": total_campaigns,
-            "active": active_campaigns,
-            "draft": total_campaigns - active_campaigns,
+            "total": counts.campaigns_total,
+            "active": counts.campaigns_active,
+            "draft": counts.campaigns_total - counts.campaigns_active,
         },
         "sends": {
             "total": total_sends,
             "opens": opens,
             "clicks": clicks,
-            "open_rate": round(open_rate, 2),
-            "click_rate": round(click_rate, 2),
+            "open_rate": _rate(opens, total_sends),
+            "click_rate": _rate(clicks, total_sends),
             "recent_30_days": recent_sends_count,
         },
     }
 
 
+@router.get("/analytics/daily")
+async def get_daily_email_analytics(
+    days: int = Query(30, ge=1, le=365),
+    campaign_id: UUID | None = None,
+    session: AsyncSession = Depends(get_session),
+    current_user: Principal = Depends(get_current_user),
+) -> dict[str, Any]:
+    """Per-day sends/opens/clicks, optionally scoped to one campaign."""
+    end_day = datetime.now(timezone.utc).date()
+    start_day = end_day - timedelta(days=days - 1)
+
+    query = (
+        select(
+            EmailDailyStat.day,
+            func.sum(EmailDailyStat.sends),
+            func.sum(EmailDailyStat.opens),
+            func.sum(EmailDailyStat.clicks),
+        )
+        .where(EmailDailyStat.day >= start_day)
+        .group_by(EmailDailyStat.day)
+    )
+    if campaign_id:
+        query = query.where(EmailDailyStat.campaign_id == campaign_id)
+
+    rows = {row[0]: row for row in (await session.execute(query)).all()}
+
+    series = []
+    for offset in range(days):
+        day = start_day + timedelta(days=offset)
+        row = rows.get(day)
+        sends, opens, clicks = (int(row[1]), int(row[2]), int(row[3])) if row else (0, 0, 0)
+        series.append({
+            "day": day.isoformat(),
+            "sends": sends,
+            "opens": opens,
+            "clicks": clicks,
+        })
+
+    return {
+        "start": start_day.isoformat(),
+        "end": end_day.isoformat(),
+        "campaign_id": str(campaign_id) if campaign_id else None,
+        "series": series,
+    }
+
+
+@router.get("/analytics/campaigns")
+async def get_campaign_email_analytics(
+    days: int | None = Query(None, ge=1, le=365),
+    session: AsyncSession = Depends(get_session),
+    current_user: Principal = Depends(get_current_user),
+) -> dict[str, Any]:
+    """Send/open/click totals per campaign, all-time or over the last N days."""
+    totals = select(
+        EmailDailyStat.campaign_id,
+        func.sum(EmailDailyStat.sends).label("sends"),
+        func.sum(EmailDailyStat.opens).label("opens"),
+        func.sum(EmailDailyStat.clicks).label("clicks"),
+    ).group_by(EmailDailyStat.campaign_id)
+    if days:
+        totals = totals.where(
+            EmailDailyStat.day >= datetime.now(timezone.utc).date() - timedelta(days=days - 1)
+        )
+    totals = totals.subquery()
+
+    result = await session.execute(
+        select(EmailCampaign, totals.c.sends, totals.c.opens, totals.c.clicks)
+        .outerjoin(totals, totals.c.campaign_id == EmailCampaign.id)
+        .order_by(EmailCampaign.created_at.desc())
+    )
+
+    campaigns_data = []
+    for campaign, sends, opens, clicks in result.all():
+        sends, opens, clicks = int(sends or 0), int(opens or 0), int(clicks or 0)
+        campaigns_data.append({
+            "id": str(campaign.id),
+            "name": campaign.name,
+            "status": campaign.status,
+            "sends": sends,
+            "opens": opens,
+            "clicks": clicks,
+            "open_rate": _rate(opens, sends),
+            "click_rate": _rate(clicks, sends),
+        })
+
+    return {"days": days, "campaigns": campaigns_data}
+
+
+@router.get("/analytics/campaigns/{campaign_id}/funnel")
+async def get_campaign_funnel(
+    campaign_id: UUID,
+    session: AsyncSession = Depends(get_session),
+    current_user: Principal = Depends(get_current_user),
+) -> dict[str, Any]:
+    """Per-step funnel (sends -> opens -> clicks) for a campaign's sequences."""
+    campaign = await session.get(EmailCampaign, campaign_id)
+    if not campaign:
+        raise HTTPException(status_code=404, detail="Campaign not found")
+
+    totals = (
+        select(
+            EmailDailyStat.sequence_id,
+            func.sum(EmailDailyStat.sends).label("sends"),
+            func.sum(EmailDailyStat.opens).label("opens"),
+            func.sum(EmailDailyStat.clicks).label("clicks"),
+        )
+        .where(EmailDailyStat.campaign_id == campaign_id)
+        .group_by(EmailDailyStat.sequence_id)
+        .subquery()
+    )
+    result = await session.execute(
+        select(EmailSequence, totals.c.sends, totals.c.opens, totals.c.clicks)
+        .outerjoin(totals, totals.c.sequence_id == EmailSequence.id)
+        .where(EmailSequence.campaign_id == campaign_id)
+        .order_by(EmailSequence.step_number)
+    )
+
+    steps = []
+    first_step_sends = None
+    for sequence, sends, opens, clicks in result.all():
+        sends, opens, clicks = int(sends or 0), int(opens or 0), int(clicks or 0)
+        if first_step_sends is None:
+            first_step_sends = sends
+        steps.append({
+            "sequence_id": str(sequence.id),
+            "step_number": sequence.step_number,
+            "subject": sequence.subject,
+            "sends": sends,
+            "opens": opens,
+            "clicks": clicks,
+            "open_rate": _rate(opens, sends),
+            "click_rate": _rate(clicks, sends),
+            "retention_rate": _rate(sends, first_step_sends or 0),
+        })
+
+    return {
+        "campaign_id": str(campaign.id),
+        "name": campaign.name,
+        "steps": steps,
+    }
+
+
 # Form-to-Campaign Mapping
 @router.get("/form-sources")
 async def get_form_sources(
     session: AsyncSession = Depends(get_session),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ) -> dict[str, Any]:
     """Get all form sources that can be mapped to campaigns."""
     # Get all unique lead sources
@@ -1,7 +1,9 @@
+import asyncio
 from datetime import datetime, timezone
 from typing import Any
 
 from fastapi import APIRouter, Depends
+from fastapi.responses import JSONResponse
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -16,6 +18,24 @@ async def health_check() -> dict[str, str]:
     return {"status": "ok"}
 
 
+@router.get("/health/live")
+async def liveness_check() -> dict[str, str]:
+    """Liveness probe: the process is up and serving requests."""
+    return {"status": "ok"}
+
+
+@router.get("/health/ready", response_model=None)
+async def readiness_check(
+    session: AsyncSession = Depends(get_session),
+) -> dict[str, str] | JSONResponse:
+    """Readiness probe: a single ``SELECT 1`` with a short timeout."""
+    try:
+        await asyncio.wait_for(session.execute(text("SELECT 1")), timeout=2.0)
+    except Exception:
+        return JSONResponse(status_code=503, content={"status": "unavailable", "database": "unreachable"})
+    return {"status": "ok", "database": "ok"}
+
+
 @router.get("/health/detailed")
 async def detailed_health_check(
     session: AsyncSession = Depends(get_session),
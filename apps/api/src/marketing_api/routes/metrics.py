@@ -0,0 +1,26 @@
+import secrets
+
+from fastapi import APIRouter, Header, HTTPException
+from fastapi.responses import PlainTextResponse
+
+from marketing_api.metrics import refresh_celery_queue_length, registry
+from marketing_api.settings import settings
+
+router = APIRouter()
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics(authorization: str | None = Header(default=None)) -> PlainTextResponse:
+    """Prometheus scrape endpoint; requires METRICS_TOKEN as a bearer token.
+
+    Only development serves it without a token.
+    """
+    token = settings.metrics_token
+    if not token and settings.app_env != "development":
+        raise HTTPException(status_code=403, detail="Metrics are disabled until METRICS_TOKEN is set.")
+    if token and not secrets.compare_digest(authorization or "", f"Bearer {token}"):
+        raise HTTPException(status_code=401, detail="Invalid metrics token.")
+    await refresh_celery_queue_length(settings.celery_broker_url)
+    return PlainTextResponse(registry.render(), media_type=CONTENT_TYPE)
@@ -12,6 +12,7 @@ from marketing_api.db.models import BugReport, ChatMessage, Lead, LeadStatus, Ne
 from marketing_api.posthog_client import capture_conversion, capture_feature_usage, identify_user
 from marketing_api.db.session import get_session
 from marketing_api.limits import limiter
+from marketing_api.metrics import observe_outbound
 from marketing_api.notifications.email import notify_admin, send_email
 from marketing_api.notifications.pushover import send_pushover
 from marketing_api.settings import settings
@@ -100,12 +101,13 @@ async def verify_turnstile(token: str | None) -> None:
         raise HTTPException(status_code=400, detail="Bot verification failed.")
 
     try:
-        async with httpx.AsyncClient(timeout=5.0) as client:
-            response = await client.post(
-                "https://challenges.cloudflare.com/turnstile/v0/siteverify",
-                data={"secret": secret, "response": token},
-            )
-            payload = response.json()
+        with observe_outbound("turnstile"):
+            async with httpx.AsyncClient(timeout=5.0) as client:
+                response = await client.post(
+                    "https://challenges.cloudflare.com/turnstile/v0/siteverify",
+                    data={"secret": secret, "response": token},
+                )
+                payload = response.json()
     except Exception as exc:
         raise HTTPException(status_code=400, detail="Bot verification failed.") from exc
 
@@ -27,6 +27,12 @@ class Settings(BaseSettings):
     jwt_secret: str = "change_me"
     jwt_algorithm: str = "HS256"
     access_token_expire_minutes: int = 60
+    jwt_embed_roles: bool = False
+    auth_principal_cache_ttl_seconds: int = 30
+    argon2_time_cost: int = 3
+    argon2_memory_cost: int = 65536
+    argon2_parallelism: int = 4
+    password_hash_workers: int = 2
     session_secret: str = "change_me"
     stripe_secret_key: str = "sk_test_change_me"
     stripe_webhook_secret: str = "whsec_change_me"
@@ -46,9 +52,31 @@ class Settings(BaseSettings):
     posthog_personal_api_key: str | None = None
     posthog_personal_key: str | None = None  # Alternative name support (POSTHOG_PERSONAL_KEY env var)
     posthog_host: str = "https://app.posthog.com"
+    posthog_exclude_paths: str = "/health,/metrics"
+    posthog_performance_sample_rate: float = 1.0
+    analytics_buffer_size: int = 10000
+    analytics_batch_size: int = 100
+    analytics_flush_interval_seconds: float = 2.0
+    analytics_request_timeout_seconds: float = 5.0
     turnstile_secret_key: str | None = None
     rate_limit_token: str | None = None
+    rate_limit_storage_url: str | None = None
+    rate_limit_trusted_proxies: str = "127.0.0.1,::1"
     internal_api_token: str | None = None
+    metrics_token: str | None = None
+    sql_profiling_enabled: bool = False
+    sql_budget_statements: int = 25
+    sql_budget_ms: float = 250.0
+    sql_repeat_threshold: int = 5
+    loop_stall_threshold_seconds: float = 0.5
+    loop_watchdog_interval_seconds: float = 0.1
+    experiment_config_ttl_seconds: float = 30.0
+    assignment_buffer_size: int = 50000
+    assignment_batch_size: int = 500
+    assignment_flush_interval_seconds: float = 1.0
+    conversion_buffer_size: int = 50000
+    conversion_batch_size: int = 1000
+    conversion_flush_interval_seconds: float = 1.0
     disable_docs: bool = False
     smtp_host: str | None = None
     smtp_port: int = 587
@@ -60,9 +88,34 @@ class Settings(BaseSettings):
     pushover_app_token: str | None = None
     pushover_user_key: str | None = None
     pushover_group_key: str | None = None
+    alert_window_seconds: float = 300.0
     openai_api_key: str | None = None
+    openai_base_url: str | None = None
+    openai_model: str = "gpt-3.5-turbo"
+    openai_timeout_seconds: float = 30.0
+    openai_max_retries: int = 2
+    openai_max_connections: int = 20
+    openai_embedding_model: str = "text-embedding-3-small"
+    chat_cache_ttl_seconds: float = 21600.0
+    chat_cache_size: int = 1000
+    chat_cache_semantic: bool = False
+    chat_cache_similarity_threshold: float = 0.92
+    chat_history_turns: int = 5
+    chat_history_token_budget: int = 1000
+    chat_transcript_redis_url: str | None = None  # set when more than one API process serves chat
+    chat_transcript_ttl_seconds: int = 86400
+    content_cache_variants: int = 1  # generations kept per request before reusing them; 0 disables
+    content_cache_max_age_days: int = 30
     celery_broker_url: str = "redis://redis:6379/0"
     celery_result_backend: str = "redis://redis:6379/0"
+    email_rollup_lookback_days: int = 30
+    experiment_reconcile_lookback_days: int = 7
+    graphql_max_depth: int = 10
+    graphql_cost_budget_anonymous: int = 100
+    graphql_cost_budget_user: int = 10000
+    graphql_cost_budget_manager: int = 25000
+    graphql_cost_budget_admin: int = 50000
+    graphql_persisted_query_cache_size: int = 1000
 
     model_config = SettingsConfigDict(
         env_file=(str(ROOT_DIR / ".env"), ".env"), extra="ignore"
@@ -78,6 +131,8 @@ class Settings(BaseSettings):
                 raise ValueError("Insecure 'session_secret' detected in production!")
             if self.stripe_secret_key in unsafe_defaults:
                 raise ValueError("Insecure 'stripe_secret_key' detected in production!")
+            if self.metrics_token in unsafe_defaults:
+                raise ValueError("Insecure 'metrics_token' detected in production!")
 
         # Support both POSTHOG_PERSONAL_API_KEY and POSTHOG_PERSONAL_KEY
         # Check environment variable directly if not set via Pydantic
@@ -1,14 +1,14 @@
 import asyncio
 from marketing_api.celery_app import celery_app
 from marketing_api.db.session import get_session
+from marketing_api.routes.email_admin import rollup_email_daily_stats
 from marketing_api.routes.email_automation import process_email_queue
 
-@celery_app.task
-def process_email_queue_task():
-    """Celery task to process the email queue."""
+
+def _run_with_session(handler) -> None:
     async def _run():
         async for session in get_session():
-            await process_email_queue(session)
+            await handler(session)
             break
 
     try:
@@ -18,3 +18,15 @@ def process_email_queue_task():
         asyncio.set_event_loop(loop)
 
     loop.run_until_complete(_run())
+
+
+@celery_app.task
+def process_email_queue_task():
+    """Celery task to process the email queue."""
+    _run_with_session(process_email_queue)
+
+
+@celery_app.task
+def rollup_email_stats_task():
+    """Celery task to refresh the daily email stats rollup."""
+    _run_with_session(rollup_email_daily_stats)
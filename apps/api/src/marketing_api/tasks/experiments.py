@@ -0,0 +1,16 @@
+from marketing_api.celery_app import celery_app
+from marketing_api.experiments.bandit import update_bandit_weights
+from marketing_api.experiments.counters import reconcile_test_daily_stats
+from marketing_api.tasks.email import _run_with_session
+
+
+@celery_app.task
+def reconcile_test_stats_task():
+    """Celery task to correct drift in the A/B test daily counters."""
+    _run_with_session(reconcile_test_daily_stats)
+
+
+@celery_app.task
+def update_bandit_weights_task():
+    """Celery task to publish Thompson sampling weights for bandit tests."""
+    _run_with_session(update_bandit_weights)
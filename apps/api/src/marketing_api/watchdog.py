@@ -0,0 +1,158 @@
+"""Always-on detector for code that blocks the event loop.
+
+Builds on the ``LoopLagMonitor`` tick rather than running a timer of its
+own. A daemon thread checks the monitor's last tick every ``interval``
+seconds; once a tick is more than ``threshold`` overdue the loop is stuck in
+synchronous code, so the thread grabs the loop thread's current stack (which
+points at the blocking call) and the request the running task is serving.
+The monitor's next lag sample, taken when the loop is free again, measures
+the stall and reports it.
+"""
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+import weakref
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from starlette.types import Scope
+
+from marketing_api.metrics import LoopLagMonitor, loop_lag_monitor, registry
+from marketing_api.notifications.alerts import alert_aggregator
+from marketing_api.settings import settings
+
+logger = logging.getLogger(__name__)
+
+loop_stalls = registry.counter(
+    "event_loop_stalls",
+    "Event loop stalls longer than the watchdog threshold, by route.",
+    ("route",),
+)
+loop_stall_duration = registry.histogram(
+    "event_loop_stall_seconds",
+    "How long the event loop was blocked, for stalls over the threshold.",
+    buckets=(0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+
+# Request scope served by each running task, so a stall can name its route.
+active_requests: "weakref.WeakKeyDictionary[asyncio.Task, Scope]" = weakref.WeakKeyDictionary()
+
+
+def describe_scope(scope: Scope | None) -> str:
+    if scope is None:
+        return "<background>"
+    route = getattr(scope.get("route"), "path", None) or scope.get("path", "?")
+    return f"{scope.get('method', '?')} {route}"
+
+
+@dataclass
+class LoopStall:
+    route: str
+    duration: float
+    stack: str
+
+
+@dataclass
+class PendingStall:
+    route: str
+    stack: str
+
+
+class LoopWatchdog:
+    def __init__(
+        self,
+        monitor: LoopLagMonitor,
+        *,
+        threshold: float = 0.5,
+        interval: float = 0.1,
+        on_stall: Callable[[LoopStall], None] | None = None,
+    ) -> None:
+        self.monitor = monitor
+        self.threshold = threshold
+        self.interval = interval
+        self.on_stall = on_stall
+        self.stalls = 0
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_thread_id: int | None = None
+        self._pending: PendingStall | None = None
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+
+    async def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._pending = None
+        self._stop.clear()
+        await self.monitor.start()
+        self.monitor.add_listener(self._on_tick)
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    async def stop(self) -> None:
+        self._stop.set()
+        self.monitor.remove_listener(self._on_tick)
+        if self._thread is not None:
+            await asyncio.to_thread(self._thread.join)
+            self._thread = None
+
+    def _watch(self) -> None:
+        captured_tick: float | None = None
+        while not self._stop.wait(self.interval):
+            tick = self.monitor.last_tick
+            overdue = time.monotonic() - tick - self.monitor.interval
+            if overdue < self.threshold or captured_tick == tick:
+                continue  # responsive, or this stall is already captured
+            captured_tick = tick
+            self._capture()
+
+    def _capture(self) -> None:
+        assert self._loop is not None
+        frame = sys._current_frames().get(self._loop_thread_id)
+        stack = "".join(traceback.format_stack(frame)) if frame is not None else ""
+        task = asyncio.current_task(self._loop)
+        route = describe_scope(active_requests.get(task) if task is not None else None)
+        self._pending = PendingStall(route=route, stack=stack)
+
+    def _on_tick(self, lag: float) -> None:
+        # The first tick after a captured stall measures how long it lasted.
+        pending, self._pending = self._pending, None
+        if pending is not None and lag >= self.threshold:
+            self._report(LoopStall(route=pending.route, duration=lag, stack=pending.stack))
+
+    def _report(self, stall: LoopStall) -> None:
+        self.stalls += 1
+        loop_stalls.inc(route=stall.route)
+        loop_stall_duration.observe(stall.duration)
+        logger.warning("Event loop blocked for %.2fs in %s\n%s", stall.duration, stall.route, stall.stack)
+        if self.on_stall is not None:
+            try:
+                self.on_stall(stall)
+            except Exception:
+                logger.exception("Loop stall handler failed")
+
+
+def alert_on_stall(stall: LoopStall) -> None:
+    if settings.app_env != "production":
+        return
+    alert_aggregator.record(
+        method="STALL",
+        route=stall.route,
+        url=stall.route,
+        status_code=0,
+        detail=stall.stack,
+        message=f"Event loop blocked for {stall.duration:.2f}s in {stall.route}",
+    )
+
+
+loop_watchdog = LoopWatchdog(
+    loop_lag_monitor,
+    threshold=settings.loop_stall_threshold_seconds,
+    interval=settings.loop_watchdog_interval_seconds,
+    on_stall=alert_on_stall,
+)
@@ -0,0 +1,218 @@
+import asyncio
+import json
+import socket
+import threading
+import time
+import uuid
+import zlib
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass, field
+
+import httpx
+import uvicorn
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+from marketing_api.auth.dependencies import get_current_user
+from marketing_api.auth.principal import Principal, principal_cache
+from marketing_api.chat_cache import chat_cache
+from marketing_api.chat_transcripts import transcript_store
+from marketing_api.db.base import Base
+from marketing_api.db.profiler import install_profiler, profile_queries
+from marketing_api.db.session import get_session, get_sessionmaker
+from marketing_api.experiments.assignment import assignment_recorder
+from marketing_api.experiments.config import experiment_cache
+from marketing_api.experiments.conversions import conversion_buffer
+from marketing_api.experiments.results import results_cache
+from marketing_api.limits import limiter
+from marketing_api.main import app
+
+
+@dataclass
+class StatementLog:
+    """Records every SQL statement sent to the test database."""
+
+    statements: list[str] = field(default_factory=list)
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        self.statements.append(statement)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def reset(self) -> None:
+        self.statements.clear()
+
+
+@dataclass
+class ApiHarness:
+    client: httpx.AsyncClient
+    sessionmaker: async_sessionmaker[AsyncSession]
+    statements: StatementLog
+
+
+@asynccontextmanager
+async def api_harness(database_url: str | None = None):
+    """Run the app against an in-memory SQLite database as an admin user.
+
+    Tests drive it with ``asyncio.run`` so the engine, the app and the client
+    share one event loop. Every session shares the in-memory database's one
+    connection; pass a file ``database_url`` when sessions must have
+    transactions of their own.
+    """
+    if database_url is None:
+        engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    else:
+        engine = create_async_engine(database_url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    sessionmaker = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def override_session():
+        async with sessionmaker() as session:
+            yield session
+
+    install_profiler(engine)
+    statements = StatementLog()
+    event.listen(engine.sync_engine, "before_cursor_execute", statements)
+
+    app.dependency_overrides[get_session] = override_session
+    app.dependency_overrides[get_sessionmaker] = lambda: sessionmaker
+    app.dependency_overrides[get_current_user] = lambda: Principal(
+        id=uuid.uuid4(), email="admin@example.com", full_name="Admin", is_active=True, roles=frozenset({"admin"})
+    )
+    limiter_enabled = limiter.enabled
+    limiter.enabled = False
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            yield ApiHarness(client=client, sessionmaker=sessionmaker, statements=statements)
+    finally:
+        limiter.enabled = limiter_enabled
+        principal_cache.clear()
+        chat_cache.clear()
+        await transcript_store.cache.clear()
+        experiment_cache.clear()
+        assignment_recorder.reset()
+        conversion_buffer.reset()
+        results_cache.clear()
+        app.dependency_overrides.clear()
+        await engine.dispose()
+
+
+@contextmanager
+def query_budget(max_statements: int, *, max_repeats: int | None = None):
+    """Assert the SQL issued inside the block stays within a budget.
+
+    ``max_repeats`` caps how often any one statement shape may run, which is
+    how N+1 loops show up.
+    """
+    with profile_queries() as profile:
+        yield profile
+    assert profile.statements <= max_statements, (
+        f"{profile.statements} statements exceeds budget of {max_statements}: {dict(profile.shapes)}"
+    )
+    if max_repeats is not None:
+        repeated = profile.repeated(max_repeats + 1)
+        assert not repeated, f"repeated statements: {repeated}"
+
+
+TOKENS = ["Hello", " from", " the", " fake", " model", "."]
+
+
+class FakeOpenAI:
+    """Chat completions over real HTTP; fails the next ``failures`` requests.
+
+    Completions are ``tokens`` (``TOKENS`` unless a test changes them).
+    """
+
+    def __init__(self, token_delay: float = 0.0) -> None:
+        self.token_delay = token_delay
+        self.failures = 0
+        self.tokens = list(TOKENS)
+        self.requests: list[dict] = []
+        self.app = Starlette(
+            routes=[
+                Route("/v1/chat/completions", self.completions, methods=["POST"]),
+                Route("/v1/embeddings", self.embeddings, methods=["POST"]),
+            ]
+        )
+
+    async def completions(self, request: Request):
+        body = await request.json()
+        self.requests.append(body)
+        if self.failures:
+            self.failures -= 1
+            return JSONResponse({"error": {"message": "overloaded"}}, status_code=503)
+        tokens = self.tokens
+        usage = {"prompt_tokens": 12, "completion_tokens": len(tokens), "total_tokens": 12 + len(tokens)}
+        base = {"id": "chatcmpl-1", "created": 0, "model": body["model"]}
+        if not body.get("stream"):
+            return JSONResponse(
+                {
+                    **base,
+                    "object": "chat.completion",
+                    "choices": [
+                        {
+                            "index": 0,
+                            "message": {"role": "assistant", "content": "".join(tokens)},
+                            "finish_reason": "stop",
+                        }
+                    ],
+                    "usage": usage,
+                }
+            )
+
+        async def chunks():
+            for token in tokens:
+                await asyncio.sleep(self.token_delay)
+                choice = {"index": 0, "delta": {"content": token}, "finish_reason": None}
+                yield f"data: {json.dumps({**base, 'object': 'chat.completion.chunk', 'choices': [choice]})}\n\n"
+            yield f"data: {json.dumps({**base, 'object': 'chat.completion.chunk', 'choices': [], 'usage': usage})}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(chunks(), media_type="text/event-stream")
+
+    async def embeddings(self, request: Request):
+        body = await request.json()
+        self.requests.append(body)
+        inputs = [body["input"]] if isinstance(body["input"], str) else body["input"]
+        data = []
+        for index, text in enumerate(inputs):
+            # Bag of words hashed into 64 dimensions: shared words mean similar vectors.
+            vector = [0.0] * 64
+            for word in text.split():
+                vector[zlib.crc32(word.encode()) % 64] += 1.0
+            data.append({"object": "embedding", "index": index, "embedding": vector})
+        return JSONResponse(
+            {
+                "object": "list",
+                "data": data,
+                "model": body["model"],
+                "usage": {"prompt_tokens": len(inputs), "total_tokens": len(inputs)},
+            }
+        )
+
+
+@contextmanager
+def serve(fake: FakeOpenAI):
+    """Run ``fake`` on a local port; yields its OpenAI base URL."""
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    server = uvicorn.Server(uvicorn.Config(fake.app, log_level="warning", lifespan="off"))
+    thread = threading.Thread(target=server.run, kwargs={"sockets": [sock]}, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    try:
+        yield f"http://127.0.0.1:{sock.getsockname()[1]}/v1"
+    finally:
+        server.should_exit = True
+        thread.join()
+        sock.close()
@@ -0,0 +1,87 @@
+import asyncio
+
+from marketing_api.notifications.alerts import AlertAggregator
+
+
+class RecordingSender:
+    def __init__(self) -> None:
+        self.alerts: list[tuple[str, str]] = []
+
+    def __call__(self, subject: str, message: str, body: str) -> None:
+        self.alerts.append((subject, message))
+
+
+def record(aggregator: AlertAggregator, route: str, exc: Exception | None = None, status_code: int = 500) -> None:
+    aggregator.record(
+        method="GET",
+        route=route,
+        url=f"https://api.test{route}",
+        status_code=status_code,
+        exc=exc,
+    )
+
+
+def test_alerts_are_coalesced_into_one_digest_per_window() -> None:
+    async def scenario() -> None:
+        sender = RecordingSender()
+        aggregator = AlertAggregator(sender, window_seconds=0.05)
+
+        record(aggregator, "/public/chat", RuntimeError("down"))
+        for _ in range(30):
+            record(aggregator, "/public/chat", RuntimeError("down"))
+        record(aggregator, "/public/leads", status_code=503)
+        await asyncio.sleep(0.08)
+        await aggregator.flush()
+
+        assert [subject for subject, _ in sender.alerts] == [
+            "🚨 API Error Alert: 500",
+            "🚨 API Error Digest: 31 errors",
+        ]
+        digest = sender.alerts[1][1]
+        assert "30x GET /public/chat RuntimeError" in digest
+        assert "1x GET /public/leads 503" in digest
+
+        counters = {item["fingerprint"]: item["total"] for item in aggregator.snapshot()["fingerprints"]}
+        assert counters == {"GET /public/chat RuntimeError": 31, "GET /public/leads 503": 1}
+        assert aggregator.snapshot()["alerts_sent"] == 2
+
+    asyncio.run(scenario())
+
+
+def test_quiet_window_closes_without_a_digest() -> None:
+    async def scenario() -> None:
+        sender = RecordingSender()
+        aggregator = AlertAggregator(sender, window_seconds=0.02)
+
+        record(aggregator, "/public/chat", RuntimeError("down"))
+        await asyncio.sleep(0.05)
+        record(aggregator, "/public/chat", RuntimeError("down"))
+        await aggregator.flush()
+
+        assert [subject for subject, _ in sender.alerts] == ["🚨 API Error Alert: 500"] * 2
+
+    asyncio.run(scenario())
+
+
+def test_sender_failures_do_not_reach_the_caller() -> None:
+    def failing_sender(subject: str, message: str, body: str) -> None:
+        raise OSError("smtp down")
+
+    async def scenario() -> None:
+        aggregator = AlertAggregator(failing_sender, window_seconds=60)
+        record(aggregator, "/boom", RuntimeError("boom"))
+        await aggregator.flush()
+        assert aggregator.alerts_sent == 1
+
+    asyncio.run(scenario())
+
+
+def test_fingerprints_are_bounded() -> None:
+    async def scenario() -> None:
+        aggregator = AlertAggregator(RecordingSender(), window_seconds=60, max_fingerprints=3)
+        for index in range(5):
+            record(aggregator, f"/route-{index}")
+        await aggregator.flush()
+        assert len(aggregator.snapshot()["fingerprints"]) == 3
+
+    asyncio.run(scenario())
@@ -0,0 +1,131 @@
+import asyncio
+import json
+
+import httpx
+
+from marketing_api.analytics import EventPipeline
+
+
+class PostHogStandIn:
+    """Records batch requests; holds responses while ``gate`` is closed."""
+
+    def __init__(self, status_code: int = 200) -> None:
+        self.status_code = status_code
+        self.batches: list[list[dict]] = []
+        self.gate = asyncio.Event()
+        self.gate.set()
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        await self.gate.wait()
+        payload = json.loads(request.content)
+        assert request.url.path == "/batch/"
+        assert payload["api_key"] == "phc_test"
+        self.batches.append(payload["batch"])
+        return httpx.Response(self.status_code, json={"status": 1})
+
+
+def make_pipeline(server: PostHogStandIn, **kwargs) -> EventPipeline:
+    return EventPipeline(
+        host="https://posthog.test",
+        api_key="phc_test",
+        transport=httpx.MockTransport(server),
+        **kwargs,
+    )
+
+
+def test_pipeline_batches_by_size_and_flushes_on_stop() -> None:
+    async def scenario() -> None:
+        server = PostHogStandIn()
+        pipeline = make_pipeline(server, batch_size=10, flush_interval=60)
+        await pipeline.start()
+
+        for index in range(25):
+            pipeline.enqueue("user-1", "feature_used", {"index": index})
+        await asyncio.sleep(0.05)
+        # Two full batches go out immediately; the remainder waits for the interval.
+        assert [len(batch) for batch in server.batches] == [10, 10]
+
+        await pipeline.stop()
+        assert [len(batch) for batch in server.batches] == [10, 10, 5]
+        assert [event["properties"]["index"] for batch in server.batches for event in batch] == list(range(25))
+        assert pipeline.snapshot() == {
+            "enqueued": 25,
+            "sent": 25,
+            "batches": 3,
+            "dropped_overflow": 0,
+            "dropped_failed": 0,
+            "pending": 0,
+        }
+
+    asyncio.run(scenario())
+
+
+def test_pipeline_flushes_partial_batches_on_interval() -> None:
+    async def scenario() -> None:
+        server = PostHogStandIn()
+        pipeline = make_pipeline(server, batch_size=100, flush_interval=0.05)
+        await pipeline.start()
+
+        pipeline.enqueue("user-1", "conversion")
+        await asyncio.sleep(0.15)
+        assert [event["event"] for batch in server.batches for event in batch] == ["conversion"]
+        await pipeline.stop()
+
+    asyncio.run(scenario())
+
+
+def test_pipeline_drops_oldest_events_when_sender_is_stalled() -> None:
+    async def scenario() -> None:
+        server = PostHogStandIn()
+        server.gate.clear()
+        pipeline = make_pipeline(server, capacity=20, batch_size=5, flush_interval=60)
+        await pipeline.start()
+
+        pipeline.enqueue("user-1", "event", {"index": 0})
+        for index in range(1, 5):
+            pipeline.enqueue("user-1", "event", {"index": index})
+        await asyncio.sleep(0.01)
+        # The first batch is in flight; enqueueing keeps going without blocking.
+        for index in range(5, 55):
+            pipeline.enqueue("user-1", "event", {"index": index})
+        assert pipeline.pending() == 20
+        assert pipeline.stats.dropped_overflow == 30
+
+        server.gate.set()
+        await pipeline.stop()
+        delivered = [event["properties"]["index"] for batch in server.batches for event in batch]
+        assert delivered == list(range(5)) + list(range(35, 55))
+        assert all(len(batch) <= 5 for batch in server.batches)
+
+    asyncio.run(scenario())
+
+
+def test_pipeline_counts_rejected_batches() -> None:
+    async def scenario() -> None:
+        server = PostHogStandIn(status_code=503)
+        pipeline = make_pipeline(server, batch_size=10, flush_interval=60)
+        await pipeline.start()
+        for _ in range(12):
+            pipeline.enqueue("user-1", "event")
+        await pipeline.stop()
+
+        assert pipeline.stats.dropped_failed == 12
+        assert pipeline.stats.sent == 0
+
+    asyncio.run(scenario())
+
+
+def test_pipeline_drops_unserializable_batches_and_still_closes() -> None:
+    async def scenario() -> None:
+        server = PostHogStandIn()
+        pipeline = make_pipeline(server, batch_size=10, flush_interval=60)
+        await pipeline.start()
+        pipeline.enqueue("user-1", "event", {"when": object()})
+        pipeline.enqueue("user-1", "event")
+        await pipeline.stop()
+
+        assert pipeline.stats.dropped_failed == 2
+        assert pipeline._client is None and not pipeline.running
+        assert server.batches == []
+
+    asyncio.run(scenario())
@@ -1,8 +1,15 @@
+import asyncio
+import uuid
+
 from jose import jwt
+from passlib.context import CryptContext
+from sqlalchemy import select
 
-from marketing_api.auth.security import hash_password, verify_password
+from marketing_api.auth.security import hash_password, pwd_context, verify_password
 from marketing_api.auth.tokens import create_access_token
+from marketing_api.db import models
 from marketing_api.settings import settings
+from tests.helpers import api_harness
 
 
 def test_hash_and_verify_password() -> None:
@@ -18,3 +25,106 @@ def test_create_access_token_contains_subject() -> None:
     token = create_access_token(subject, expires_minutes=5)
     payload = jwt.decode(token, settings.jwt_secret, algorithms=[settings.jwt_algorithm])
     assert payload["sub"] == subject
+
+
+STAGE_MUTATION = 'mutation { create_pipeline_stage(payload: {name: "Won", order: 1, probability: 100}) { name } }'
+
+
+async def create_user(sessionmaker) -> models.User:
+    async with sessionmaker() as session:
+        user = models.User(email="manager@example.com", hashed_password="x")
+        session.add(user)
+        await session.commit()
+        return user
+
+
+async def post_graphql(harness, query: str, token: str) -> dict:
+    response = await harness.client.post(
+        "/graphql", json={"query": query}, headers={"Authorization": f"Bearer {token}"}
+    )
+    return response.json()
+
+
+def test_principal_is_cached_between_requests() -> None:
+    async def scenario() -> list[int]:
+        async with api_harness() as harness:
+            user = await create_user(harness.sessionmaker)
+            token = create_access_token(str(user.id))
+            counts = []
+            for _ in range(2):
+                harness.statements.reset()
+                body = await post_graphql(harness, "{ leads_connection { nodes { id } } }", token)
+                assert "errors" not in body, body
+                counts.append(harness.statements.count)
+            return counts
+
+    first, second = asyncio.run(scenario())
+    assert second == first - 2  # user and roles come from the cache
+
+
+def test_role_changes_invalidate_the_cached_principal() -> None:
+    async def scenario() -> tuple[dict, dict]:
+        async with api_harness() as harness:
+            user = await create_user(harness.sessionmaker)
+            token = create_access_token(str(user.id))
+            denied = await post_graphql(harness, STAGE_MUTATION, token)
+            async with harness.sessionmaker() as session:
+                session.add(models.Role(name="manager"))
+                await session.flush()
+                role = (await session.execute(select(models.Role))).scalar_one()
+                session.add(models.UserRole(user_id=user.id, role_id=role.id))
+                await session.commit()
+            allowed = await post_graphql(harness, STAGE_MUTATION, token)
+            return denied, allowed
+
+    denied, allowed = asyncio.run(scenario())
+    assert denied["errors"][0]["message"] == "Insufficient permissions."
+    assert allowed["data"] == {"create_pipeline_stage": {"name": "Won"}}
+
+
+def test_embedded_role_claims_skip_the_user_lookup(monkeypatch) -> None:
+    monkeypatch.setattr(settings, "jwt_embed_roles", True)
+    token = create_access_token(str(uuid.uuid4()), roles=["admin"], email="admin@example.com")
+    payload = jwt.decode(token, settings.jwt_secret, algorithms=[settings.jwt_algorithm])
+    assert payload["roles"] == ["admin"]
+    assert payload["jti"]
+
+    async def scenario() -> tuple[dict, list[str]]:
+        async with api_harness() as harness:
+            harness.statements.reset()
+            body = await post_graphql(harness, STAGE_MUTATION, token)
+            return body, list(harness.statements.statements)
+
+    body, statements = asyncio.run(scenario())
+    assert body["data"] == {"create_pipeline_stage": {"name": "Won"}}
+    assert not any("FROM users" in statement for statement in statements)
+
+
+def test_login_rehashes_passwords_created_with_old_parameters() -> None:
+    legacy_context = CryptContext(
+        schemes=["argon2"], argon2__rounds=1, argon2__memory_cost=1024, argon2__parallelism=1
+    )
+
+    async def scenario() -> tuple[list[int], str]:
+        async with api_harness() as harness:
+            async with harness.sessionmaker() as session:
+                session.add(
+                    models.User(email="legacy@example.com", hashed_password=legacy_context.hash("s3cret!"))
+                )
+                await session.commit()
+            statuses = []
+            for email, password in [
+                ("legacy@example.com", "wrong"),
+                ("missing@example.com", "s3cret!"),
+                ("legacy@example.com", "s3cret!"),
+            ]:
+                response = await harness.client.post("/auth/login", json={"email": email, "password": password})
+                statuses.append(response.status_code)
+            async with harness.sessionmaker() as session:
+                user = (await session.execute(select(models.User))).scalar_one()
+                return statuses, user.hashed_password
+
+    statuses, stored_hash = asyncio.run(scenario())
+    assert statuses == [401, 401, 200]
+    assert not pwd_context.needs_update(stored_hash)
+    assert verify_password("s3cret!", stored_hash)
@@ -0,0 +1,103 @@
+import asyncio
+
+import pytest
+
+from marketing_api.chat_cache import ChatResponseCache, chat_cache, normalize_question
+from marketing_api.llm import llm_gateway
+from tests.helpers import TOKENS, FakeOpenAI, api_harness, serve
+
+
+def test_exact_matches_expire_and_evict() -> None:
+    async def scenario() -> None:
+        async with api_harness() as h, h.sessionmaker() as session:
+            cache = ChatResponseCache(ttl_seconds=60, maxsize=2)
+            lookup = await cache.lookup(session, "What are your prices?")
+            assert lookup.answer is None
+            cache.store(lookup, "From $499/month.")
+            assert (await cache.lookup(session, "  what are your PRICES ")).answer == "From $499/month."
+
+            cache.store(await cache.lookup(session, "Do you do SEO?"), "Yes.")
+            cache.store(await cache.lookup(session, "Where are you?"), "The Carolinas.")
+            assert (await cache.lookup(session, "What are your prices?")).answer is None
+            assert await cache.invalidate(session, "do you do seo") == 1
+            snapshot = cache.snapshot()
+            assert snapshot.pop("process_id")
+            assert snapshot == {"entries": 1, "hits": 1, "semantic_hits": 0, "misses": 4, "hit_rate": 0.2}
+
+            stale = ChatResponseCache(ttl_seconds=0, maxsize=2)
+            stale.store(await stale.lookup(session, "Hi"), "Hello!")
+            assert (await stale.lookup(session, "Hi")).answer is None
+
+    asyncio.run(scenario())
+    assert normalize_question("Pricing -- for SEO?!") == "pricing for seo"
+
+
+def test_invalidation_reaches_every_process() -> None:
+    async def scenario() -> None:
+        async with api_harness() as h, h.sessionmaker() as session:
+            workers = [ChatResponseCache(ttl_seconds=60, maxsize=10) for _ in range(2)]
+            for worker in workers:
+                for question in ("What are your prices?", "Do you do SEO?"):
+                    worker.store(await worker.lookup(session, question), "Old answer.")
+
+            # The invalidating worker's lookup started before the bump; its answer is stale too.
+            pending = await workers[0].lookup(session, "Where are you?")
+            await workers[1].invalidate(session, "What are your prices?")
+            assert (await workers[0].lookup(session, "what are your prices")).answer is None
+            assert (await workers[0].lookup(session, "Do you do SEO?")).answer == "Old answer."
+
+            await workers[1].invalidate_all(session)
+            workers[0].store(pending, "Old answer.")
+            for question in ("Do you do SEO?", "Where are you?"):
+                assert (await workers[0].lookup(session, question)).answer is None
+
+            fresh = await workers[0].lookup(session, "Do you do SEO?")
+            workers[0].store(fresh, "New answer.")
+            assert (await workers[0].lookup(session, "Do you do SEO?")).answer == "New answer."
+
+    asyncio.run(scenario())
+
+
+def test_repeated_opening_questions_skip_openai(monkeypatch: pytest.MonkeyPatch) -> None:
+    fake = FakeOpenAI()
+    with serve(fake) as base_url:
+        monkeypatch.setattr(llm_gateway, "api_key", "sk-test")
+        monkeypatch.setattr(llm_gateway, "base_url", base_url)
+        monkeypatch.setattr(llm_gateway, "_client", None)
+        monkeypatch.setattr(chat_cache, "semantic", True)
+
+        def completions() -> int:
+            return sum("messages" in body for body in fake.requests)
+
+        async def ask(h, message: str, **extra) -> dict:
+            response = await h.client.post("/public/chat/ai-response", json={"message": message, **extra})
+            return response.json()
+
+        async def scenario() -> None:
+            async with api_harness() as h:
+                first = await ask(h, "What are your prices?")
+                assert (await ask(h, "what are your prices"))["response"] == first["response"] == "".join(TOKENS)
+                await ask(h, "How much do you charge for SEO?")
+                await ask(h, "How much do you charge for SEO services?")
+                assert completions() == 2
+                assert chat_cache.semantic_hits == 1
+
+                # Follow-ups depend on the conversation, so they always reach the model.
+                await ask(h, "What are your prices?", session_id=first["session_id"])
+                assert completions() == 3
+
+                stats = (await h.client.get("/admin/dashboard/chat-cache")).json()
+                assert (stats["entries"], stats["hits"]) == (2, 2)
+                response = await h.client.delete(
+                    "/admin/dashboard/chat-cache", params={"message": "What are your prices?"}
+                )
+                assert response.json() == {"scope": "question", "generation": 1}
+                await ask(h, "What are your prices?")
+                assert completions() == 4
+                response = await h.client.delete("/admin/dashboard/chat-cache")
+                assert response.json() == {"scope": "all", "generation": 1}
+                await ask(h, "How much do you charge for SEO?")
+                assert completions() == 5
+            await llm_gateway.aclose()
+
+        asyncio.run(scenario())
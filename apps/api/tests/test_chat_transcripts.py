@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+from sqlalchemy import func, select
+
+from marketing_api.chat_transcripts import (
+    MemoryTranscriptCache,
+    TranscriptStore,
+    Turn,
+    transcript_store,
+    trim_history,
+)
+from marketing_api.db import models
+from marketing_api.llm import llm_gateway
+from tests.helpers import TOKENS, FakeOpenAI, api_harness, serve
+
+
+def test_trim_history_keeps_the_newest_turns_within_budget() -> None:
+    turns = [Turn("a" * 40, "b" * 40), Turn("c" * 40, "d" * 40), Turn("e" * 40, "f" * 40)]
+    assert trim_history(turns, 1000) == turns
+    # Each turn is about 22 tokens.
+    assert trim_history(turns, 50) == turns[1:]
+    assert trim_history(turns, 10) == []
+
+
+def test_each_turn_is_one_count_and_one_write(monkeypatch: pytest.MonkeyPatch) -> None:
+    fake = FakeOpenAI()
+    with serve(fake) as base_url:
+        monkeypatch.setattr(llm_gateway, "api_key", "sk-test")
+        monkeypatch.setattr(llm_gateway, "base_url", base_url)
+        monkeypatch.setattr(llm_gateway, "_client", None)
+
+        async def scenario() -> None:
+            async with api_harness() as h:
+                first = await h.client.post("/public/chat/ai-response", json={"message": "Do you build websites?"})
+                session_id = first.json()["session_id"]
+
+                for question in ("How long does it take?", "What does it cost?"):
+                    h.statements.reset()
+                    await h.client.post(
+                        "/public/chat/ai-response", json={"message": question, "session_id": session_id}
+                    )
+                    # The COUNT that validates the cached window, and the INSERT.
+                    assert h.statements.count == 2
+                assert [message["content"] for message in fake.requests[-1]["messages"][1:]] == [
+                    "Do you build websites?",
+                    "".join(TOKENS),
+                    "How long does it take?",
+                    "".join(TOKENS),
+                    "What does it cost?",
+                ]
+
+                # Another process (or an evicted session) rebuilds the window from the table.
+                await transcript_store.cache.clear()
+                h.statements.reset()
+                await h.client.post("/public/chat/ai-response", json={"message": "Thanks!", "session_id": session_id})
+                assert h.statements.count == 3
+                assert len(fake.requests[-1]["messages"]) == 1 + 2 * 3 + 1
+
+                async with h.sessionmaker() as session:
+                    rows = await session.scalar(
+                        select(func.count())
+                        .select_from(models.ChatMessage)
+                        .where(models.ChatMessage.chat_session_id == session_id)
+                    )
+                assert rows == 4
+            await llm_gateway.aclose()
+
+        asyncio.run(scenario())
+
+
+def test_per_process_caches_see_turns_recorded_elsewhere() -> None:
+    async def scenario() -> None:
+        async with api_harness() as h:
+            workers = [TranscriptStore(MemoryTranscriptCache(window=5), window=5) for _ in range(2)]
+
+            async def record(worker: TranscriptStore, turn: Turn, *, new_session: bool = False) -> None:
+                async with h.sessionmaker() as session:
+                    await worker.record_turn(session, "s1", turn, name=None, email=None, new_session=new_session)
+
+            async def history(worker: TranscriptStore) -> list[str]:
+                async with h.sessionmaker() as session:
+                    return [turn.user for turn in await worker.recent_turns(session, "s1")]
+
+            await record(workers[0], Turn("q1", "a1"), new_session=True)
+            assert await history(workers[1]) == ["q1"]
+            await record(workers[1], Turn("q2", "a2"))
+            # The first worker's cached window still holds only q1; it must not be served.
+            assert await history(workers[0]) == ["q1", "q2"]
+            await record(workers[0], Turn("q3", "a3"))
+            assert await history(workers[1]) == ["q1", "q2", "q3"]
+            assert await history(workers[0]) == ["q1", "q2", "q3"]
+            assert (workers[0].hits, workers[0].misses) == (1, 1)
+
+    asyncio.run(scenario())
@@ -0,0 +1,210 @@
+import asyncio
+import json
+
+import pytest
+from sqlalchemy import func, select
+
+from marketing_api.db import models
+from marketing_api.llm import llm_gateway
+from marketing_api.main import app
+from marketing_api.routes import content
+from tests.helpers import TOKENS, FakeOpenAI, api_harness, serve
+
+
+def completions(fake: FakeOpenAI) -> int:
+    return sum("messages" in body for body in fake.requests)
+
+
+def test_quota_is_one_counter_row_per_email_and_month(monkeypatch: pytest.MonkeyPatch) -> None:
+    fake = FakeOpenAI()
+    with serve(fake) as base_url:
+        monkeypatch.setattr(llm_gateway, "api_key", "sk-test")
+        monkeypatch.setattr(llm_gateway, "base_url", base_url)
+        monkeypatch.setattr(llm_gateway, "_client", None)
+        monkeypatch.setattr(llm_gateway, "max_retries", 0)
+
+        async def generate(h, topic: str, email: str = "owner@example.com"):
+            return await h.client.post(
+                "/public/content/generate",
+                json={"content_type": "social_media", "topic": topic, "email": email},
+            )
+
+        async def scenario() -> None:
+            async with api_harness() as h:
+                # A failed generation gives its reservation back.
+                fake.failures = 1
+                assert (await generate(h, "Spring sale")).status_code == 500
+
+                for expected, topic in enumerate(("Spring sale", "Summer sale", "Fall sale"), start=1):
+                    h.statements.reset()
+                    response = await generate(h, topic)
+                    assert response.json()["usage_count"] == expected
+                    # No GeneratedContent rows are loaded to count usage.
+                    assert not any(
+                        "FROM generated_content" in statement and "cache_key" not in statement
+                        for statement in h.statements.statements
+                    )
+
+                response = await generate(h, "Winter sale", email="OWNER@example.com")
+                assert response.status_code == 429
+                assert (await generate(h, "Winter sale", email="other@example.com")).json()["usage_count"] == 1
+
+                async with h.sessionmaker() as session:
+                    used = await session.scalar(
+                        select(models.ContentQuota.used).where(models.ContentQuota.email == "owner@example.com")
+                    )
+                assert used == 3
+            await llm_gateway.aclose()
+
+        asyncio.run(scenario())
+
+
+def test_identical_requests_reuse_earlier_generations(monkeypatch: pytest.MonkeyPatch) -> None:
+    fake = FakeOpenAI()
+    with serve(fake) as base_url:
+        monkeypatch.setattr(llm_gateway, "api_key", "sk-test")
+        monkeypatch.setattr(llm_gateway, "base_url", base_url)
+        monkeypatch.setattr(llm_gateway, "_client", None)
+
+        async def generate(h, topic: str, **extra) -> dict:
+            response = await h.client.post(
+                "/public/content/generate", json={"content_type": "blog_post", "topic": topic, **extra}
+            )
+            return response.json()
+
+        async def scenario() -> None:
+            async with api_harness() as h:
+                first = await generate(h, "Local SEO tips")
+                assert (first["content"], first["cached"]) == ("".join(TOKENS), False)
+                second = await generate(h, "  local seo TIPS! ")
+                assert (second["content"], second["cached"]) == (first["content"], True)
+                assert completions(fake) == 1
+
+                # Any other parameter is a different request.
+                await generate(h, "Local SEO tips", tone="casual")
+                assert completions(fake) == 2
+
+                response = await h.client.post(
+                    "/public/content/generate",
+                    json={"content_type": "blog_post", "topic": "local seo tips", "stream": True},
+                )
+                assert "event: token" in response.text and '"cached": true' in response.text
+                assert completions(fake) == 2
+
+                async with h.sessionmaker() as session:
+                    stored = await session.scalar(select(func.count()).select_from(models.GeneratedContent))
+                assert stored == 2
+            await llm_gateway.aclose()
+
+        asyncio.run(scenario())
+
+
+def test_variants_are_collected_before_reuse(monkeypatch: pytest.MonkeyPatch) -> None:
+    from marketing_api.settings import settings
+
+    fake = FakeOpenAI()
+    with serve(fake) as base_url:
+        monkeypatch.setattr(llm_gateway, "api_key", "sk-test")
+        monkeypatch.setattr(llm_gateway, "base_url", base_url)
+        monkeypatch.setattr(llm_gateway, "_client", None)
+        monkeypatch.setattr(settings, "content_cache_variants", 2)
+
+        async def scenario() -> None:
+            async with api_harness() as h:
+                for _ in range(4):
+                    await h.client.post(
+                        "/public/content/generate", json={"content_type": "email_campaign", "topic": "Holiday hours"}
+                    )
+                assert completions(fake) == 2
+            await llm_gateway.aclose()
+
+        asyncio.run(scenario())
+
+
+def test_empty_generations_are_failures(monkeypatch: pytest.MonkeyPatch) -> None:
+    fake = FakeOpenAI()
+    with serve(fake) as base_url:
+        monkeypatch.setattr(llm_gateway, "api_key", "sk-test")
+        monkeypatch.setattr(llm_gateway, "base_url", base_url)
+        monkeypatch.setattr(llm_gateway, "_client", None)
+        fake.tokens = []
+
+        async def generate(h, **extra):
+            return await h.client.post(
+                "/public/content/generate",
+                json={"content_type": "blog_post", "topic": "Local SEO tips", "email": "owner@example.com", **extra},
+            )
+
+        async def scenario() -> None:
+            async with api_harness() as h:
+                assert (await generate(h)).status_code == 500
+                assert "event: error" in (await generate(h, stream=True)).text
+                async with h.sessionmaker() as session:
+                    assert await session.scalar(select(func.count()).select_from(models.GeneratedContent)) == 0
+                    used = await session.scalar(select(models.ContentQuota.used))
+                assert used == 0
+
+                # The next request reaches the model instead of a cached placeholder.
+                fake.tokens = list(TOKENS)
+                response = await generate(h)
+                assert (response.json()["content"], response.json()["cached"]) == ("".join(TOKENS), False)
+                assert completions(fake) == 3
+            await llm_gateway.aclose()
+
+        asyncio.run(scenario())
+
+
+async def disconnect_after_first_token(payload: dict) -> None:
+    """POST ``payload`` straight to the ASGI app and hang up once a token arrives."""
+    body = json.dumps(payload).encode()
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": "/public/content/generate",
+        "raw_path": b"/public/content/generate",
+        "query_string": b"",
+        "headers": [(b"host", b"test"), (b"content-type", b"application/json")],
+        "client": ("127.0.0.1", 1234),
+        "server": ("test", 80),
+    }
+    first_token = asyncio.Event()
+    requested = False
+
+    async def receive() -> dict:
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await first_token.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message: dict) -> None:
+        if b"event: token" in message.get("body", b""):
+            first_token.set()
+
+    await app(scope, receive, send)
+
+
+def test_disconnected_streams_give_the_quota_back(monkeypatch: pytest.MonkeyPatch, tmp_path) -> None:
+    fake = FakeOpenAI(token_delay=0.05)
+    with serve(fake) as base_url:
+        monkeypatch.setattr(llm_gateway, "api_key", "sk-test")
+        monkeypatch.setattr(llm_gateway, "base_url", base_url)
+        monkeypatch.setattr(llm_gateway, "_client", None)
+
+        async def scenario() -> None:
+            # The release runs while the request's session closes, so they need separate connections.
+            async with api_harness(f"sqlite+aiosqlite:///{tmp_path / 'api.db'}") as h:
+                await disconnect_after_first_token(
+                    {"content_type": "blog_post", "topic": "Local SEO", "email": "owner@example.com", "stream": True}
+                )
+                await asyncio.gather(*content._releases)
+                async with h.sessionmaker() as session:
+                    assert await session.scalar(select(func.count()).select_from(models.GeneratedContent)) == 0
+                    assert await session.scalar(select(models.ContentQuota.used)) == 0
+            await llm_gateway.aclose()
+
+        asyncio.run(scenario())
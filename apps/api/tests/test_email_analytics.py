@@ -0,0 +1,126 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, select
+
+from marketing_api.db import models
+from marketing_api.routes.email_admin import rollup_email_daily_stats
+from tests.helpers import api_harness
+
+
+async def seed(sessionmaker) -> tuple[str, list[str]]:
+    """Two-step campaign: step 1 sent to three subscribers today and one three days ago."""
+    now = datetime.now(timezone.utc)
+    async with sessionmaker() as session:
+        campaign = models.EmailCampaign(name="Welcome", type="drip", status="active")
+        session.add(campaign)
+        await session.flush()
+        first, second = (
+            models.EmailSequence(campaign_id=campaign.id, step_number=step, subject=f"Step {step}", body="Hi")
+            for step in (1, 2)
+        )
+        subscribers = [models.EmailSubscriber(email=f"user{index}@example.com") for index in range(4)]
+        session.add_all([first, second, *subscribers])
+        await session.flush()
+        session.add_all(
+            [
+                models.EmailSend(subscriber_id=subscribers[0].id, sequence_id=first.id, sent_at=now, opened_at=now, clicked_at=now),
+                models.EmailSend(subscriber_id=subscribers[1].id, sequence_id=first.id, sent_at=now, opened_at=now),
+                models.EmailSend(subscriber_id=subscribers[2].id, sequence_id=first.id, sent_at=now),
+                models.EmailSend(subscriber_id=subscribers[3].id, sequence_id=first.id, sent_at=now - timedelta(days=3)),
+                models.EmailSend(subscriber_id=subscribers[0].id, sequence_id=second.id, sent_at=now, opened_at=now),
+                # Queued, not sent yet.
+                models.EmailSend(subscriber_id=subscribers[1].id, sequence_id=second.id),
+            ]
+        )
+        await session.commit()
+        return str(campaign.id), [str(first.id), str(second.id)]
+
+
+async def stat_rows(sessionmaker) -> list[tuple]:
+    async with sessionmaker() as session:
+        result = await session.execute(
+            select(
+                models.EmailDailyStat.day,
+                models.EmailDailyStat.sequence_id,
+                models.EmailDailyStat.sends,
+                models.EmailDailyStat.opens,
+                models.EmailDailyStat.clicks,
+            ).order_by(models.EmailDailyStat.day, models.EmailDailyStat.sends)
+        )
+        return [tuple(row) for row in result]
+
+
+def test_rollup_is_idempotent_and_tracks_late_opens() -> None:
+    async def scenario() -> None:
+        async with api_harness() as h:
+            await seed(h.sessionmaker)
+            async with h.sessionmaker() as session:
+                assert await rollup_email_daily_stats(session) == 3
+            rows = await stat_rows(h.sessionmaker)
+            assert [row[2:] for row in rows] == [(1, 0, 0), (1, 1, 0), (3, 2, 1)]
+
+            async with h.sessionmaker() as session:
+                assert await rollup_email_daily_stats(session) == 3
+            assert await stat_rows(h.sessionmaker) == rows
+
+            # An open arriving later is credited to the day of its send on the next run.
+            async with h.sessionmaker() as session:
+                send = await session.scalar(
+                    select(models.EmailSend)
+                    .where(models.EmailSend.opened_at.is_(None), models.EmailSend.sent_at.isnot(None))
+                    .order_by(models.EmailSend.sent_at)
+                    .limit(1)
+                )
+                send.opened_at = datetime.now(timezone.utc)
+                await session.commit()
+                await rollup_email_daily_stats(session)
+            assert [row[2:] for row in await stat_rows(h.sessionmaker)] == [(1, 1, 0), (1, 1, 0), (3, 2, 1)]
+
+            # A day whose sends are all deleted is zeroed, not left stale.
+            async with h.sessionmaker() as session:
+                yesterday = datetime.now(timezone.utc) - timedelta(days=1)
+                await session.execute(delete(models.EmailSend).where(models.EmailSend.sent_at < yesterday))
+                await session.commit()
+                assert await rollup_email_daily_stats(session) == 3
+            assert [row[2:] for row in await stat_rows(h.sessionmaker)] == [(0, 0, 0), (1, 1, 0), (3, 2, 1)]
+
+    asyncio.run(scenario())
+
+
+def test_analytics_endpoints_read_the_rollup() -> None:
+    async def scenario() -> None:
+        async with api_harness() as h:
+            campaign_id, (first_id, second_id) = await seed(h.sessionmaker)
+            async with h.sessionmaker() as session:
+                await rollup_email_daily_stats(session)
+
+            totals = (await h.client.get("/admin/email/analytics")).json()["sends"]
+            # The queued send counts towards the total, as it did before the rollup.
+            assert (totals["total"], totals["opens"], totals["clicks"]) == (6, 3, 1)
+
+            daily = (await h.client.get("/admin/email/analytics/daily", params={"days": 7})).json()
+            assert len(daily["series"]) == 7
+            today, three_days_ago = daily["series"][-1], daily["series"][-4]
+            assert (today["sends"], today["opens"], today["clicks"]) == (4, 3, 1)
+            assert three_days_ago["sends"] == 1
+            assert sum(point["sends"] for point in daily["series"]) == 5
+            scoped = await h.client.get(
+                "/admin/email/analytics/daily", params={"days": 1, "campaign_id": campaign_id}
+            )
+            assert scoped.json()["series"][0]["sends"] == 4
+
+            campaigns = (await h.client.get("/admin/email/analytics/campaigns")).json()["campaigns"]
+            assert [(c["sends"], c["opens"], c["clicks"], c["open_rate"]) for c in campaigns] == [(5, 3, 1, 60.0)]
+            recent = (await h.client.get("/admin/email/analytics/campaigns", params={"days": 1})).json()
+            assert recent["campaigns"][0]["sends"] == 4
+
+            funnel = (await h.client.get(f"/admin/email/analytics/campaigns/{campaign_id}/funnel")).json()
+            assert [(step["sequence_id"], step["sends"], step["retention_rate"]) for step in funnel["steps"]] == [
+                (first_id, 4, 100.0),
+                (second_id, 1, 25.0),
+            ]
+            missing = await h.client.get("/admin/email/analytics/campaigns/00000000-0000-0000-0000-000000000000/funnel")
+            assert missing.status_code == 404
+
+    asyncio.run(scenario())
@@ -0,0 +1,117 @@
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from marketing_api.db import models
+from marketing_api.experiments import stats
+from marketing_api.experiments.counters import reconcile_test_daily_stats
+from marketing_api.experiments.results import results_cache
+from tests.helpers import api_harness
+
+
+def test_two_proportion_z_test_matches_reference() -> None:
+    z, p_value = stats.two_proportion_z_test(100, 1000, 130, 1000)
+    assert z == pytest.approx(2.1027, abs=1e-4)
+    assert p_value == pytest.approx(0.0355, abs=1e-4)
+    assert stats.two_proportion_z_test(0, 100, 0, 100) == (0.0, 1.0)
+
+
+def test_intervals() -> None:
+    low, high = stats.wilson_interval(10, 100)
+    assert (low, high) == (pytest.approx(0.0552, abs=1e-4), pytest.approx(0.1744, abs=1e-4))
+    low, high = stats.difference_interval(100, 1000, 130, 1000)
+    assert low < 0.03 < high and low > 0
+
+
+def test_chi_square_across_variants() -> None:
+    # With two variants the test is the square of the pooled z-test.
+    z, p_value = stats.two_proportion_z_test(100, 1000, 130, 1000)
+    statistic, chi_p_value, dof = stats.chi_square([100, 130], [1000, 1000])
+    assert (statistic, chi_p_value, dof) == (pytest.approx(z**2), pytest.approx(p_value), 1)
+
+    statistic, p_value, dof = stats.chi_square([100, 130, 90], [1000, 1000, 1000])
+    assert dof == 2
+    assert p_value < 0.05
+    assert stats.chi_square([0, 0], [10, 10]) is None
+
+
+def test_posterior_probabilities() -> None:
+    beat_control, best = stats.posterior_probabilities([100, 130, 100], [1000, 1000, 1000], seed=1)
+    assert beat_control[0] == 0
+    assert beat_control[1] > 0.97
+    assert 0.4 < beat_control[2] < 0.6
+    assert sum(best) == pytest.approx(1)
+
+
+def test_always_valid_p_values_never_increase_and_are_conservative() -> None:
+    days = np.arange(1, 15)
+    sequential = stats.always_valid_p_values(days * 100, days * 1000, days * 112, days * 1000)
+    assert (np.diff(sequential) <= 0).all()
+    # Significant at a single fixed look, but not yet once every daily look is accounted for.
+    _, fixed = stats.two_proportion_z_test(1400, 14_000, 1568, 14_000)
+    assert fixed < 0.05 < sequential[-1]
+
+    sequential = stats.always_valid_p_values(days * 100, days * 1000, days * 115, days * 1000)
+    assert sequential[-1] < 0.05
+
+
+def test_results_endpoint_reports_significance_and_memoizes() -> None:
+    async def scenario() -> None:
+        async with api_harness() as h:
+            start = datetime.now(timezone.utc) - timedelta(days=3)
+            async with h.sessionmaker() as session:
+                test = models.ABTest(name="Hero", status="active", conversion_event="signup")
+                session.add(test)
+                await session.flush()
+                control, variant = (
+                    models.TestVariant(test_id=test.id, name=key, variant_key=key, content_json=json.dumps({}))
+                    for key in ("variant_a", "control")
+                )
+                session.add_all([control, variant])
+                await session.flush()
+                for day in range(3):
+                    for index in range(200):
+                        for target, rate in ((control, 5), (variant, 3)):
+                            assignment = models.TestAssignment(
+                                test_id=test.id,
+                                variant_id=target.id,
+                                unit_id=f"{target.variant_key}-{day}-{index}",
+                                assigned_at=start + timedelta(days=day),
+                            )
+                            session.add(assignment)
+                            await session.flush()
+                            if index % rate == 0:
+                                session.add(
+                                    models.TestConversion(
+                                        test_id=test.id,
+                                        variant_id=target.id,
+                                        assignment_id=assignment.id,
+                                        event_name="signup",
+                                        converted_at=start + timedelta(days=day),
+                                    )
+                                )
+                await session.commit()
+                test_id = test.id
+                # Seeded straight into the raw tables, so rebuild the counters.
+                await reconcile_test_daily_stats(session, lookback_days=7)
+
+            response = await h.client.get(f"/public/ab-testing/tests/{test_id}/results")
+            body = response.json()
+            assert body["control_key"] == "control"
+            assert len(body["daily"]) == 3
+            control_result, variant_result = body["results"]
+            assert (control_result["variant_key"], control_result["visitors"]) == ("control", 600)
+            assert variant_result["lift"] < 0
+            assert variant_result["p_value"] < 0.01
+            assert variant_result["always_valid_p_value"] >= variant_result["p_value"]
+            assert variant_result["probability_to_beat_control"] < 0.01
+            assert body["chi_square"]["dof"] == 1
+
+            again = await h.client.get(f"/public/ab-testing/tests/{test_id}/results")
+            assert again.json() == body
+            assert (results_cache.hits, results_cache.misses) == (1, 1)
+
+    asyncio.run(scenario())
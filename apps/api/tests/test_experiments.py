@@ -0,0 +1,387 @@
+import asyncio
+import json
+import uuid
+from collections import Counter
+
+from sqlalchemy import func, select
+
+from marketing_api.db import models
+from marketing_api.experiments.assignment import (
+    AssignmentRecorder,
+    assignment_recorder,
+    bucket,
+    choose_variant,
+)
+from marketing_api.experiments.bandit import (
+    MIN_SHARE,
+    WEIGHT_TOTAL,
+    thompson_allocation,
+    update_bandit_weights,
+)
+from marketing_api.experiments.config import ExperimentConfig, VariantConfig
+from marketing_api.experiments.conversions import conversion_buffer
+from marketing_api.experiments.counters import reconcile_test_daily_stats
+from tests.helpers import api_harness
+
+
+def make_config(weights: dict[str, int]) -> ExperimentConfig:
+    variants = tuple(
+        VariantConfig(id=uuid.uuid4(), key=key, name=key, weight=weight, content=None)
+        for key, weight in weights.items()
+    )
+    cumulative, total = [], 0
+    for variant in variants:
+        total += variant.weight
+        cumulative.append(total)
+    return ExperimentConfig(
+        id=uuid.uuid4(),
+        name="Hero",
+        status="active",
+        target_url="/",
+        conversion_event="signup",
+        assignment_mode="deterministic",
+        variants=variants,
+        cumulative_weights=tuple(cumulative),
+    )
+
+
+async def seed_test(
+    sessionmaker,
+    *,
+    mode: str = "deterministic",
+    weights=(("control", 50), ("variant_a", 50)),
+    target_url: str = "https://example.com/pricing",
+):
+    async with sessionmaker() as session:
+        test = models.ABTest(
+            name="Hero", status="active", conversion_event="signup", assignment_mode=mode, target_url=target_url
+        )
+        session.add(test)
+        await session.flush()
+        session.add_all(
+            models.TestVariant(
+                test_id=test.id, name=key, variant_key=key, content_json=json.dumps({"headline": key}), weight=weight
+            )
+            for key, weight in weights
+        )
+        await session.commit()
+        return test.id
+
+
+def test_bucket_is_deterministic_and_in_range() -> None:
+    test_id = uuid.uuid4()
+    points = [bucket(test_id, f"visitor-{index}", 100) for index in range(1000)]
+    assert points == [bucket(test_id, f"visitor-{index}", 100) for index in range(1000)]
+    assert min(points) >= 0 and max(points) < 100
+
+
+def test_choose_variant_follows_weights() -> None:
+    config = make_config({"control": 80, "variant_a": 20, "disabled": 0})
+    counts = Counter(choose_variant(config, f"visitor-{index}").key for index in range(20_000))
+    assert counts["disabled"] == 0
+    assert abs(counts["control"] / 20_000 - 0.8) < 0.02
+    assert choose_variant(config, "visitor-1") == choose_variant(config, "visitor-1")
+    assert choose_variant(make_config({"control": 0}), "visitor-1") is None
+
+
+def test_assignment_is_sticky_without_database_reads() -> None:
+    async def scenario() -> None:
+        async with api_harness() as h:
+            test_id = await seed_test(h.sessionmaker)
+            payload = {"test_id": str(test_id), "user_id": "user-1"}
+            first = await h.client.post("/public/ab-testing/assign", json=payload)
+            h.statements.reset()
+            for _ in range(5):
+                again = await h.client.post("/public/ab-testing/assign", json=payload)
+                assert again.json() == first.json()
+            assert h.statements.count == 0
+            assert first.json()["content"] == {"headline": first.json()["variant_key"]}
+
+            assert assignment_recorder.pending() == 1
+            await assignment_recorder.flush(h.sessionmaker)
+            async with h.sessionmaker() as session:
+                rows = (await session.execute(select(models.TestAssignment))).scalars().all()
+            assert [(row.unit_id, row.user_id) for row in rows] == [("user-1", "user-1")]
+
+    asyncio.run(scenario())
+
+
+def test_variant_changes_invalidate_config_cache() -> None:
+    async def scenario() -> None:
+        async with api_harness() as h:
+            test_id = await seed_test(h.sessionmaker, weights=(("control", 100),))
+            payload = {"test_id": str(test_id), "session_id": "session-1"}
+            assert (await h.client.post("/public/ab-testing/assign", json=payload)).json()["variant_key"] == "control"
+
+            async with h.sessionmaker() as session:
+                test = await session.get(models.ABTest, test_id)
+                test.status = "paused"
+                await session.commit()
+            response = await h.client.post("/public/ab-testing/assign", json=payload)
+            assert response.json() == {"variant_key": "control", "content": None}
+
+    asyncio.run(scenario())
+
+
+def test_active_deterministic_tests_refuse_new_variants() -> None:
+    async def scenario() -> None:
+        async with api_harness() as h:
+            variant = {"name": "B", "variant_key": "variant_b", "content_json": "{}", "weight": 50}
+            test_id = await seed_test(h.sessionmaker)
+            payload = {"test_id": str(test_id), "user_id": "user-1"}
+            before = (await h.client.post("/public/ab-testing/assign", json=payload)).json()
+
+            response = await h.client.post(f"/public/ab-testing/tests/{test_id}/variants", json=variant)
+            assert response.status_code == 409
+            assert (await h.client.post("/public/ab-testing/assign", json=payload)).json() == before
+
+            # Paused deterministic tests and random tests (sticky by stored row) can still change.
+            async with h.sessionmaker() as session:
+                test = await session.get(models.ABTest, test_id)
+                test.status = "paused"
+                await session.commit()
+            response = await h.client.post(f"/public/ab-testing/tests/{test_id}/variants", json=variant)
+            assert response.status_code == 200
+            random_id = await seed_test(h.sessionmaker, mode="random")
+            response = await h.client.post(f"/public/ab-testing/tests/{random_id}/variants", json=variant)
+            assert response.status_code == 200
+
+    asyncio.run(scenario())
+
+
+def test_conversion_flushed_before_its_assignment() -> None:
+    async def scenario() -> None:
+        async with api_harness() as h:
+            test_id = await seed_test(h.sessionmaker)
+            payload = {"test_id": str(test_id), "session_id": "session-1"}
+            assigned = (await h.client.post("/public/ab-testing/assign", json=payload)).json()
+            for _ in range(2):
+                response = await h.client.post(
+                    "/public/ab-testing/conversion", json={**payload, "event_name": "signup"}
+                )
+                assert response.json() == {"status": "accepted"}
+            assert conversion_buffer.pending() == 1
+
+            # The conversion writes the assignment; the recorder's copy is ignored.
+            await conversion_buffer.flush(h.sessionmaker)
+            await assignment_recorder.flush(h.sessionmaker)
+            async with h.sessionmaker() as session:
+                assignments = (await session.execute(select(models.TestAssignment))).scalars().all()
+                conversions = (await session.execute(select(models.TestConversion))).scalars().all()
+                variant = await session.get(models.TestVariant, assignments[0].variant_id)
+            assert len(assignments) == 1 and len(conversions) == 1
+            assert conversions[0].assignment_id == assignments[0].id
+            assert variant.variant_key == assigned["variant_key"]
+            assert assignment_recorder.stats.dropped_failed == 0
+
+    asyncio.run(scenario())
+
+
+def test_batched_conversions_are_validated_and_deduplicated() -> None:
+    async def scenario() -> None:
+        async with api_harness() as h:
+            test_id = await seed_test(h.sessionmaker)
+            legacy_id = await seed_test(h.sessionmaker, mode="random")
+            events = [
+                {"test_id": str(test_id), "event_name": "signup", "user_id": f"user-{index}"} for index in range(50)
+            ]
+            events += [
+                {"test_id": str(uuid.uuid4()), "event_name": "signup", "user_id": "user-1"},
+                {"test_id": "not-a-uuid", "event_name": "signup", "user_id": "user-1"},
+                {"test_id": str(test_id), "event_name": "signup"},
+                {"test_id": str(legacy_id), "event_name": "signup", "user_id": "never-assigned"},
+            ]
+            response = await h.client.post("/public/ab-testing/conversions", json={"events": events})
+            assert response.json() == {
+                "accepted": 51,
+                "rejected": [
+                    {"index": 50, "detail": "Test not found"},
+                    {"index": 51, "detail": "Test not found"},
+                    {"index": 52, "detail": "A user_id or session_id is required"},
+                ],
+            }
+
+            h.statements.reset()
+            await conversion_buffer.flush(h.sessionmaker)
+            # assignments, their counters, lookup, conversions, their counters, plus the transaction
+            assert h.statements.count <= 7
+            assert conversion_buffer.stats.unassigned == 1
+
+            # A second process sending the same events adds nothing.
+            conversion_buffer.reset()
+            await h.client.post("/public/ab-testing/conversions", json={"events": events[:10]})
+            await conversion_buffer.flush(h.sessionmaker)
+            assert conversion_buffer.stats.duplicates == 10
+            async with h.sessionmaker() as session:
+                count = await session.scalar(select(func.count()).select_from(models.TestConversion))
+            assert count == 50
+
+    asyncio.run(scenario())
+
+
+def test_daily_counters_follow_flushes_and_reconcile() -> None:
+    async def scenario() -> None:
+        async with api_harness() as h:
+            test_id = await seed_test(h.sessionmaker)
+            for index in range(20):
+                await h.client.post("/public/ab-testing/assign", json={"test_id": str(test_id), "user_id": f"u{index}"})
+            events = [
+                {"test_id": str(test_id), "event_name": event, "user_id": f"u{index}"}
+                for index in range(5)
+                for event in ("signup", "click")
+            ]
+            events.append({"test_id": str(test_id), "event_name": "signup", "user_id": "late"})
+            await h.client.post("/public/ab-testing/conversions", json={"events": events})
+            await assignment_recorder.flush(h.sessionmaker)
+            await conversion_buffer.flush(h.sessionmaker)
+
+            async def totals():
+                async with h.sessionmaker() as session:
+                    return tuple(
+                        (
+                            await session.execute(
+                                select(func.sum(models.TestDailyStat.visitors), func.sum(models.TestDailyStat.conversions))
+                            )
+                        ).one()
+                    )
+
+            # Only the test's conversion_event counts, once per visitor.
+            assert await totals() == (21, 6)
+            listed = (await h.client.get("/public/ab-testing/tests")).json()
+            assert listed["tests"][0]["total_visitors"] == 21
+
+            async with h.sessionmaker() as session:
+                await session.execute(models.TestDailyStat.__table__.update().values(visitors=0, conversions=99))
+                await session.commit()
+                await reconcile_test_daily_stats(session)
+            assert await totals() == (21, 6)
+
+    asyncio.run(scenario())
+
+
+def test_random_mode_keeps_stored_assignments() -> None:
+    async def scenario() -> None:
+        async with api_harness() as h:
+            test_id = await seed_test(h.sessionmaker, mode="random")
+            payload = {"test_id": str(test_id), "user_id": "user-1"}
+            first = await h.client.post("/public/ab-testing/assign", json=payload)
+            second = await h.client.post("/public/ab-testing/assign", json=payload)
+            assert first.json() == second.json()
+            assert assignment_recorder.pending() == 0
+            async with h.sessionmaker() as session:
+                count = await session.scalar(select(func.count()).select_from(models.TestAssignment))
+            assert count == 1
+
+    asyncio.run(scenario())
+
+
+def test_thompson_allocation_favours_the_leader_but_keeps_exploring() -> None:
+    weights = thompson_allocation([50, 80, 20], [1000, 1000, 1000], seed=1)
+    assert sum(weights) == WEIGHT_TOTAL
+    assert weights[1] > 0.9 * WEIGHT_TOTAL
+    assert min(weights) >= MIN_SHARE * WEIGHT_TOTAL
+    # No data yet: an even split, up to sampling noise.
+    even = thompson_allocation([0, 0], [0, 0], seed=1)
+    assert abs(even[0] - even[1]) < 0.02 * WEIGHT_TOTAL
+
+
+def test_bandit_weights_are_published_to_the_config() -> None:
+    async def scenario() -> None:
+        async with api_harness() as h:
+            test_id = await seed_test(h.sessionmaker, mode="bandit")
+            first = await h.client.post("/public/ab-testing/assign", json={"test_id": str(test_id), "user_id": "u0"})
+            for index in range(1, 40):
+                await h.client.post("/public/ab-testing/assign", json={"test_id": str(test_id), "user_id": f"u{index}"})
+            stats = models.TestDailyStat.__table__
+            async with h.sessionmaker() as session:
+                leader = await session.scalar(
+                    select(models.TestVariant.id).where(
+                        models.TestVariant.test_id == test_id, models.TestVariant.variant_key == "variant_a"
+                    )
+                )
+                await session.execute(stats.update().values(visitors=1000, conversions=10))
+                await session.execute(stats.update().where(stats.c.variant_id == leader).values(conversions=60))
+                await session.commit()
+                assert await update_bandit_weights(session) == 2
+                assert await update_bandit_weights(session) == 0
+
+            config = (await h.client.get("/public/ab-testing/config")).json()["tests"][0]
+            weights = {variant["variant_key"]: variant["weight"] for variant in config["variants"]}
+            assert weights["variant_a"] > 0.9 * WEIGHT_TOTAL
+            assert sum(weights.values()) == WEIGHT_TOTAL
+
+            # Visitors keep the variant they were first given.
+            again = await h.client.post("/public/ab-testing/assign", json={"test_id": str(test_id), "user_id": "u0"})
+            assert again.json() == first.json()
+
+    asyncio.run(scenario())
+
+
+def test_recorder_skips_repeat_visitors_and_bounds_its_buffer() -> None:
+    recorder = AssignmentRecorder(capacity=2, batch_size=10)
+    test_id, variant_id = uuid.uuid4(), uuid.uuid4()
+    recorder.record(test_id, variant_id, user_id="user-1")
+    recorder.record(test_id, variant_id, user_id="user-1")
+    recorder.record(test_id, variant_id, session_id="session-1")
+    recorder.record(test_id, variant_id)
+    assert recorder.snapshot() == {
+        "recorded": 3,
+        "skipped_seen": 1,
+        "written": 0,
+        "batches": 0,
+        "dropped_overflow": 1,
+        "dropped_failed": 0,
+        "pending": 2,
+    }
+
+
+def test_bulk_assignment_covers_every_test_on_the_page() -> None:
+    async def scenario() -> None:
+        async with api_harness() as h:
+            hero = await seed_test(h.sessionmaker)
+            legacy = await seed_test(h.sessionmaker, mode="random", target_url="/pricing/")
+            await seed_test(h.sessionmaker, target_url="/about")
+            payload = {"target_url": "https://example.com/pricing?ref=ad", "session_id": "session-1"}
+            response = await h.client.post("/public/ab-testing/assign/bulk", json=payload)
+            body = response.json()
+            assert {item["test_id"] for item in body["assignments"]} == {str(hero), str(legacy)}
+            assert (await h.client.post("/public/ab-testing/assign/bulk", json=payload)).json() == body
+
+            single = await h.client.post(
+                "/public/ab-testing/assign", json={"test_id": str(hero), "session_id": "session-1"}
+            )
+            hero_assignment = next(item for item in body["assignments"] if item["test_id"] == str(hero))
+            assert single.json()["variant_key"] == hero_assignment["variant_key"]
+
+    asyncio.run(scenario())
+
+
+def test_config_is_etag_versioned() -> None:
+    async def scenario() -> None:
+        async with api_harness() as h:
+            test_id = await seed_test(h.sessionmaker)
+            response = await h.client.get("/public/ab-testing/config", params={"target_url": "/pricing"})
+            etag = response.headers["etag"]
+            assert response.headers["cache-control"].startswith("public, max-age=")
+            [test] = response.json()["tests"]
+            assert test["test_id"] == str(test_id)
+            assert {variant["variant_key"]: variant["content"] for variant in test["variants"]} == {
+                "control": {"headline": "control"},
+                "variant_a": {"headline": "variant_a"},
+            }
+            assert (await h.client.get("/public/ab-testing/config", params={"target_url": "/blog"})).json()[
+                "tests"
+            ] == []
+
+            cached = await h.client.get("/public/ab-testing/config", headers={"If-None-Match": etag})
+            assert cached.status_code == 304
+
+            async with h.sessionmaker() as session:
+                variant = (await session.execute(select(models.TestVariant).limit(1))).scalar_one()
+                variant.weight = 10
+                await session.commit()
+            changed = await h.client.get("/public/ab-testing/config", headers={"If-None-Match": etag})
+            assert changed.status_code == 200
+            assert changed.headers["etag"] != etag
+
+    asyncio.run(scenario())
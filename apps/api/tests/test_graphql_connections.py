@@ -0,0 +1,130 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select, update
+
+from marketing_api.auth.tokens import create_access_token
+from marketing_api.db import models
+from marketing_api.graphql.connections import DEFAULT_PAGE_SIZE
+from tests.helpers import api_harness
+
+CUSTOMERS_QUERY = """
+query Customers($first: Int!, $after: String) {
+  customers_connection(first: $first, after: $after, order_by: name, direction: ASC) {
+    page_info { has_next_page end_cursor }
+    edges {
+      cursor
+      node {
+        name
+        contacts { full_name customer { name } }
+        deals { name stage { name } }
+      }
+    }
+  }
+}
+"""
+
+
+async def seed(sessionmaker, rows: int) -> str:
+    async with sessionmaker() as session:
+        user = models.User(email="admin@example.com", hashed_password="x")
+        stage = models.PipelineStage(name="Qualified", order=1)
+        session.add_all([user, stage])
+        await session.flush()
+        for index in range(rows):
+            customer = models.Customer(name=f"Customer {index:03d}")
+            session.add(customer)
+            await session.flush()
+            session.add_all(
+                [
+                    models.Contact(customer_id=customer.id, full_name=f"Contact {index}"),
+                    models.Deal(customer_id=customer.id, stage_id=stage.id, name=f"Deal {index}"),
+                ]
+            )
+        await session.commit()
+        return create_access_token(str(user.id))
+
+
+async def fetch_customers(rows: int, first: int) -> tuple[list[dict], int]:
+    async with api_harness() as harness:
+        token = await seed(harness.sessionmaker, rows)
+        headers = {"Authorization": f"Bearer {token}"}
+        pages, after = [], None
+        while True:
+            harness.statements.reset()
+            response = await harness.client.post(
+                "/graphql",
+                json={"query": CUSTOMERS_QUERY, "variables": {"first": first, "after": after}},
+                headers=headers,
+            )
+            body = response.json()
+            assert "errors" not in body, body
+            connection = body["data"]["customers_connection"]
+            pages.append(connection)
+            if not connection["page_info"]["has_next_page"]:
+                return pages, harness.statements.count
+            after = connection["page_info"]["end_cursor"]
+
+
+def test_connection_pages_through_every_row_in_order() -> None:
+    pages, _ = asyncio.run(fetch_customers(rows=7, first=3))
+    names = [edge["node"]["name"] for page in pages for edge in page["edges"]]
+    assert names == [f"Customer {index:03d}" for index in range(7)]
+    assert [len(page["edges"]) for page in pages] == [3, 3, 1]
+    node = pages[0]["edges"][0]["node"]
+    assert node["contacts"] == [{"full_name": "Contact 0", "customer": {"name": "Customer 000"}}]
+    assert node["deals"] == [{"name": "Deal 0", "stage": {"name": "Qualified"}}]
+
+
+def test_nested_relations_are_batched_per_page() -> None:
+    _, small = asyncio.run(fetch_customers(rows=2, first=50))
+    _, large = asyncio.run(fetch_customers(rows=25, first=50))
+    assert small == large, f"nested connection fields issue more statements as rows grow ({small} -> {large})"
+
+
+def test_list_queries_page_by_cursor() -> None:
+    async def scenario() -> None:
+        async with api_harness() as harness:
+            token = await seed(harness.sessionmaker, DEFAULT_PAGE_SIZE + 3)
+            headers = {"Authorization": f"Bearer {token}"}
+            async with harness.sessionmaker() as session:
+                # Pairs of customers share a created_at, so the id breaks ties.
+                ids = (await session.scalars(select(models.Customer.id))).all()
+                for index, customer_id in enumerate(ids):
+                    await session.execute(
+                        update(models.Customer)
+                        .where(models.Customer.id == customer_id)
+                        .values(created_at=datetime(2026, 1, 1, tzinfo=timezone.utc) + timedelta(minutes=index // 2))
+                    )
+                await session.commit()
+
+            async def customers(**variables) -> dict:
+                response = await harness.client.post(
+                    "/graphql",
+                    json={
+                        "query": "query($first: Int, $after: String) { customers(first: $first, after: $after) { name cursor } }"
+                        if variables
+                        else "{ customers { name } }",
+                        "variables": variables,
+                    },
+                    headers=headers,
+                )
+                return response.json()
+
+            # Omitting ``first`` no longer returns every row.
+            assert len((await customers())["data"]["customers"]) == DEFAULT_PAGE_SIZE
+
+            names, after = [], None
+            for _ in range(5):
+                page = (await customers(first=20, after=after))["data"]["customers"]
+                names.extend(customer["name"] for customer in page)
+                if len(page) < 20:
+                    break
+                after = page[-1]["cursor"]
+            assert len(names) == len(set(names)) == DEFAULT_PAGE_SIZE + 3
+
+            for after in ("not-a-cursor", "00000000-0000-0000-0000-000000000000"):
+                errors = (await customers(first=5, after=after))["errors"]
+                assert errors[0]["message"] == "Invalid after."
+
+    asyncio.run(scenario())
@@ -0,0 +1,110 @@
+import asyncio
+import hashlib
+
+from marketing_api.auth.tokens import create_access_token
+from marketing_api.db import models
+from marketing_api.graphql.persisted_queries import persisted_queries
+from tests.helpers import api_harness
+
+DEEP_QUERY = """
+query {
+  deals_connection(first: 1) {
+    nodes { customer { deals { customer { deals { customer { deals { customer { deals { name } } } } } } } } }
+  }
+}
+"""
+
+
+async def create_user(sessionmaker, role: str | None = None) -> str:
+    async with sessionmaker() as session:
+        user = models.User(email="user@example.com", hashed_password="x")
+        if role:
+            user.roles = [models.Role(name=role)]
+        session.add(user)
+        await session.commit()
+        return create_access_token(str(user.id))
+
+
+async def post_graphql(harness, payload: dict, token: str | None = None) -> dict:
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    response = await harness.client.post("/graphql", json=payload, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_cheap_queries_never_touch_the_database() -> None:
+    async def scenario() -> int:
+        async with api_harness() as harness:
+            token = await create_user(harness.sessionmaker)
+            harness.statements.reset()
+            body = await post_graphql(harness, {"query": "{ health services { slug } }"}, token)
+            assert body["data"]["health"] == "ok"
+            return harness.statements.count
+
+    assert asyncio.run(scenario()) == 0
+
+
+def test_depth_and_cost_limits() -> None:
+    async def scenario() -> tuple[dict, dict, dict, dict]:
+        async with api_harness() as harness:
+            user_token = await create_user(harness.sessionmaker)
+            harness.statements.reset()
+            anonymous = await post_graphql(harness, {"query": "{ leads_connection(first: 200) { nodes { id } } }"})
+            assert harness.statements.count == 0
+            too_deep = await post_graphql(harness, {"query": DEEP_QUERY}, user_token)
+            too_costly = await post_graphql(
+                harness,
+                {"query": "{ customers_connection(first: 500) { nodes { deals { name stage { name } } } } }"},
+                user_token,
+            )
+            allowed = await post_graphql(
+                harness, {"query": "{ customers_connection(first: 100) { nodes { name } } }"}, user_token
+            )
+            return anonymous, too_deep, too_costly, allowed
+
+    anonymous, too_deep, too_costly, allowed = asyncio.run(scenario())
+    assert anonymous["errors"][0]["extensions"]["code"] == "QUERY_TOO_COMPLEX"
+    assert too_deep["errors"][0]["extensions"]["code"] == "QUERY_TOO_DEEP"
+    assert too_costly["errors"][0]["extensions"]["code"] == "QUERY_TOO_COMPLEX"
+    assert "errors" not in allowed
+    assert allowed["extensions"]["cost"] == {"depth": 3, "cost": 201, "budget": 10000}
+
+
+def test_admin_role_gets_a_larger_budget() -> None:
+    async def scenario() -> dict:
+        async with api_harness() as harness:
+            token = await create_user(harness.sessionmaker, role="admin")
+            return await post_graphql(
+                harness,
+                {"query": "{ customers_connection(first: 500) { nodes { deals { name stage { name } } } } }"},
+                token,
+            )
+
+    body = asyncio.run(scenario())
+    assert "errors" not in body, body
+    assert body["extensions"]["cost"]["budget"] == 50000
+
+
+def test_automatic_persisted_queries() -> None:
+    query = "query Health { health }"
+    query_hash = hashlib.sha256(query.encode()).hexdigest()
+    apq = {"persistedQuery": {"version": 1, "sha256Hash": query_hash}}
+
+    async def scenario() -> list[dict]:
+        persisted_queries.clear()
+        async with api_harness() as harness:
+            return [
+                await post_graphql(harness, {"extensions": apq}),
+                await post_graphql(harness, {"query": query, "extensions": apq}),
+                await post_graphql(harness, {"extensions": apq}),
+                await post_graphql(
+                    harness,
+                    {"query": query, "extensions": {"persistedQuery": {"version": 1, "sha256Hash": "0" * 64}}},
+                ),
+            ]
+
+    missing, registered, hit, mismatch = asyncio.run(scenario())
+    assert missing["errors"][0]["message"] == "PersistedQueryNotFound"
+    assert registered["data"] == {"health": "ok"}
+    assert hit["data"] == {"health": "ok"}
+    assert mismatch["errors"][0]["extensions"]["code"] == "INVALID_PERSISTED_QUERY_HASH"
@@ -0,0 +1,72 @@
+import time
+
+import pytest
+from limits import parse
+from limits.storage import MemoryStorage
+from limits.strategies import SlidingWindowCounterRateLimiter
+from starlette.requests import Request
+
+from marketing_api.limits import LeasedRateLimiter, client_ip
+
+
+def make_request(peer: str, forwarded_for: str | None = None) -> Request:
+    headers = [(b"x-forwarded-for", forwarded_for.encode())] if forwarded_for else []
+    return Request({"type": "http", "client": (peer, 12345), "headers": headers})
+
+
+def test_client_ip_only_trusts_forwarded_for_from_trusted_proxies() -> None:
+    assert client_ip(make_request("203.0.113.9", "198.51.100.1")) == "203.0.113.9"
+    assert client_ip(make_request("127.0.0.1", "198.51.100.1")) == "198.51.100.1"
+    # A client-supplied first hop cannot override what the proxy appended.
+    assert client_ip(make_request("127.0.0.1", "10.9.9.9, 198.51.100.1")) == "198.51.100.1"
+    assert client_ip(make_request("127.0.0.1", "198.51.100.1, 127.0.0.1")) == "198.51.100.1"
+    assert client_ip(make_request("127.0.0.1")) == "127.0.0.1"
+
+
+class CountingLimiter(SlidingWindowCounterRateLimiter):
+    def __init__(self, storage) -> None:
+        super().__init__(storage)
+        self.calls = 0
+
+    def hit(self, item, *identifiers, cost=1) -> bool:
+        self.calls += 1
+        return super().hit(item, *identifiers, cost=cost)
+
+
+def test_leases_cut_storage_hits_without_exceeding_the_limit() -> None:
+    backend = CountingLimiter(MemoryStorage())
+    limiter = LeasedRateLimiter(backend)
+    limit = parse("100/minute")
+
+    results = [limiter.hit(limit, "client", "endpoint") for _ in range(105)]
+
+    assert results == [True] * 100 + [False] * 5
+    assert backend.calls < 25
+
+
+def test_low_limits_always_hit_storage() -> None:
+    backend = CountingLimiter(MemoryStorage())
+    limiter = LeasedRateLimiter(backend)
+    limit = parse("3/minute")
+
+    assert [limiter.hit(limit, "client", "checkout") for _ in range(4)] == [True, True, True, False]
+    assert backend.calls == 4
+
+
+def test_leases_never_refuse_requests_under_the_limit(monkeypatch: pytest.MonkeyPatch) -> None:
+    clock = [1_000_000.0]
+    monkeypatch.setattr(time, "time", lambda: clock[0])
+    monkeypatch.setattr(time, "monotonic", lambda: clock[0])
+    storage = MemoryStorage()
+    backend = CountingLimiter(storage)
+    workers = [LeasedRateLimiter(backend) for _ in range(4)]
+    limit = parse("100/minute")
+
+    # 75 requests a minute spread over four processes for five minutes.
+    denied = 0
+    for request in range(375):
+        clock[0] += 0.8
+        denied += not workers[request % 4].hit(limit, "client", "endpoint")
+
+    assert denied == 0
+    assert backend.calls < 375
@@ -0,0 +1,114 @@
+import asyncio
+import json
+import time
+
+import pytest
+from sqlalchemy import select
+
+from marketing_api.db import models
+from marketing_api.llm import LLMGateway, llm_gateway, llm_tokens
+from tests.helpers import TOKENS, FakeOpenAI, api_harness, serve
+
+
+def test_gateway_pools_its_client_retries_and_counts_tokens() -> None:
+    fake = FakeOpenAI()
+    with serve(fake) as base_url:
+        gateway = LLMGateway(api_key="sk-test", base_url=base_url, max_retries=1)
+
+        async def scenario() -> None:
+            before = llm_tokens.value(feature="test", kind="completion")
+            first = await gateway.complete([{"role": "user", "content": "hi"}], feature="test", max_tokens=50)
+            client = gateway._client
+            fake.failures = 1
+            second = await gateway.complete([{"role": "user", "content": "hi"}], feature="test", max_tokens=50)
+            assert gateway._client is client
+            assert first == second
+            assert (first.text, first.prompt_tokens, first.completion_tokens) == ("".join(TOKENS), 12, 6)
+            assert llm_tokens.value(feature="test", kind="completion") - before == 12
+
+            fake.failures = 1
+            with pytest.raises(Exception):
+                await gateway.complete(
+                    [{"role": "user", "content": "hi"}], feature="test", max_tokens=50, max_retries=0
+                )
+            await gateway.aclose()
+
+        asyncio.run(scenario())
+    assert len(fake.requests) == 4
+
+
+def test_stream_yields_the_first_token_before_generation_finishes() -> None:
+    fake = FakeOpenAI(token_delay=0.1)
+    with serve(fake) as base_url:
+        gateway = LLMGateway(api_key="sk-test", base_url=base_url)
+
+        async def scenario() -> None:
+            before = llm_tokens.value(feature="test_stream", kind="prompt")
+            started = time.perf_counter()
+            arrivals = []
+            async for text in gateway.stream([{"role": "user", "content": "hi"}], feature="test_stream", max_tokens=50):
+                arrivals.append((time.perf_counter() - started, text))
+            await gateway.aclose()
+            assert "".join(text for _, text in arrivals) == "".join(TOKENS)
+            assert arrivals[-1][0] >= 0.5
+            assert arrivals[0][0] < arrivals[-1][0] / 2
+            assert llm_tokens.value(feature="test_stream", kind="prompt") - before == 12
+
+        asyncio.run(scenario())
+    assert fake.requests[0]["stream_options"] == {"include_usage": True}
+
+
+def parse_events(body: str) -> list[tuple[str, dict]]:
+    events = []
+    for block in body.strip().split("\n\n"):
+        event, data = block.split("\n")
+        events.append((event.removeprefix("event: "), json.loads(data.removeprefix("data: "))))
+    return events
+
+
+def test_chat_and_content_stream_over_sse(monkeypatch: pytest.MonkeyPatch) -> None:
+    fake = FakeOpenAI()
+    with serve(fake) as base_url:
+        monkeypatch.setattr(llm_gateway, "api_key", "sk-test")
+        monkeypatch.setattr(llm_gateway, "base_url", base_url)
+        monkeypatch.setattr(llm_gateway, "_client", None)
+
+        async def scenario() -> None:
+            async with api_harness() as h:
+                response = await h.client.post(
+                    "/public/chat/ai-response", json={"message": "What do you offer?", "stream": True}
+                )
+                assert response.headers["content-type"].startswith("text/event-stream")
+                events = parse_events(response.text)
+                assert [name for name, _ in events] == ["token"] * len(TOKENS) + ["done"]
+                session_id = events[-1][1]["session_id"]
+
+                response = await h.client.post(
+                    "/public/content/generate",
+                    json={"content_type": "blog_post", "topic": "Local SEO", "stream": True},
+                )
+                events = parse_events(response.text)
+                assert "".join(data["text"] for name, data in events if name == "token") == "".join(TOKENS)
+                assert events[-1] == (
+                    "done",
+                    {"content_type": "blog_post", "topic": "Local SEO", "usage_count": None, "limit": 3, "cached": False},
+                )
+
+                # Buffered responses still work and go through the same client.
+                response = await h.client.post("/public/chat/ai-response", json={"message": "Thanks"})
+                assert response.json()["response"] == "".join(TOKENS)
+
+                async with h.sessionmaker() as session:
+                    replies = (
+                        await session.execute(
+                            select(models.ChatMessage.ai_response_text).where(
+                                models.ChatMessage.chat_session_id == session_id, models.ChatMessage.is_ai_response
+                            )
+                        )
+                    ).scalars().all()
+                    generated = (await session.execute(select(models.GeneratedContent.generated_text))).scalars().all()
+                assert replies == ["".join(TOKENS)]
+                assert generated == ["".join(TOKENS)]
+            await llm_gateway.aclose()
+
+        asyncio.run(scenario())
@@ -0,0 +1,89 @@
+import asyncio
+
+from marketing_api.metrics import Registry, observe_outbound, outbound_request_duration
+from marketing_api.settings import settings
+from tests.helpers import api_harness
+
+
+def test_registry_renders_prometheus_text() -> None:
+    registry = Registry()
+    requests = registry.counter("jobs", "Jobs processed.", ("queue",))
+    latency = registry.histogram("job_seconds", "Job latency.", buckets=(0.1, 1.0))
+    registry.collected("pool", "Pool occupancy.", ("state",), lambda: {("idle",): 3})
+
+    requests.inc(queue="emails")
+    requests.inc(2, queue="emails")
+    latency.observe(0.05)
+    latency.observe(0.5)
+
+    assert registry.render().splitlines() == [
+        "# HELP jobs Jobs processed.",
+        "# TYPE jobs counter",
+        'jobs_total{queue="emails"} 3',
+        "# HELP job_seconds Job latency.",
+        "# TYPE job_seconds histogram",
+        'job_seconds_bucket{le="0.1"} 1',
+        'job_seconds_bucket{le="1"} 2',
+        'job_seconds_bucket{le="+Inf"} 2',
+        "job_seconds_count 2",
+        "job_seconds_sum 0.55",
+        "# HELP pool Pool occupancy.",
+        "# TYPE pool gauge",
+        'pool{state="idle"} 3',
+    ]
+
+
+def test_observe_outbound_labels_failures() -> None:
+    before = outbound_request_duration.count(service="test-service", outcome="error")
+    try:
+        with observe_outbound("test-service"):
+            raise TimeoutError
+    except TimeoutError:
+        pass
+    assert outbound_request_duration.count(service="test-service", outcome="error") == before + 1
+
+
+def test_metrics_endpoint_reports_route_templates(monkeypatch) -> None:
+    monkeypatch.setattr(settings, "celery_broker_url", "memory://")
+
+    async def scenario() -> None:
+        async with api_harness() as h:
+            assert (await h.client.get("/health/live")).json() == {"status": "ok"}
+            ready = await h.client.get("/health/ready")
+            assert ready.status_code == 200
+            assert ready.json() == {"status": "ok", "database": "ok"}
+            await h.client.get("/graphql/does-not-exist")
+
+            response = await h.client.get("/metrics")
+            assert response.status_code == 200
+            assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+            body = response.text
+            assert 'http_request_duration_seconds_count{method="GET",route="/health/ready",status="200"}' in body
+            assert 'route="<unmatched>",status="404"' in body
+            assert 'cache_requests_total{cache="principal",result="hit"}' in body
+
+    asyncio.run(scenario())
+
+
+def test_metrics_endpoint_requires_token_when_configured(monkeypatch) -> None:
+    monkeypatch.setattr(settings, "metrics_token", "scrape-secret")
+    monkeypatch.setattr(settings, "celery_broker_url", "memory://")
+
+    async def scenario() -> None:
+        async with api_harness() as h:
+            assert (await h.client.get("/metrics")).status_code == 401
+            response = await h.client.get("/metrics", headers={"Authorization": "Bearer scrape-secret"})
+            assert response.status_code == 200
+
+    asyncio.run(scenario())
+
+
+def test_metrics_endpoint_is_closed_without_a_token_outside_development(monkeypatch) -> None:
+    monkeypatch.setattr(settings, "metrics_token", None)
+    monkeypatch.setattr(settings, "app_env", "production")
+
+    async def scenario() -> None:
+        async with api_harness() as h:
+            assert (await h.client.get("/metrics")).status_code == 403
+
+    asyncio.run(scenario())
@@ -0,0 +1,100 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI, HTTPException
+
+from marketing_api import posthog_client
+from marketing_api.middleware import alerts
+from marketing_api.middleware.alerts import ErrorAlertMiddleware
+from marketing_api.middleware.posthog import PostHogMiddleware
+from marketing_api.notifications.alerts import AlertAggregator
+from marketing_api.settings import settings
+
+
+class FakePostHog:
+    def __init__(self) -> None:
+        self.events: list[tuple[str, dict]] = []
+
+    def capture(self, distinct_id: str, event: str, properties: dict) -> None:
+        self.events.append((event, properties))
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/health")
+    async def health() -> dict[str, str]:
+        return {"status": "ok"}
+
+    @app.get("/items")
+    async def items() -> list[int]:
+        return [1, 2]
+
+    @app.get("/missing")
+    async def missing() -> None:
+        raise HTTPException(status_code=404)
+
+    @app.get("/boom")
+    async def boom() -> None:
+        raise RuntimeError("boom")
+
+    return app
+
+
+async def request_paths(app, paths: list[str]) -> list[int]:
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return [(await client.get(path)).status_code for path in paths]
+
+
+@pytest.fixture
+def posthog(monkeypatch) -> FakePostHog:
+    fake = FakePostHog()
+    monkeypatch.setattr(posthog_client, "_posthog_client", fake)
+    return fake
+
+
+def test_posthog_middleware_skips_excluded_paths_and_samples(posthog) -> None:
+    app = build_app()
+    app.add_middleware(PostHogMiddleware, exclude_paths=("/health",), sample_rate=0.0)
+
+    statuses = asyncio.run(request_paths(app, ["/health", "/items?page=2", "/missing", "/boom"]))
+
+    assert statuses == [200, 200, 404, 500]
+    assert [(event, props["endpoint"], props["status_code"]) for event, props in posthog.events] == [
+        ("api_error", "/missing", 404),
+        ("api_error", "/boom", 500),
+    ]
+    assert posthog.events[1][1]["error_type"] == "RuntimeError"
+
+
+def test_posthog_middleware_records_sampled_performance(posthog) -> None:
+    app = build_app()
+    app.add_middleware(PostHogMiddleware, exclude_paths=(), sample_rate=1.0)
+
+    asyncio.run(request_paths(app, ["/items?page=2"]))
+
+    [(event, properties)] = posthog.events
+    assert event == "api_performance"
+    assert properties["status_code"] == 200
+    assert properties["query_params"] == {"page": "2"}
+
+
+def test_error_alerts_fire_for_server_errors_in_production(monkeypatch) -> None:
+    sent: list[str] = []
+    aggregator = AlertAggregator(lambda subject, message, body: sent.append(message), window_seconds=60)
+    monkeypatch.setattr(settings, "app_env", "production")
+    monkeypatch.setattr(alerts, "alert_aggregator", aggregator)
+    app = build_app()
+    app.add_middleware(ErrorAlertMiddleware)
+
+    async def scenario() -> list[int]:
+        statuses = await request_paths(app, ["/items", "/missing", "/boom"])
+        await aggregator.flush()
+        return statuses
+
+    assert asyncio.run(scenario()) == [200, 404, 500]
+    assert sent == ["Critical API Error: 500 GET http://test/boom"]
+    [counter] = aggregator.snapshot()["fingerprints"]
+    assert counter["fingerprint"] == "GET /boom RuntimeError"
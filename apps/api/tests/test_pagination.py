@@ -0,0 +1,160 @@
+import asyncio
+import base64
+import csv
+import io
+import json
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import update
+
+from marketing_api.db import models
+from marketing_api.db.pagination import decode_cursor, encode_cursor
+from tests.helpers import api_harness
+
+
+async def seed(sessionmaker, subscribers: int = 5, bookings: int = 5) -> None:
+    tied = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    async with sessionmaker() as session:
+        # Every subscriber shares one subscribed_at, so only the id orders them.
+        session.add_all(
+            models.EmailSubscriber(
+                email=f"user{index}@example.com",
+                status="active" if index % 2 == 0 else "unsubscribed",
+                subscribed_at=tied,
+            )
+            for index in range(subscribers)
+        )
+        session.add_all(
+            models.ConsultationBooking(
+                name=f"Booking {index}",
+                email=f"booking{index}@example.com",
+                # Two bookings per slot.
+                scheduled_at=tied + timedelta(hours=index // 2),
+            )
+            for index in range(bookings)
+        )
+        await session.commit()
+
+
+async def walk(client, path: str, key: str, **params) -> list[dict]:
+    items, cursor = [], None
+    while True:
+        response = await client.get(path, params={**params, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200
+        body = response.json()
+        items.extend(body[key])
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return items
+
+
+def test_cursor_round_trip() -> None:
+    moment = datetime(2026, 1, 1, 12, 30, tzinfo=timezone.utc)
+    row_id = uuid.uuid4()
+    assert decode_cursor(encode_cursor(moment, row_id)) == (moment, row_id)
+    assert decode_cursor(encode_cursor("Acme", row_id)) == ("Acme", row_id)
+
+
+def test_keyset_pages_break_ties_by_id() -> None:
+    async def scenario() -> None:
+        async with api_harness() as h:
+            await seed(h.sessionmaker)
+
+            subscribers = await walk(h.client, "/admin/email/subscribers", "subscribers", limit=2)
+            ids = [subscriber["id"] for subscriber in subscribers]
+            assert len(ids) == len(set(ids)) == 5
+            assert ids == sorted(ids, key=lambda value: value.replace("-", ""), reverse=True)
+
+            bookings = await walk(h.client, "/admin/consultation/bookings", "bookings", limit=2)
+            assert len({booking["id"] for booking in bookings}) == 5
+            keys = [(booking["scheduled_at"], booking["id"].replace("-", "")) for booking in bookings]
+            assert keys == sorted(keys)
+
+            active = await walk(h.client, "/admin/email/subscribers", "subscribers", limit=1, status_filter="active")
+            assert {subscriber["status"] for subscriber in active} == {"active"} and len(active) == 3
+
+    asyncio.run(scenario())
+
+
+def test_subscribers_without_subscribed_at_page_last() -> None:
+    async def scenario() -> None:
+        async with api_harness() as h:
+            await seed(h.sessionmaker, subscribers=5, bookings=0)
+            async with h.sessionmaker() as session:
+                await session.execute(
+                    update(models.EmailSubscriber)
+                    .where(models.EmailSubscriber.email.in_(["user1@example.com", "user3@example.com"]))
+                    .values(subscribed_at=None)
+                )
+                await session.commit()
+
+            # Pages of two: the second ends on a subscriber with no subscribed_at.
+            subscribers = await walk(h.client, "/admin/email/subscribers", "subscribers", limit=2)
+            assert len({subscriber["id"] for subscriber in subscribers}) == 5
+            assert [subscriber["subscribed_at"] is None for subscriber in subscribers] == [
+                False,
+                False,
+                False,
+                True,
+                True,
+            ]
+
+    asyncio.run(scenario())
+
+
+def test_invalid_cursor_is_rejected() -> None:
+    async def scenario() -> None:
+        async with api_harness() as h:
+            garbage = base64.urlsafe_b64encode(b'["not a date", "nope"]').decode()
+            for path in ("/admin/email/subscribers", "/admin/consultation/bookings"):
+                for cursor in ("not-base64!", garbage):
+                    response = await h.client.get(path, params={"cursor": cursor})
+                    assert response.status_code == 400
+                    assert response.json()["detail"] == "Invalid cursor."
+
+    asyncio.run(scenario())
+
+
+def test_subscriber_count_modes() -> None:
+    async def scenario() -> None:
+        async with api_harness() as h:
+            await seed(h.sessionmaker)
+
+            async def total(**params):
+                response = await h.client.get("/admin/email/subscribers", params={"limit": 1, **params})
+                return response.json()["total"]
+
+            assert await total() == 5
+            # Off PostgreSQL there is no planner estimate, so the count stays exact.
+            assert await total(count="approximate") == 5
+            assert await total(count="approximate", status_filter="unsubscribed") == 2
+            assert await total(count="none") is None
+
+    asyncio.run(scenario())
+
+
+def test_exports_stream_every_row() -> None:
+    async def scenario() -> None:
+        async with api_harness() as h:
+            await seed(h.sessionmaker)
+
+            response = await h.client.get("/admin/email/subscribers/export")
+            assert response.headers["content-type"].startswith("text/csv")
+            assert 'filename="subscribers.csv"' in response.headers["content-disposition"]
+            rows = list(csv.DictReader(io.StringIO(response.text)))
+            assert {row["email"] for row in rows} == {f"user{index}@example.com" for index in range(5)}
+            # Same order as the query: (subscribed_at, id) ascending.
+            ids = [row["id"].replace("-", "") for row in rows]
+            assert ids == sorted(ids)
+
+            response = await h.client.get(
+                "/admin/email/subscribers/export", params={"format": "ndjson", "status_filter": "active"}
+            )
+            assert response.headers["content-type"].startswith("application/x-ndjson")
+            records = [json.loads(line) for line in response.text.splitlines()]
+            assert len(records) == 3
+            assert set(records[0]) == {"id", "email", "status", "tags", "subscribed_at"}
+            assert records[0]["subscribed_at"].startswith("2026-01-01")
+
+    asyncio.run(scenario())
@@ -0,0 +1,108 @@
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from marketing_api.db import models
+from tests.helpers import api_harness, query_budget
+
+# Maximum statements per admin list endpoint, independent of row count.
+QUERY_BUDGETS = {
+    "/admin/email/campaigns": 3,
+    "/admin/email/campaigns/{campaign_id}/sequences": 2,
+    "/admin/email/subscribers": 3,
+    "/public/ab-testing/tests": 3,
+    "/public/ab-testing/tests/{test_id}/results": 3,
+    "/admin/consultation/bookings": 1,
+    "/admin/dashboard/delivery-verification": 1,
+}
+
+
+async def seed(sessionmaker, rows: int) -> dict[str, str]:
+    now = datetime.now(timezone.utc)
+    async with sessionmaker() as session:
+        campaign = models.EmailCampaign(name="Welcome", type="drip", status="active")
+        session.add(campaign)
+        await session.flush()
+
+        sequences = [
+            models.EmailSequence(campaign_id=campaign.id, step_number=step, subject=f"Step {step}", body="Hi")
+            for step in range(1, rows + 1)
+        ]
+        subscribers = [models.EmailSubscriber(email=f"user{index}@example.com") for index in range(rows)]
+        session.add_all(sequences + subscribers)
+        await session.flush()
+        session.add_all(
+            models.EmailSend(
+                subscriber_id=subscriber.id,
+                sequence_id=sequence.id,
+                sent_at=now,
+                opened_at=now if index % 2 else None,
+            )
+            for index, (subscriber, sequence) in enumerate(zip(subscribers, sequences))
+        )
+
+        tests = [
+            models.ABTest(name=f"Test {index}", status="active", conversion_event="signup")
+            for index in range(rows)
+        ]
+        session.add_all(tests)
+        await session.flush()
+        for test in tests:
+            variants = [
+                models.TestVariant(test_id=test.id, name=key, variant_key=key, content_json=json.dumps({}))
+                for key in ("control", "variant_a")
+            ]
+            session.add_all(variants)
+            await session.flush()
+            for variant in variants:
+                assignment = models.TestAssignment(test_id=test.id, variant_id=variant.id, session_id=str(variant.id))
+                session.add(assignment)
+                await session.flush()
+                session.add(
+                    models.TestConversion(
+                        test_id=test.id,
+                        variant_id=variant.id,
+                        assignment_id=assignment.id,
+                        event_name="signup",
+                    )
+                )
+
+        session.add_all(
+            models.ConsultationBooking(
+                name=f"Booking {index}",
+                email=f"booking{index}@example.com",
+                scheduled_at=now + timedelta(days=index),
+            )
+            for index in range(rows)
+        )
+        session.add_all(models.Lead(full_name=f"Lead {index}", email=f"lead{index}@example.com") for index in range(rows))
+        await session.commit()
+
+        return {"campaign_id": str(campaign.id), "test_id": str(tests[0].id)}
+
+
+async def measure_statements(rows: int) -> dict[str, int]:
+    async with api_harness() as harness:
+        ids = await seed(harness.sessionmaker, rows)
+        counts = {}
+        for template in QUERY_BUDGETS:
+            # No statement shape may repeat per row, whatever the row count.
+            with query_budget(QUERY_BUDGETS[template], max_repeats=1) as profile:
+                response = await harness.client.get(template.format(**ids))
+            assert response.status_code == 200, (template, response.text)
+            counts[template] = profile.statements
+        return counts
+
+
+@pytest.fixture(scope="module")
+def statement_counts() -> dict[int, dict[str, int]]:
+    return {rows: asyncio.run(measure_statements(rows)) for rows in (2, 25)}
+
+
+@pytest.mark.parametrize("template", list(QUERY_BUDGETS))
+def test_admin_list_endpoints_stay_within_query_budget(template, statement_counts) -> None:
+    small, large = statement_counts[2][template], statement_counts[25][template]
+    assert large <= QUERY_BUDGETS[template]
+    assert small == large, f"{template} issues more statements as rows grow ({small} -> {large})"
@@ -0,0 +1,57 @@
+import asyncio
+import logging
+
+import httpx
+from sqlalchemy import select
+
+from marketing_api.db import models
+from marketing_api.db.profiler import profile_queries, statement_shape
+from marketing_api.main import app
+from marketing_api.middleware.query_profiler import QueryProfilerMiddleware
+from marketing_api.settings import settings
+from tests.helpers import api_harness
+
+
+def test_statement_shape_ignores_literals_and_parameter_lists() -> None:
+    assert statement_shape("SELECT * FROM leads WHERE id = 42 AND name = 'O''Neil'") == (
+        "SELECT * FROM leads WHERE id = ? AND name = ?"
+    )
+    assert statement_shape("SELECT id FROM leads\n WHERE id IN (?, ?, ?)") == statement_shape(
+        "SELECT id FROM leads WHERE id IN (?)"
+    )
+
+
+def test_profiles_nest_and_flag_repeated_shapes() -> None:
+    async def scenario() -> None:
+        async with api_harness() as h:
+            async with h.sessionmaker() as session:
+                with profile_queries() as outer:
+                    with profile_queries() as inner:
+                        for index in range(6):
+                            await session.execute(select(models.Lead).where(models.Lead.email == f"{index}@x.io"))
+                    await session.execute(select(models.Customer))
+
+            assert inner.statements == 6
+            assert outer.statements == 7
+            [(shape, count)] = outer.repeated(5)
+            assert count == 6 and "FROM leads" in shape
+
+    asyncio.run(scenario())
+
+
+def test_middleware_adds_server_timing_and_warns_over_budget(monkeypatch, caplog) -> None:
+    monkeypatch.setattr(settings, "sql_budget_statements", 0)
+
+    async def scenario() -> httpx.Response:
+        async with api_harness():
+            transport = httpx.ASGITransport(app=QueryProfilerMiddleware(app))
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return await client.get("/health/ready")
+
+    with caplog.at_level(logging.WARNING, logger="marketing_api.middleware.query_profiler"):
+        response = asyncio.run(scenario())
+
+    assert response.status_code == 200
+    assert response.headers["server-timing"].startswith("db;dur=")
+    assert response.headers["server-timing"].endswith('desc="1 queries"')
+    assert "SQL budget exceeded on GET /health/ready: 1 statements" in caplog.text
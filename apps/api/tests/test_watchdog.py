@@ -0,0 +1,54 @@
+import asyncio
+import time
+
+from marketing_api.metrics import LoopLagMonitor
+from marketing_api.watchdog import LoopStall, LoopWatchdog, active_requests, loop_stalls
+
+
+def block_the_loop(seconds: float) -> None:
+    time.sleep(seconds)
+
+
+def test_watchdog_reports_blocking_call_with_route_and_stack() -> None:
+    stalls: list[LoopStall] = []
+
+    async def handler() -> None:
+        active_requests[asyncio.current_task()] = {"method": "POST", "path": "/public/seo/audit"}
+        block_the_loop(0.3)
+
+    async def scenario() -> None:
+        monitor = LoopLagMonitor(interval=0.02)
+        watchdog = LoopWatchdog(monitor, threshold=0.1, interval=0.02, on_stall=stalls.append)
+        await watchdog.start()
+        await asyncio.sleep(0.05)
+        await asyncio.create_task(handler())
+        await asyncio.sleep(0.05)
+        await watchdog.stop()
+        await monitor.stop()
+
+    before = loop_stalls.value(route="POST /public/seo/audit")
+    asyncio.run(scenario())
+
+    [stall] = stalls
+    assert stall.route == "POST /public/seo/audit"
+    assert "block_the_loop" in stall.stack
+    assert 0.1 <= stall.duration <= 0.4
+    assert loop_stalls.value(route="POST /public/seo/audit") == before + 1
+
+
+def test_watchdog_stays_quiet_when_loop_is_responsive() -> None:
+    stalls: list[LoopStall] = []
+
+    async def scenario() -> None:
+        monitor = LoopLagMonitor(interval=0.02)
+        watchdog = LoopWatchdog(monitor, threshold=0.1, interval=0.02, on_stall=stalls.append)
+        await watchdog.start()
+        for _ in range(10):
+            await asyncio.sleep(0.01)
+        await watchdog.stop()
+        await monitor.stop()
+        # The watchdog added no timer of its own to the loop.
+        assert [task.get_name() for task in asyncio.all_tasks()] == [asyncio.current_task().get_name()]
+
+    asyncio.run(scenario())
+    assert stalls == []
@@ -65,12 +65,23 @@ function ConsultationCalendarContent() {
       const endDate = new Date();
       endDate.setMonth(endDate.getMonth() + 3);
 
-      const data = await fetchWithAuth(
-        `${API_URL}/admin/consultation/bookings?start_date=${startDate.toISOString()}&end_date=${endDate.toISOString()}`,
-        token
-      );
-
-      setBookings(data.bookings || []);
+      // The API returns bookings a page at a time; follow next_cursor to the end.
+      const loaded: Booking[] = [];
+      let cursor: string | null = null;
+      do {
+        const params = new URLSearchParams({
+          start_date: startDate.toISOString(),
+          end_date: endDate.toISOString(),
+        });
+        if (cursor) {
+          params.set("cursor", cursor);
+        }
+        const data = await fetchWithAuth(`${API_URL}/admin/consultation/bookings?${params}`, token);
+        loaded.push(...(data.bookings || []));
+        cursor = data.next_cursor ?? null;
+      } while (cursor);
+
+      setBookings(loaded);
     } catch (err) {
       setError(err instanceof Error ? err.message : "Failed to load bookings");
     } finally {